@@ -0,0 +1,89 @@
+#!/usr/bin/python
+#
+#    Use, distribution, and modification of the DRO Trimmer binaries, source code,
+#    or documentation, is subject to the terms of the MIT license, as below.
+#
+#    Copyright (c) 2008 - 2014 Laurence Dougal Myers
+#
+#    Permission is hereby granted, free of charge, to any person obtaining a copy
+#    of this software and associated documentation files (the "Software"), to deal
+#    in the Software without restriction, including without limitation the rights
+#    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#    copies of the Software, and to permit persons to whom the Software is
+#    furnished to do so, subject to the following conditions:
+#
+#    The above copyright notice and this permission notice shall be included in
+#    all copies or substantial portions of the Software.
+#
+#    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+#    THE SOFTWARE.
+
+import optparse
+import os
+import sys
+import dro_globals
+import dro_io
+import dro_util
+
+
+def convert_file(input_file_name, output_file_name, compress=False):
+    """ Converts a DRO v1 file to DRO v2, without playing it back (see
+    dro_io.transcode_v1_to_v2)."""
+    compression = dro_io.DRO_COMPRESSION_ZLIB if compress else dro_io.DRO_COMPRESSION_NONE
+    dro_io.DroFileIO().convert_v1_to_v2(input_file_name, output_file_name, compression)
+
+
+def __parse_arguments():
+    usage = ("Usage: %prog [options] file [file ...]\n\n" +
+             "Converts DRO v1 files to DRO v2. Each output file is named after its input file,\n" +
+             "with \"_2\" added, e.g. \"song.dro\" becomes \"song_2.dro\".")
+    version = dro_globals.g_app_version
+    oparser = optparse.OptionParser(usage, version=version)
+    oparser.add_option("-d", "--output-dir", dest="output_dir", default=None,
+        help="The directory to write the converted files to. Defaults to the same directory as each input file.")
+    oparser.add_option("-z", "--compress", action="store_true", dest="compress", default=False,
+        help="Compress the output files. Only DRO Trimmer can read compressed files.")
+    options, args = oparser.parse_args()
+    return oparser, options, args
+
+
+def main():
+    oparser, options, args = __parse_arguments()
+    if len(args) < 1:
+        print "Please pass the name of at least one file to convert."
+        oparser.print_help()
+        return 1
+    for input_file_name in args:
+        if not os.path.isfile(input_file_name):
+            print "File not found, or is not a file: %s" % input_file_name
+            return 2
+    if options.output_dir is not None and not os.path.isdir(options.output_dir):
+        print "Output directory not found, or is not a directory: %s" % options.output_dir
+        return 2
+
+    num_failed = 0
+    for input_file_name in args:
+        base, ext = os.path.splitext(input_file_name)
+        output_file_name = base + "_2" + ext
+        if options.output_dir is not None:
+            output_file_name = os.path.join(options.output_dir, os.path.basename(output_file_name))
+        if os.path.isfile(output_file_name):
+            print ("Output file already exists, skipping. Please delete it or rename it: %s"
+                % output_file_name)
+            num_failed += 1
+            continue
+        try:
+            print "Converting V1 file %s to V2 file %s..." % (input_file_name, output_file_name)
+            convert_file(input_file_name, output_file_name, options.compress)
+        except dro_util.DROTrimmerException, e:
+            print e
+            num_failed += 1
+    print "Done! Converted %i of %i files." % (len(args) - num_failed, len(args))
+    return 4 if num_failed else 0
+
+if __name__ == "__main__": sys.exit(main())
@@ -1,647 +1,1290 @@
-#!/usr/bin/python
-#
-#    Use, distribution, and modification of the DRO Trimmer binaries, source code,
-#    or documentation, is subject to the terms of the MIT license, as below.
-#
-#    Copyright (c) 2008 - 2014 Laurence Dougal Myers
-#
-#    Permission is hereby granted, free of charge, to any person obtaining a copy
-#    of this software and associated documentation files (the "Software"), to deal
-#    in the Software without restriction, including without limitation the rights
-#    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
-#    copies of the Software, and to permit persons to whom the Software is
-#    furnished to do so, subject to the following conditions:
-#
-#    The above copyright notice and this permission notice shall be included in
-#    all copies or substantial portions of the Software.
-#
-#    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
-#    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
-#    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
-#    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
-#    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
-#    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
-#    THE SOFTWARE.
-
-from collections import defaultdict
-import difflib
-import itertools
-import threading
-
-import dro_data
-from dro_util import DROTrimmerException, read_config
-import regdata
-
-# Duplicated from dro_data to avoid circular import. TODO: move to common location.
-DRO_FILE_V1 = 1
-DRO_FILE_V2 = 2
-
-
-class DROTotalDelayCalculator(object):
-    def sum_delay(self, dro_song):
-        """
-        @type dro_song: DROSong
-        """
-        # Bleh
-        calc_delay = 0
-        for inst in dro_song.data:
-            if inst.inst_type == dro_data.DROInstruction.T_DELAY:
-                calc_delay += inst.value
-        return calc_delay
-
-
-class DROTotalDelayWithWriteDelayCalculator(object):
-    def __init__(self):
-        try:
-            config = read_config()
-            self.chip_write_delay = config.getfloat("audio", "chip_write_delay")
-        except Exception, e:
-            print "Could not read audio settings from drotrim.ini, using default value for chip write delay. (Error: %s)" % e
-            self.chip_write_delay = 0
-
-    def sum_delay(self, dro_song):
-        """
-        @type dro_song: DROSong
-        """
-        calc_delay = 0 # milliseconds
-        total_write_delay = 0 # microseconds
-        for inst in dro_song.data:
-            if inst.inst_type == dro_data.DROInstruction.T_DELAY:
-                calc_delay += inst.value
-            elif inst.inst_type == dro_data.DROInstruction.T_REGISTER:
-                total_write_delay += self.chip_write_delay
-        calc_delay += total_write_delay // 1000
-        return calc_delay
-
-
-class DROFirstDelayAnalyzer(object):
-    def __init__(self):
-        self.result = False
-
-    def analyze_dro(self, dro_song):
-        """
-        @type dro_song: DROSong
-        """
-        if not len(dro_song.data):
-            return
-        inst = dro_song.data[0]
-        if inst.inst_type == dro_data.DROInstruction.T_DELAY:
-            self.result = True
-
-
-class DROTotalDelayMismatchAnalyzer(object):
-    def __init__(self):
-        self.result = False
-
-    def analyze_dro(self, dro_song):
-        """
-        @type dro_song: DROSong
-        """
-        calc_delay = DROTotalDelayCalculator().sum_delay(dro_song)
-        self.result = calc_delay != dro_song.ms_length
-
-
-class DROLoopAnalyzer(object):
-    class Match(object):
-        def __init__(self, start=None, end=None, length=0):
-            self.start = start
-            self.end = end
-            self.length = length
-
-        def __repr__(self):
-            return "Match(start=%s, end=%s, length=%s)" % (self.start, self.end, self.length)
-
-    class AnalysisResult(object):
-        def __init__(self, description, result):
-            self.description = description
-            self.result = result
-
-        def __str__(self):
-            return "%s\n\n%s" % (self.description, self.result)
-
-    def __init__(self):
-        self.analysis_methods = [
-            self.analyze_earliest_end_match,
-            self.analyze_earliest_end_delay_and_note_match,
-            self.analyze_latest_start_match,
-            self.analyze_longest_instruction_blocks,
-            self.analyze_seqeunce_matcher
-        ]
-
-    def num_analyses(self):
-        return len(self.analysis_methods)
-
-    def analyze_dro(self, dro_song):
-        """
-        @type dro_song: DROSong
-        """
-        results = []
-        for analysis_method in self.analysis_methods:
-            results.append(analysis_method(dro_song))
-        return results
-
-    def __do_backward_search_analysis(self, dro_data, original_indexes):
-        """From the index second from the end, compare to the last value at the end.
-        If the current value matches the end value, compare all
-        values preceding the current value against all values
-        preceding the end value.
-        (This is a fairly naive approach.)
-        Example:
-          [0, 1, 2, 3, 1, 2]
-                       ^  ^
-          [0, 1, 2, 3, 1, 2]
-                       ^  ^
-          [0, 1, 2, 3, 1, 2]
-                    ^     ^
-          [0, 1, 2, 3, 1, 2]
-                 ^        ^
-          [0, 1, 2, 3, 1, 2]
-              ^--/     ^--/
-           result:
-           section 1: start = 1, end = 2, length = 2
-           section 2: start = 4, end = 5, length = 2
-        """
-        result = ""
-        curr_match = None
-        end_match = self.Match()
-        longest_match = self.Match()
-        end_index = len(dro_data) - 1
-        later_index = end_index
-        match_ended = False
-        # Iterate in reverse, also getting the index.
-        for i, curr_value in itertools.izip(xrange(end_index, -1, -1), (reversed(dro_data))):
-            # Ignore the end value
-            if i == end_index:
-                continue
-            later_value = dro_data[later_index]
-            if curr_value == later_value:
-                # Check if we're starting a new match
-                if later_index == end_index:
-                    curr_match = self.Match(start=i, end=i, length=0)
-                curr_match.length += 1
-                curr_match.start = i
-                if i == 0:
-                    match_ended = True
-            elif curr_match is not None:
-                match_ended = True
-
-            # Sequence has ended, and it's longer than the longest match so far,
-            #  or it's the same length as the longest match but has an earlier
-            #  starting point.
-            if match_ended:
-                if (curr_match.length > longest_match.length or
-                    (curr_match.length == longest_match.length and
-                     curr_match.start < longest_match.start)):
-                    longest_match = curr_match
-                    end_match = self.Match(
-                        start=later_index + 1,
-                        end=end_index,
-                        length=curr_match.length
-                    )
-                curr_match = None
-                later_index = end_index
-                match_ended = False
-
-            # If we're matching, decrement the end index.
-            if curr_match is not None:
-                later_index -= 1
-
-        result += "My conclusions:\n"
-        if longest_match.start is None or longest_match.end is None or longest_match.length == 0:
-            result += "No match found. I'm sorry.\n"
-        else:
-            # Convert matching indexes to original indexes
-            longest_match = self.Match(
-                start=original_indexes[longest_match.start],
-                end=original_indexes[longest_match.end],
-                length=original_indexes[longest_match.end] - original_indexes[longest_match.start] + 1
-            )
-            end_match = self.Match(
-                start=original_indexes[end_match.start],
-                end=original_indexes[end_match.end],
-                length=original_indexes[end_match.end] - original_indexes[end_match.start] + 1
-            )
-            result += ("Loop section 1: start=%s, end=%s, length=%s.\n" %
-                       (longest_match.start, longest_match.end, longest_match.length))
-            result += ("Loop section 2: start=%s, end=%s, length=%s.\n" %
-                       (end_match.start, end_match.end, end_match.length))
-
-        return result
-
-    def analyze_earliest_end_match(self, dro_song):
-        """
-        Goes through the data backwards. Finds the "earliest" sequence of instructions that
-        matches the sequence of instructions at the end of the song.
-        """
-        dro_data = dro_song.data
-        original_indexes = range(len(dro_song.data))
-        result = self.__do_backward_search_analysis(dro_data, original_indexes)
-        return self.AnalysisResult("Earliest match to end", result)
-
-    def analyze_earliest_end_delay_and_note_match(self, dro_song):
-        """
-        Goes through the data backwards. Finds the "earliest" sequence of instructions that
-        matches the sequence of instructions at the end of the song. Only looks at
-        delay and note on/off instructions.
-        """
-
-        # First, go through the data and only keep note on/off instructions and delays.
-        # This is because sometimes the looped information has slightly different
-        # data.
-        original_indexes = []
-        dro_data_copy = dro_song.data.shallow_copy()
-
-        MIN_DELAY_TO_INCLUDE = 2 # skip delays of 1 ms
-        for i, inst in enumerate(dro_song.data):
-            should_include = False
-            if inst.inst_type == dro_data.DROInstruction.T_DELAY:
-                if inst.value >= MIN_DELAY_TO_INCLUDE:
-                    should_include = True
-            elif inst.inst_type == dro_data.DROInstruction.T_REGISTER:
-                if inst.command in range(0xB0, 0xB9):
-                    should_include = True
-            if should_include:
-                dro_data_copy.append_raw(dro_song.data.get_raw(i))
-                original_indexes.append(i)
-
-        result = self.__do_backward_search_analysis(dro_data_copy, original_indexes)
-        return self.AnalysisResult("Earliest match to end (delays and note on/off only)", result)
-
-    def analyze_latest_start_match(self, dro_song):
-        """
-        Goes through the data forwards. Finds the "latest" sequence of instructions that
-        matches the sequence of instructions towards the start of the song, after the
-        first note on and the first delay instructions.
-        """
-        result = ""
-        # First, find our starting point.
-        note_on_found = False
-        start_pos = 0
-        for i, inst in enumerate(dro_song.data):
-            if inst.inst_type == dro_data.DROInstruction.T_DELAY:
-                if note_on_found:
-                    # This is where we want to start, the first delay after the first "note on" instruction
-                    start_pos = i
-                    break
-                else:
-                    continue
-            elif (inst.inst_type == dro_data.DROInstruction.T_REGISTER and
-                    inst.value in range(0xB0, 0xB9)):
-                note_on_found = True
-
-        if start_pos == 0:
-            return self.AnalysisResult("Latest match to start", "Forward search couldn't find a place to start.\n")
-
-        # Next, do the search for reals.
-        # (This is very similar to method on & two, but goes forwards instead)
-        early_index = start_pos
-        curr_match = None
-        longest_match = self.Match()
-        start_match = self.Match()
-        match_ended = False
-        for i in xrange(start_pos + 1, len(dro_song.data)):
-            early_value = dro_song.data[early_index]
-            later_value = dro_song.data[i]
-
-            if early_value == later_value:
-                # Check if we're starting a new match
-                if early_index == start_pos:
-                    curr_match = self.Match(start=i, end=i, length=0)
-                curr_match.length += 1
-                curr_match.end = i
-                if i == len(dro_song.data) - 1:
-                    match_ended = True
-            elif curr_match is not None:
-                match_ended = True
-
-            # Sequence has ended, and it's longer than the longest match so far,
-            #  or it's the same length as the longest match but has a later
-            #  starting point.
-            if match_ended:
-                if (curr_match.length > longest_match.length or
-                    (curr_match.length == longest_match.length and
-                     curr_match.start > longest_match.start)):
-                    longest_match = curr_match
-                    start_match = self.Match(
-                        start=start_pos,
-                        end=early_index - 1,
-                        length=curr_match.length
-                    )
-                curr_match = None
-                early_index = start_pos
-                match_ended = False
-
-            # If we're matching, increment the start index.
-            if curr_match is not None:
-                early_index += 1
-
-        result += "My conclusions:\n"
-        if longest_match.start is None or longest_match.end is None or longest_match.length == 0:
-            result += "No match found. I'm sorry.\n"
-        else:
-            result += ("Loop section 1: start=%s, end=%s, length=%s.\n" %
-                       (start_match.start, start_match.end, start_match.length))
-            result += ("Loop section 2: start=%s, end=%s, length=%s.\n" %
-                       (longest_match.start, longest_match.end, longest_match.length))
-
-        return self.AnalysisResult("Latest match to start", result)
-
-    def analyze_longest_instruction_blocks(self, dro_song):
-        """
-        Finds the the 15 longest blocks of instructions, separated by delay instructions.
-        Excludes the first block at the beginning of the song (which is usually just
-        register initialization, in DRO 2).
-        """
-        # This is the shortest length that we want to keep track of.
-        notable_threshold = 10
-
-        # Try and find sections with large chunks of instructions before a delay.
-        sections = []
-        curr_section = self.Match()
-        for i, inst in enumerate(dro_song.data):
-            if inst.inst_type != dro_data.DROInstruction.T_DELAY:
-                if curr_section.start is None:
-                    curr_section.start = i
-                curr_section.length += 1
-            else:
-                curr_section.end = i - 1
-                if curr_section.length >= notable_threshold:
-                    sections.append(curr_section)
-                curr_section = self.Match()
-
-        # If we've got a hanging section left over, finish it off.
-        if curr_section.start is not None and curr_section.end is None:
-            curr_section.end = len(dro_song.data) - 1
-            if curr_section.length >= notable_threshold:
-                sections.append(curr_section)
-
-        sections.sort(key=lambda m: m.length, reverse=True)
-        num_to_display = min(len(sections), 15)
-        if len(sections) > 1 and sections[0].start == 0:
-            interesting_sections = sections[1:num_to_display + 1] # skip the first one since it's the start of the song
-        else:
-            interesting_sections = sections[0:num_to_display]
-        sections_string = "\n".join(str(sec) for sec in interesting_sections)
-        result = "Interesting sections (by size):\n%s" % (sections_string,)
-        result += "\n\n"
-        interesting_sections.sort(key=lambda m: m.start, reverse=True)
-        sections_string = "\n".join(str(sec) for sec in interesting_sections)
-        result += "Interesting sections (by position):\n%s" % (sections_string,)
-        return self.AnalysisResult("Longest instruction blocks", result)
-
-    def analyze_seqeunce_matcher(self, dro_song):
-        """
-        Splits the data in half, and uses Python's difflib.SequenceMatcher to
-        find the longest matching blocks in each half.
-        """
-        result_str = ""
-        # Split the data in half and see what the largest matching block is.
-        # This will give us an indication on whether or not the song loops, and if so,
-        #  where the loop points are.
-        sm = difflib.SequenceMatcher()
-        tmp_len = len(dro_song.data) / 2
-        tmp_a = dro_song.data[:tmp_len]
-        tmp_b = dro_song.data[tmp_len:]
-        sm.set_seqs(tmp_a, tmp_b)
-        #result1 = sm.get_matching_blocks()
-        #print result1
-
-        # We have to do "len(dro_song.data) - tmp_len" because of rounding when
-        #  dividing by two earlier.
-        result = sm.find_longest_match(0, tmp_len, 0, len(dro_song.data) - tmp_len)
-        result_str += ("Result of analysis:\n longest block = " + str(result[2]) +
-                       ",\n start first half = " + str(result[0]) +
-                       ",\n start second half = " + str(result[1] + tmp_len) + "\n")
-
-        # TODO: Find the first instance of the data block dro_data[result[0]:result[1] + tmp_len]?
-        # No. This is not the problem. The problem is that the longest block could be because
-        #  it starts with a note-off, whereas the first block will not have that note off. Every
-        #  loop iteration, however, will have that note off, and so it will have a longer matching
-        #  block.
-        # Taking this into consideration, notify the user that if the first instruction
-        #  in the matched block is a note off, there may be an earlier block that is more
-        #  suitable for trimming.
-
-        # If first instruction is note off, alert user
-        inst = dro_song.data[result[0]]
-        if (inst.inst_type == dro_data.DROInstruction.T_REGISTER and
-            inst.value in range(0xB0, 0xB9)):
-            result_str += ("Note: The first instruction in the matched block was a key on/off. There may be " +
-                           "a more appropriate block earlier in the song.\n")
-
-        # Now search for the first delay
-        for i, inst in enumerate(dro_song.data):
-            if inst.inst_type == dro_data.DROInstruction.T_DELAY:
-                result_str += ("First delay at pos = " + str(i) + "\n")
-                break
-
-        return self.AnalysisResult("Halved sequence match", result_str)
-
-
-class DRODetailedRegisterAnalyzer(object):
-    # TODO: output channels and banks in the table.
-    OPL_TYPE_OPL2, OPL_TYPE_DUAL_OPL2, OPL_TYPE_OPL3 = range(3)
-
-    def __init__(self):
-        self.state_descriptions = []
-        self.current_bank = 0
-        self.current_state = None
-        self.OPL_TYPE_DRO1_MAP = [
-            self.OPL_TYPE_OPL2,
-            self.OPL_TYPE_OPL3,
-            self.OPL_TYPE_DUAL_OPL2
-        ]
-        self.OPL_TYPE_DRO2_MAP = [
-            self.OPL_TYPE_OPL2,
-            self.OPL_TYPE_DUAL_OPL2,
-            self.OPL_TYPE_OPL3
-        ] # a bit pointless, but added for consistency.
-        self._stop = threading.Event()
-
-    def cancel(self):
-        self._stop.set()
-
-    def analyze_dro(self, dro_song):
-        self.state_descriptions = []
-        self.current_state = [None] * 0x1FF
-        if dro_song.file_version == DRO_FILE_V1:
-            opl_type = self.OPL_TYPE_DRO1_MAP[dro_song.opl_type]
-        elif dro_song.file_version == DRO_FILE_V2:
-            opl_type = self.OPL_TYPE_DRO2_MAP[dro_song.opl_type]
-        else:
-            raise (DROTrimmerException("Unrecognised DRO version: %s. Cannot perform state analysis." %
-                                       (dro_song.file_version,)))
-        # Wait for the data lock to become available.
-        with dro_song.data_lock:
-            for inst in dro_song.data:
-                if self._stop.isSet():
-                    return
-                if inst.inst_type == dro_data.DROInstruction.T_DELAY:
-                    self.state_descriptions.append(
-                        (self.current_bank, "Delay: %s ms" % (inst.value,)))
-                elif inst.inst_type == dro_data.DROInstruction.T_BANK_SWITCH:
-                    self.current_bank = inst.value
-                    self.state_descriptions.append(
-                        (self.current_bank, "Bank switch: %s" % (("low", "high")[self.current_bank],))
-                    )
-                else:
-                    if inst.bank is not None:
-                        self.current_bank = inst.bank
-                    desc = self.__analyze_and_update_register(self.current_bank,
-                                                              inst.command,
-                                                              inst.value,
-                                                              opl_type)
-                    self.state_descriptions.append(
-                        (self.current_bank, desc))
-        return self.state_descriptions
-
-    def __analyze_and_update_register(self, bank, reg, val, opl_type):
-        try:
-            if bank and regdata.registers.has_key(0x100 | reg):
-                register_description = regdata.registers[0x100 | reg]
-            else:
-                register_description = regdata.registers[reg]
-        except Exception:
-            return "Unknown register: %s" % (reg,)
-
-        reg_and_bank = (bank << 8) | reg
-        old_val = self.current_state[reg_and_bank]
-
-        changed_desc = []
-        bitmasks = regdata.register_bitmask_lookup[register_description]
-        for bm in bitmasks:
-            # Output the description for this bitmask, if the old value is None (start of the song), or the
-            #  value has changed.
-            if old_val is None or (bm.mask & old_val) ^ (bm.mask & val):
-                changed_desc.append(bm.description)
-
-        self.current_state[reg_and_bank] = val
-
-        return ' / '.join(changed_desc) if len(changed_desc) else '(no changes)'
-
-
-class DRORegisterUsageAnalyzer(object):
-    PERC_CHANNEL = 0xBD
-
-    def __init__(self, detailed_percussion_analysis=False):
-        self.detailed_percussion_analysis = detailed_percussion_analysis
-        self.perc_usage = defaultdict(bool)
-        self.usage = defaultdict(int)
-
-    def analyze_dro(self, dro_song):
-        """Returns two dicts. First dict is register usage, second dictt is perc inst usage.
-        Keys are registers, with the bank set in bit 0x100. e.g.
-         register 0xDB on the high bank will return a key of 0x1DB.
-        Values are the number of times that register is used in the DRO file.
-
-        Perc usage dict:
-        Keys are bitmasks (powers of 2), values are "True" if that bit was set during
-        the analysis."""
-        self.usage = defaultdict(int)
-        self.perc_usage = defaultdict(bool)
-        perc_bitmasks = regdata.register_bitmask_lookup[regdata.registers[self.PERC_CHANNEL]]
-        with dro_song.data_lock:
-            bank = 0
-            for inst in dro_song.data:
-                if inst.bank is not None:
-                    bank = inst.bank
-                if inst.inst_type == dro_data.DROInstruction.T_BANK_SWITCH:
-                    bank = inst.value
-                if inst.inst_type == dro_data.DROInstruction.T_REGISTER:
-                    self.usage[(bank << 8) | inst.command] += 1
-                    if inst.command == self.PERC_CHANNEL and self.detailed_percussion_analysis:
-                        # Go through all bitmasks, mark any usages.
-                        for i, pb in enumerate(perc_bitmasks):
-                            if inst.value & pb.mask:
-                                self.perc_usage[(bank << 8) | pb.mask] = True
-        return self.usage, self.perc_usage
-
-
-class DRODebugAnalyzer(object):
-    def __init__(self):
-        pass
-
-    def analyze_dro(self, dro_song):
-        """Prints out the DRO song info, then prints each instruction."""
-        with dro_song.data_lock:
-            print dro_song
-            for inst in dro_song.data:
-                print inst
-
-
-class DROSimpleNoteAnalyser(object):
-    PITCH_REGISTERS = frozenset(range(0xA0, 0xA8 + 1))
-    KEY_ON_REGISTERS = frozenset(range(0xB0, 0xB8 + 1))
-    CHANNELS_PER_BANK = 9
-
-    class NoteStatus(object):
-        PITCH_MAP = {
-            0x015B : ' C',
-            0x016B : 'C#',
-            0x0181 : ' D',
-            0x0198 : 'D#',
-            0x01B0 : ' E',
-            0x01CA : ' F',
-            0x01E5 : 'F#',
-            0x0202 : ' G',
-            0x0220 : 'G#',
-            0x0241 : ' A',
-            0x0263 : 'A#',
-            0x0287 : ' B',
-            0x02AE : ' C'
-        }
-
-        def __init__(self, channel=None, note_status_to_clone=None):
-            if note_status_to_clone is not None:
-                self.channel = note_status_to_clone.channel
-                self.pitch = note_status_to_clone.pitch
-                self.octave = note_status_to_clone.octave
-                self.on = note_status_to_clone.on
-            else:
-                self.channel = channel
-                self.pitch = 0
-                self.octave = 0
-                self.on = False
-
-        def __str__(self):
-            # 0x241 = 440.0 hz
-            # 0x241 = 577
-            # 24.7 hz between notes
-            # approx 1.31 per hz
-            closest_value = min(self.PITCH_MAP.keys(), key=lambda x: abs(x - self.pitch))
-            note_name = "%s-%s" % (self.PITCH_MAP[closest_value], self.octave)
-            return "(ch: %s, pitch: %x, oct: %s, note: %s)" % (self.channel, self.pitch, self.octave, note_name)
-
-    def analyze_dro(self, dro_song):
-        """
-        Returns a list of of "Note on" pitch values (as NoteStatus objects), containing one list per channel.
-        Ignores pitch bends and other pitch changes while a note is on.
-
-        @type dro_song: DROSong
-        """
-        channel_notes = [DROSimpleNoteAnalyser.NoteStatus(channel=i + 1) for i in xrange(DROSimpleNoteAnalyser.CHANNELS_PER_BANK * 2)]
-        output = [[] for i in xrange(DROSimpleNoteAnalyser.CHANNELS_PER_BANK * 2)]
-        with dro_song.data_lock:
-            for inst in dro_song.data:
-                # Ignore non-register stuff.
-                if inst.inst_type != dro_data.DROInstruction.T_REGISTER:
-                    continue
-                # If it's A0 - A8, update the pitch
-                elif inst.command in DROSimpleNoteAnalyser.PITCH_REGISTERS:
-                    note_status = self.get_channel_status(channel_notes, inst)
-                    note_status.pitch = (note_status.pitch & 0xFF00) | inst.value
-                # If it's B0 - B8, update the pitch and note on/off
-                elif inst.command in DROSimpleNoteAnalyser.KEY_ON_REGISTERS:
-                    note_status = self.get_channel_status(channel_notes, inst)
-                    note_status.pitch = (note_status.pitch & 0x00FF) | ((inst.value & 0x03) << 8)
-                    note_status.octave = (inst.value & 0x1C) >> 2
-                    orig_on_value = note_status.on
-                    note_status.on = (inst.value & 0x20) > 0
-                    # If note on status changes, make a new entry in the output list
-                    if note_status.on ^ orig_on_value and note_status.on:
-                        output[note_status.channel - 1].append(DROSimpleNoteAnalyser.NoteStatus(note_status_to_clone=note_status))
-        return output
-
-    def get_channel_status(self, channel_notes, inst):
-        channel_index = (inst.command & 0x0F) + (inst.bank * DROSimpleNoteAnalyser.CHANNELS_PER_BANK)
-        return channel_notes[channel_index]
+#!/usr/bin/python
+#
+#    Use, distribution, and modification of the DRO Trimmer binaries, source code,
+#    or documentation, is subject to the terms of the MIT license, as below.
+#
+#    Copyright (c) 2008 - 2014 Laurence Dougal Myers
+#
+#    Permission is hereby granted, free of charge, to any person obtaining a copy
+#    of this software and associated documentation files (the "Software"), to deal
+#    in the Software without restriction, including without limitation the rights
+#    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#    copies of the Software, and to permit persons to whom the Software is
+#    furnished to do so, subject to the following conditions:
+#
+#    The above copyright notice and this permission notice shall be included in
+#    all copies or substantial portions of the Software.
+#
+#    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+#    THE SOFTWARE.
+
+import array
+import bisect
+from collections import defaultdict
+import cStringIO
+import difflib
+import itertools
+import multiprocessing
+import threading
+import traceback
+
+import dro_data
+import dro_globals
+from dro_util import DROTrimmerException, read_config
+import regdata
+
+# Duplicated from dro_data to avoid circular import. TODO: move to common location.
+DRO_FILE_V1 = 1
+DRO_FILE_V2 = 2
+
+
+class DROAnalyzerVisitor(object):
+    """ Base class for analyzers that can share a single decode pass over a song with other
+    analyzers (see DROCompositeAnalyzer). The song is handed to each visitor a batch of
+    instructions at a time, in the same form as DROData.iter_batches, instead of creating a
+    DROInstruction for each one.
+
+    Subclasses override start_song, visit_batch and finish_song, and put what they find
+    in "result"."""
+    def __init__(self):
+        self.result = None
+
+    def start_song(self, dro_song):
+        """ Called before the first batch. Reset any state from a previous song here."""
+        pass
+
+    def visit_batch(self, start, inst_types, commands, values, banks):
+        """ Called for each batch of instructions, in order. "start" is the index of the first
+        instruction in the batch. The lists are reused for the next batch, so copy anything you
+        want to keep."""
+        raise NotImplementedError()
+
+    def finish_song(self):
+        """ Called after the last batch."""
+        pass
+
+    def analyze_dro(self, dro_song):
+        """ Analyzes the song on its own. Returns the result."""
+        DROCompositeAnalyzer([self]).analyze_dro(dro_song)
+        return self.result
+
+
+class DROCompositeAnalyzer(object):
+    """ Runs any number of DROAnalyzerVisitors over a song, decoding it only once.
+    Each visitor's results are left in its own "result" attribute (or wherever it keeps them).
+
+    Can be cancelled from another thread, between batches. You can pass in a threading.Event
+    to use for cancelling, otherwise it makes its own."""
+    def __init__(self, visitors=None, stop_event=None):
+        self.visitors = [] if visitors is None else list(visitors)
+        self._stop = threading.Event() if stop_event is None else stop_event
+
+    def register(self, visitor):
+        self.visitors.append(visitor)
+
+    def cancel(self):
+        self._stop.set()
+
+    def analyze_dro(self, dro_song):
+        """ Returns a list of each visitor's result, in the order they were registered, or None if
+        cancelled.
+        @type dro_song: DROSong
+        """
+        visitors = self.visitors
+        with dro_song.data_lock.read_locked():
+            for visitor in visitors:
+                visitor.start_song(dro_song)
+            for batch in dro_song.data.iter_batches():
+                if self._stop.isSet():
+                    return None
+                for visitor in visitors:
+                    visitor.visit_batch(*batch)
+            for visitor in visitors:
+                visitor.finish_song()
+        return [visitor.result for visitor in visitors]
+
+
+class DROTotalDelayCalculator(object):
+    def sum_delay(self, dro_song):
+        """
+        @type dro_song: DROSong
+        """
+        return dro_song.data.delay_index.total()
+
+
+class DROTotalDelayWithWriteDelayCalculator(DROAnalyzerVisitor):
+    def __init__(self):
+        super(DROTotalDelayWithWriteDelayCalculator, self).__init__()
+        self._total_delay = 0
+        self._num_writes = 0
+        try:
+            config = read_config()
+            self.chip_write_delay = config.getfloat("audio", "chip_write_delay")
+        except Exception, e:
+            print "Could not read audio settings from drotrim.ini, using default value for chip write delay. (Error: %s)" % e
+            self.chip_write_delay = 0
+
+    def sum_delay(self, dro_song):
+        """ Totals the delays and counts the register writes in a single pass over the song.
+        @type dro_song: DROSong
+        """
+        return self.analyze_dro(dro_song)
+
+    def __add_write_delay(self, calc_delay, num_writes):
+        total_write_delay = num_writes * self.chip_write_delay # microseconds
+        calc_delay += total_write_delay // 1000
+        return calc_delay
+
+    def start_song(self, dro_song):
+        self._total_delay = 0
+        self._num_writes = 0
+
+    def visit_batch(self, start, inst_types, commands, values, banks):
+        self._total_delay += sum(itertools.compress(
+            values, dro_data.instruction_type_mask(inst_types, dro_data.DROInstruction.T_DELAY)))
+        self._num_writes += sum(dro_data.instruction_type_mask(inst_types, dro_data.DROInstruction.T_REGISTER))
+
+    def finish_song(self):
+        self.result = self.__add_write_delay(self._total_delay, self._num_writes)
+
+
+class DROFirstDelayAnalyzer(DROAnalyzerVisitor):
+    def __init__(self):
+        super(DROFirstDelayAnalyzer, self).__init__()
+        self.result = False
+
+    def analyze_dro(self, dro_song):
+        """
+        @type dro_song: DROSong
+        """
+        # On its own, only the first instruction needs decoding.
+        if not len(dro_song.data):
+            return
+        inst = dro_song.data[0]
+        if inst.inst_type == dro_data.DROInstruction.T_DELAY:
+            self.result = True
+
+    def start_song(self, dro_song):
+        self.result = False
+
+    def visit_batch(self, start, inst_types, commands, values, banks):
+        if start == 0 and len(inst_types):
+            self.result = inst_types[0] == dro_data.DROInstruction.T_DELAY
+
+
+class DROTotalDelayMismatchAnalyzer(DROAnalyzerVisitor):
+    def __init__(self):
+        super(DROTotalDelayMismatchAnalyzer, self).__init__()
+        self.result = False
+        self.calculated_delay = None
+        self._ms_length = None
+
+    def analyze_dro(self, dro_song):
+        """
+        @type dro_song: DROSong
+        """
+        # On its own, the delay index is quicker (and it's kept up to date as the song is edited).
+        self.calculated_delay = DROTotalDelayCalculator().sum_delay(dro_song)
+        self.result = self.calculated_delay != dro_song.ms_length
+
+    def start_song(self, dro_song):
+        self._ms_length = dro_song.ms_length
+        self.calculated_delay = 0
+
+    def visit_batch(self, start, inst_types, commands, values, banks):
+        self.calculated_delay += sum(itertools.compress(
+            values, dro_data.instruction_type_mask(inst_types, dro_data.DROInstruction.T_DELAY)))
+
+    def finish_song(self):
+        self.result = self.calculated_delay != self._ms_length
+
+
+def encode_instruction_symbols(dro_song):
+    """ Encodes each instruction in the song as a small integer, the same for instructions that
+    are equal (DROInstruction.__eq__), so the song can be searched like a string.
+    Returns an array of the symbols."""
+    symbols = array.array('i')
+    symbol_ids = {}
+    with dro_song.data_lock.read_locked():
+        for batch in dro_song.data.iter_batches():
+            for key in itertools.izip(*batch[1:]):
+                symbol = symbol_ids.get(key)
+                if symbol is None:
+                    symbol = symbol_ids[key] = len(symbol_ids)
+                symbols.append(symbol)
+    return symbols
+
+
+def build_suffix_array(symbols, upper=None):
+    """ Returns a list of the start positions of every suffix of the symbols, in sorted order.
+    The symbols must be integers from 0 to upper (defaults to the largest symbol).
+
+    Uses SA-IS (induced sorting), which is linear time: the "LMS" suffixes (see below) are
+    sorted first, by recursing on a shorter string made from them, then the order of every
+    other suffix is worked out from those in two passes. The prefix doubling approach takes
+    a pass for every doubling of the longest repeat, and a looping song is one long repeat."""
+    n = len(symbols)
+    if n < 2:
+        return range(n)
+    if n == 2:
+        return [0, 1] if symbols[0] < symbols[1] else [1, 0]
+    if upper is None:
+        upper = max(symbols)
+    # An "S" suffix sorts before the suffix after it, an "L" suffix sorts after it.
+    is_s = [False] * n
+    for i in xrange(n - 2, -1, -1):
+        is_s[i] = is_s[i + 1] if symbols[i] == symbols[i + 1] else (symbols[i] < symbols[i + 1])
+    # Start of each symbol's bucket in the suffix array (L suffixes come first in a bucket),
+    #  and the start of the S suffixes in it.
+    bucket_l = [0] * (upper + 1)
+    bucket_s = [0] * (upper + 1)
+    for i in xrange(n):
+        if not is_s[i]:
+            bucket_s[symbols[i]] += 1
+        else:
+            bucket_l[symbols[i] + 1] += 1
+    for i in xrange(upper + 1):
+        bucket_s[i] += bucket_l[i]
+        if i < upper:
+            bucket_l[i + 1] += bucket_s[i]
+
+    # An LMS ("leftmost S") suffix is an S suffix following an L suffix.
+    lms_ids = [-1] * (n + 1)
+    lms = []
+    for i in xrange(1, n):
+        if not is_s[i - 1] and is_s[i]:
+            lms_ids[i] = len(lms)
+            lms.append(i)
+    num_lms = len(lms)
+    sa = [0] * n
+    # Sorting from the LMS suffixes in position order sorts the LMS substrings (the
+    #  symbols from one LMS suffix to the next), which is enough to name them.
+    _induce_suffixes(symbols, sa, is_s, lms, bucket_l, bucket_s)
+    if num_lms:
+        sorted_lms = [pos for pos in sa if lms_ids[pos] != -1]
+        reduced = [0] * num_lms
+        name = 0
+        for i in xrange(1, num_lms):
+            left = sorted_lms[i - 1]
+            right = sorted_lms[i]
+            end_left = lms[lms_ids[left] + 1] if lms_ids[left] + 1 < num_lms else n
+            end_right = lms[lms_ids[right] + 1] if lms_ids[right] + 1 < num_lms else n
+            same = True
+            if end_left - left != end_right - right:
+                same = False
+            else:
+                while left < end_left:
+                    if symbols[left] != symbols[right]:
+                        break
+                    left += 1
+                    right += 1
+                if left == n or symbols[left] != symbols[right]:
+                    same = False
+            if not same:
+                name += 1
+            reduced[lms_ids[sorted_lms[i]]] = name
+        # Sort the LMS suffixes properly, then induce the rest from them.
+        reduced_sa = build_suffix_array(reduced, name)
+        for i in xrange(num_lms):
+            sorted_lms[i] = lms[reduced_sa[i]]
+        _induce_suffixes(symbols, sa, is_s, sorted_lms, bucket_l, bucket_s)
+    return sa
+
+
+def _induce_suffixes(symbols, sa, is_s, lms, bucket_l, bucket_s):
+    """ Fills in the suffix array for build_suffix_array, from the given LMS suffixes.
+    The L suffixes are placed by a forward pass, then the S suffixes by a backward pass."""
+    n = len(symbols)
+    for i in xrange(n):
+        sa[i] = -1
+    bucket = bucket_s[:]
+    for pos in lms:
+        if pos == n:
+            continue
+        sa[bucket[symbols[pos]]] = pos
+        bucket[symbols[pos]] += 1
+    bucket = bucket_l[:]
+    sa[bucket[symbols[n - 1]]] = n - 1
+    bucket[symbols[n - 1]] += 1
+    for i in xrange(n):
+        pos = sa[i]
+        if pos >= 1 and not is_s[pos - 1]:
+            sa[bucket[symbols[pos - 1]]] = pos - 1
+            bucket[symbols[pos - 1]] += 1
+    bucket = bucket_l[:]
+    for i in xrange(n - 1, -1, -1):
+        pos = sa[i]
+        if pos >= 1 and is_s[pos - 1]:
+            bucket[symbols[pos - 1] + 1] -= 1
+            sa[bucket[symbols[pos - 1] + 1]] = pos - 1
+
+
+def build_lcp_array(symbols, sa):
+    """ Returns the longest common prefix array for a suffix array (Kasai's algorithm).
+    lcp[i] is the number of symbols that suffix sa[i] has in common with suffix sa[i - 1].
+    lcp[0] is always 0."""
+    n = len(symbols)
+    rank = [0] * n
+    for i, pos in enumerate(sa):
+        rank[pos] = i
+    lcp = [0] * n
+    h = 0
+    for pos in xrange(n):
+        r = rank[pos]
+        if r > 0:
+            prev = sa[r - 1]
+            while pos + h < n and prev + h < n and symbols[pos + h] == symbols[prev + h]:
+                h += 1
+            lcp[r] = h
+            if h > 0:
+                h -= 1
+        else:
+            h = 0
+    return lcp
+
+
+# Rabin-Karp hashing, for _iter_hash_repeats.
+_HASH_MODULUS = (1 << 61) - 1
+_HASH_BASE = 1000003
+
+
+def _iter_hash_repeats(symbols, window_length):
+    """ Hashes every window of the given length in the symbols. For each window with the same
+    hash as an earlier window, yields a tuple of (position of the last earlier window with
+    that hash, distance from there to this window)."""
+    n = len(symbols)
+    if window_length > n:
+        return
+    modulus = _HASH_MODULUS
+    base = _HASH_BASE
+    drop_factor = pow(base, window_length - 1, modulus)
+    last_seen = {}
+    h = 0
+    for i in xrange(window_length):
+        h = (h * base + symbols[i]) % modulus
+    last_seen[h] = 0
+    for i in xrange(1, n - window_length + 1):
+        h = ((h - symbols[i - 1] * drop_factor) * base + symbols[i + window_length - 1]) % modulus
+        previous = last_seen.get(h)
+        if previous is not None:
+            yield previous, i - previous
+        last_seen[h] = i
+
+
+def _extend_repeat(symbols, first, second):
+    """ Given two positions in the symbols, finds how far the symbols match before and after
+    them. Returns a tuple of (start of the first match, length of the match). Compares
+    slices where it can, rather than one symbol at a time."""
+    n = len(symbols)
+    chunk = 1024
+    length = 0
+    while second + length < n:
+        size = min(chunk, n - second - length)
+        if symbols[first + length:first + length + size] == symbols[second + length:second + length + size]:
+            length += size
+        else:
+            while symbols[first + length] == symbols[second + length]:
+                length += 1
+            break
+    back = 0
+    while first - back > 0:
+        size = min(chunk, first - back)
+        if symbols[first - back - size:first - back] == symbols[second - back - size:second - back]:
+            back += size
+        else:
+            while symbols[first - back - 1] == symbols[second - back - 1]:
+                back += 1
+            break
+    return first - back, back + length
+
+
+def _copy_song_raw(dro_song):
+    """ Returns a picklable copy of a song, for handing to another process: a tuple of its
+    header values, and its raw data as an array of bytes (see _song_from_raw)."""
+    raw_data = cStringIO.StringIO()
+    with dro_song.data_lock.read_locked():
+        dro_song.data.tofile(raw_data)
+        return (dro_song.file_version, dro_song.name, dro_song.ms_length, dro_song.opl_type,
+                getattr(dro_song, "codemap", None), dro_song.data.short_delay_code,
+                dro_song.data.long_delay_code, array.array('B', raw_data.getvalue()))
+
+
+def _song_from_raw(song_copy):
+    """ Rebuilds a song copied by _copy_song_raw."""
+    file_version, name, ms_length, opl_type, codemap, short_delay_code, long_delay_code, raw_data = song_copy
+    if file_version == DRO_FILE_V1:
+        song_data = dro_data.DRODataV1()
+        song_data.set_data(raw_data)
+        return dro_data.DROSong(file_version, name, song_data, ms_length, opl_type)
+    song_data = dro_data.DRODataV2()
+    song_data.codemap = codemap
+    song_data.short_delay_code = short_delay_code
+    song_data.long_delay_code = long_delay_code
+    song_data.delay_codes = (short_delay_code, long_delay_code)
+    song_data.set_data(raw_data)
+    return dro_data.DROSongV2(file_version, name, song_data, ms_length, opl_type,
+                              codemap, short_delay_code, long_delay_code)
+
+
+# Set up in each worker process, by _init_loop_analysis_worker. The song is only rebuilt when the
+#  first method runs, so anything wrong with it gets reported back like any other error. (If the
+#  initializer raises, the pool just keeps replacing the worker, and never returns.)
+_worker_loop_analyzer = None
+_worker_song_copy = None
+_worker_song = None
+
+
+def _init_loop_analysis_worker(analyzer_class, song_copy):
+    global _worker_loop_analyzer, _worker_song_copy, _worker_song
+    _worker_loop_analyzer = analyzer_class()
+    _worker_song_copy = song_copy
+    _worker_song = None
+
+
+def _run_loop_analysis_method(method):
+    """ Runs one of DROLoopAnalyzer's methods in a worker process. Takes a tuple of the method's
+    position in analysis_methods and its name. Returns the position, and the AnalysisResult as a
+    description and result (the nested class can't be pickled)."""
+    global _worker_song
+    method_index, method_name = method
+    if _worker_song is None:
+        _worker_song = _song_from_raw(_worker_song_copy)
+    analysis_result = getattr(_worker_loop_analyzer, method_name)(_worker_song)
+    return method_index, analysis_result.description, analysis_result.result
+
+
+def run_loop_analysis(analyzer, dro_song, processes=None):
+    """ Runs a DROLoopAnalyzer's analyze_dro_parallel, reporting back through events: a
+    LOOP_ANALYSIS_RESULT event (with the analyzer, index and result) as each method finishes, then
+    a LOOP_ANALYSIS_FINISHED event (with the analyzer, the results and the error, if any) at the
+    end. The finished event is always sent, even if the analysis failed or was cancelled, so
+    the GUI isn't left waiting for it. Meant to be run as a background task."""
+    def result_ready(index, result):
+        dro_globals.custom_event_manager().trigger_event("LOOP_ANALYSIS_RESULT", analyzer=analyzer,
+                                                         index=index, result=result)
+    results = None
+    error = None
+    try:
+        results = analyzer.analyze_dro_parallel(dro_song, result_ready, processes)
+    except Exception:
+        error = traceback.format_exc()
+        traceback.print_exc()
+    dro_globals.custom_event_manager().trigger_event("LOOP_ANALYSIS_FINISHED", analyzer=analyzer,
+                                                     results=results, error=error)
+    return results
+
+
+class DROLoopAnalyzer(object):
+    class Match(object):
+        def __init__(self, start=None, end=None, length=0):
+            self.start = start
+            self.end = end
+            self.length = length
+
+        def __repr__(self):
+            return "Match(start=%s, end=%s, length=%s)" % (self.start, self.end, self.length)
+
+    class AnalysisResult(object):
+        def __init__(self, description, result):
+            self.description = description
+            self.result = result
+
+        def __str__(self):
+            return "%s\n\n%s" % (self.description, self.result)
+
+    def __init__(self):
+        self._stop = threading.Event()
+        self.analysis_methods = [
+            self.analyze_earliest_end_match,
+            self.analyze_earliest_end_delay_and_note_match,
+            self.analyze_latest_start_match,
+            self.analyze_longest_instruction_blocks,
+            self.analyze_seqeunce_matcher,
+            self.analyze_repeated_regions,
+            self.analyze_rolling_hash_candidates
+        ]
+
+    def num_analyses(self):
+        return len(self.analysis_methods)
+
+    def cancel(self):
+        self._stop.set()
+
+    def analyze_dro(self, dro_song):
+        """ Runs each analysis method in turn. Returns a list of AnalysisResults, or None
+        if cancelled.
+        @type dro_song: DROSong
+        """
+        results = []
+        for analysis_method in self.analysis_methods:
+            if self._stop.isSet():
+                return None
+            results.append(analysis_method(dro_song))
+        return results
+
+    def analyze_dro_parallel(self, dro_song, result_callback=None, processes=None):
+        """ Runs all the analysis methods at once, in a pool of worker processes. "processes"
+        defaults to the number of CPUs (but there's no point having more than there are methods).
+
+        Each worker is handed a copy of the song's raw data, rather than DROInstruction objects,
+        and rebuilds the song from that. As each method finishes, result_callback is called with
+        the method's position in analysis_methods and its AnalysisResult (from this thread, so
+        a GUI should post an event rather than update itself directly).
+
+        Can be cancelled from another thread (see cancel), which stops the workers. If a method
+        fails, the workers are stopped and its exception is raised here.
+        Returns a list of AnalysisResults, in the same order as analysis_methods,
+        or None if cancelled.
+        @type dro_song: DROSong
+        """
+        if processes is None:
+            processes = min(multiprocessing.cpu_count(), self.num_analyses())
+        method_names = [analysis_method.__name__ for analysis_method in self.analysis_methods]
+        song_copy = _copy_song_raw(dro_song)
+        results = [None] * len(method_names)
+        pool = multiprocessing.Pool(processes, _init_loop_analysis_worker, (type(self), song_copy))
+        try:
+            pending = pool.imap_unordered(_run_loop_analysis_method, enumerate(method_names))
+            for _ in xrange(len(method_names)):
+                # Wait in short bursts, so a cancel doesn't have to wait for a method to finish.
+                while True:
+                    if self._stop.isSet():
+                        pool.terminate()
+                        return None
+                    try:
+                        method_index, description, result = pending.next(0.1)
+                        break
+                    except multiprocessing.TimeoutError:
+                        pass
+                results[method_index] = self.AnalysisResult(description, result)
+                if result_callback is not None:
+                    result_callback(method_index, results[method_index])
+            pool.close()
+        except:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+        return results
+
+    def __do_backward_search_analysis(self, dro_data, original_indexes):
+        """From the index second from the end, compare to the last value at the end.
+        If the current value matches the end value, compare all
+        values preceding the current value against all values
+        preceding the end value.
+        (This is a fairly naive approach.)
+        Example:
+          [0, 1, 2, 3, 1, 2]
+                       ^  ^
+          [0, 1, 2, 3, 1, 2]
+                       ^  ^
+          [0, 1, 2, 3, 1, 2]
+                    ^     ^
+          [0, 1, 2, 3, 1, 2]
+                 ^        ^
+          [0, 1, 2, 3, 1, 2]
+              ^--/     ^--/
+           result:
+           section 1: start = 1, end = 2, length = 2
+           section 2: start = 4, end = 5, length = 2
+        """
+        result = ""
+        curr_match = None
+        end_match = self.Match()
+        longest_match = self.Match()
+        end_index = len(dro_data) - 1
+        later_index = end_index
+        match_ended = False
+        # Iterate in reverse, also getting the index.
+        for i, curr_value in itertools.izip(xrange(end_index, -1, -1), (reversed(dro_data))):
+            # Ignore the end value
+            if i == end_index:
+                continue
+            later_value = dro_data[later_index]
+            if curr_value == later_value:
+                # Check if we're starting a new match
+                if later_index == end_index:
+                    curr_match = self.Match(start=i, end=i, length=0)
+                curr_match.length += 1
+                curr_match.start = i
+                if i == 0:
+                    match_ended = True
+            elif curr_match is not None:
+                match_ended = True
+
+            # Sequence has ended, and it's longer than the longest match so far,
+            #  or it's the same length as the longest match but has an earlier
+            #  starting point.
+            if match_ended:
+                if (curr_match.length > longest_match.length or
+                    (curr_match.length == longest_match.length and
+                     curr_match.start < longest_match.start)):
+                    longest_match = curr_match
+                    end_match = self.Match(
+                        start=later_index + 1,
+                        end=end_index,
+                        length=curr_match.length
+                    )
+                curr_match = None
+                later_index = end_index
+                match_ended = False
+
+            # If we're matching, decrement the end index.
+            if curr_match is not None:
+                later_index -= 1
+
+        result += "My conclusions:\n"
+        if longest_match.start is None or longest_match.end is None or longest_match.length == 0:
+            result += "No match found. I'm sorry.\n"
+        else:
+            # Convert matching indexes to original indexes
+            longest_match = self.Match(
+                start=original_indexes[longest_match.start],
+                end=original_indexes[longest_match.end],
+                length=original_indexes[longest_match.end] - original_indexes[longest_match.start] + 1
+            )
+            end_match = self.Match(
+                start=original_indexes[end_match.start],
+                end=original_indexes[end_match.end],
+                length=original_indexes[end_match.end] - original_indexes[end_match.start] + 1
+            )
+            result += ("Loop section 1: start=%s, end=%s, length=%s.\n" %
+                       (longest_match.start, longest_match.end, longest_match.length))
+            result += ("Loop section 2: start=%s, end=%s, length=%s.\n" %
+                       (end_match.start, end_match.end, end_match.length))
+
+        return result
+
+    def analyze_earliest_end_match(self, dro_song):
+        """
+        Goes through the data backwards. Finds the "earliest" sequence of instructions that
+        matches the sequence of instructions at the end of the song.
+        """
+        dro_data = dro_song.data
+        original_indexes = range(len(dro_song.data))
+        result = self.__do_backward_search_analysis(dro_data, original_indexes)
+        return self.AnalysisResult("Earliest match to end", result)
+
+    def analyze_earliest_end_delay_and_note_match(self, dro_song):
+        """
+        Goes through the data backwards. Finds the "earliest" sequence of instructions that
+        matches the sequence of instructions at the end of the song. Only looks at
+        delay and note on/off instructions.
+        """
+
+        # First, go through the data and only keep note on/off instructions and delays.
+        # This is because sometimes the looped information has slightly different
+        # data.
+        original_indexes = []
+        dro_data_copy = dro_song.data.shallow_copy()
+
+        MIN_DELAY_TO_INCLUDE = 2 # skip delays of 1 ms
+        for i, inst in enumerate(dro_song.data):
+            should_include = False
+            if inst.inst_type == dro_data.DROInstruction.T_DELAY:
+                if inst.value >= MIN_DELAY_TO_INCLUDE:
+                    should_include = True
+            elif inst.inst_type == dro_data.DROInstruction.T_REGISTER:
+                if inst.command in range(0xB0, 0xB9):
+                    should_include = True
+            if should_include:
+                dro_data_copy.append_raw(dro_song.data.get_raw(i))
+                original_indexes.append(i)
+
+        result = self.__do_backward_search_analysis(dro_data_copy, original_indexes)
+        return self.AnalysisResult("Earliest match to end (delays and note on/off only)", result)
+
+    def analyze_latest_start_match(self, dro_song):
+        """
+        Goes through the data forwards. Finds the "latest" sequence of instructions that
+        matches the sequence of instructions towards the start of the song, after the
+        first note on and the first delay instructions.
+        """
+        result = ""
+        # First, find our starting point.
+        note_on_found = False
+        start_pos = 0
+        for i, inst in enumerate(dro_song.data):
+            if inst.inst_type == dro_data.DROInstruction.T_DELAY:
+                if note_on_found:
+                    # This is where we want to start, the first delay after the first "note on" instruction
+                    start_pos = i
+                    break
+                else:
+                    continue
+            elif (inst.inst_type == dro_data.DROInstruction.T_REGISTER and
+                    inst.value in range(0xB0, 0xB9)):
+                note_on_found = True
+
+        if start_pos == 0:
+            return self.AnalysisResult("Latest match to start", "Forward search couldn't find a place to start.\n")
+
+        # Next, do the search for reals.
+        # (This is very similar to method on & two, but goes forwards instead)
+        early_index = start_pos
+        curr_match = None
+        longest_match = self.Match()
+        start_match = self.Match()
+        match_ended = False
+        for i in xrange(start_pos + 1, len(dro_song.data)):
+            early_value = dro_song.data[early_index]
+            later_value = dro_song.data[i]
+
+            if early_value == later_value:
+                # Check if we're starting a new match
+                if early_index == start_pos:
+                    curr_match = self.Match(start=i, end=i, length=0)
+                curr_match.length += 1
+                curr_match.end = i
+                if i == len(dro_song.data) - 1:
+                    match_ended = True
+            elif curr_match is not None:
+                match_ended = True
+
+            # Sequence has ended, and it's longer than the longest match so far,
+            #  or it's the same length as the longest match but has a later
+            #  starting point.
+            if match_ended:
+                if (curr_match.length > longest_match.length or
+                    (curr_match.length == longest_match.length and
+                     curr_match.start > longest_match.start)):
+                    longest_match = curr_match
+                    start_match = self.Match(
+                        start=start_pos,
+                        end=early_index - 1,
+                        length=curr_match.length
+                    )
+                curr_match = None
+                early_index = start_pos
+                match_ended = False
+
+            # If we're matching, increment the start index.
+            if curr_match is not None:
+                early_index += 1
+
+        result += "My conclusions:\n"
+        if longest_match.start is None or longest_match.end is None or longest_match.length == 0:
+            result += "No match found. I'm sorry.\n"
+        else:
+            result += ("Loop section 1: start=%s, end=%s, length=%s.\n" %
+                       (start_match.start, start_match.end, start_match.length))
+            result += ("Loop section 2: start=%s, end=%s, length=%s.\n" %
+                       (longest_match.start, longest_match.end, longest_match.length))
+
+        return self.AnalysisResult("Latest match to start", result)
+
+    def analyze_longest_instruction_blocks(self, dro_song):
+        """
+        Finds the the 15 longest blocks of instructions, separated by delay instructions.
+        Excludes the first block at the beginning of the song (which is usually just
+        register initialization, in DRO 2).
+        """
+        # This is the shortest length that we want to keep track of.
+        notable_threshold = 10
+
+        # Try and find sections with large chunks of instructions before a delay.
+        sections = []
+        curr_section = self.Match()
+        for i, inst in enumerate(dro_song.data):
+            if inst.inst_type != dro_data.DROInstruction.T_DELAY:
+                if curr_section.start is None:
+                    curr_section.start = i
+                curr_section.length += 1
+            else:
+                curr_section.end = i - 1
+                if curr_section.length >= notable_threshold:
+                    sections.append(curr_section)
+                curr_section = self.Match()
+
+        # If we've got a hanging section left over, finish it off.
+        if curr_section.start is not None and curr_section.end is None:
+            curr_section.end = len(dro_song.data) - 1
+            if curr_section.length >= notable_threshold:
+                sections.append(curr_section)
+
+        sections.sort(key=lambda m: m.length, reverse=True)
+        num_to_display = min(len(sections), 15)
+        if len(sections) > 1 and sections[0].start == 0:
+            interesting_sections = sections[1:num_to_display + 1] # skip the first one since it's the start of the song
+        else:
+            interesting_sections = sections[0:num_to_display]
+        sections_string = "\n".join(str(sec) for sec in interesting_sections)
+        result = "Interesting sections (by size):\n%s" % (sections_string,)
+        result += "\n\n"
+        interesting_sections.sort(key=lambda m: m.start, reverse=True)
+        sections_string = "\n".join(str(sec) for sec in interesting_sections)
+        result += "Interesting sections (by position):\n%s" % (sections_string,)
+        return self.AnalysisResult("Longest instruction blocks", result)
+
+    def analyze_seqeunce_matcher(self, dro_song):
+        """
+        Splits the data in half, and uses Python's difflib.SequenceMatcher to
+        find the longest matching blocks in each half.
+        """
+        result_str = ""
+        # Split the data in half and see what the largest matching block is.
+        # This will give us an indication on whether or not the song loops, and if so,
+        #  where the loop points are.
+        sm = difflib.SequenceMatcher()
+        tmp_len = len(dro_song.data) / 2
+        tmp_a = dro_song.data[:tmp_len]
+        tmp_b = dro_song.data[tmp_len:]
+        sm.set_seqs(tmp_a, tmp_b)
+        #result1 = sm.get_matching_blocks()
+        #print result1
+
+        # We have to do "len(dro_song.data) - tmp_len" because of rounding when
+        #  dividing by two earlier.
+        result = sm.find_longest_match(0, tmp_len, 0, len(dro_song.data) - tmp_len)
+        result_str += ("Result of analysis:\n longest block = " + str(result[2]) +
+                       ",\n start first half = " + str(result[0]) +
+                       ",\n start second half = " + str(result[1] + tmp_len) + "\n")
+
+        # TODO: Find the first instance of the data block dro_data[result[0]:result[1] + tmp_len]?
+        # No. This is not the problem. The problem is that the longest block could be because
+        #  it starts with a note-off, whereas the first block will not have that note off. Every
+        #  loop iteration, however, will have that note off, and so it will have a longer matching
+        #  block.
+        # Taking this into consideration, notify the user that if the first instruction
+        #  in the matched block is a note off, there may be an earlier block that is more
+        #  suitable for trimming.
+
+        # If first instruction is note off, alert user
+        inst = dro_song.data[result[0]]
+        if (inst.inst_type == dro_data.DROInstruction.T_REGISTER and
+            inst.value in range(0xB0, 0xB9)):
+            result_str += ("Note: The first instruction in the matched block was a key on/off. There may be " +
+                           "a more appropriate block earlier in the song.\n")
+
+        # Now search for the first delay
+        for i, inst in enumerate(dro_song.data):
+            if inst.inst_type == dro_data.DROInstruction.T_DELAY:
+                result_str += ("First delay at pos = " + str(i) + "\n")
+                break
+
+        return self.AnalysisResult("Halved sequence match", result_str)
+
+    def analyze_repeated_regions(self, dro_song):
+        """
+        Builds a suffix array and LCP array over the whole song, to find the longest
+        sections of instructions that are repeated anywhere in the song. A song that loops
+        is one long repeat: the section from the loop start is repeated from the point the
+        song loops back, so the distance between the two is the length of the loop. Unlike
+        the other searches, this doesn't depend on the repeat touching the start or end of
+        the song.
+
+        Only repeats that can't be extended backwards are used (if a section is repeated,
+        so is every section inside it, which isn't very interesting). They're then ranked
+        the same way as the rolling hash candidates (see __rank_loop_candidates).
+        """
+        min_length = 10 # shortest repeat (and loop) to report
+        symbols = encode_instruction_symbols(dro_song)
+        sa = build_suffix_array(symbols)
+        lcp = build_lcp_array(symbols, sa)
+
+        candidates = set()
+        for i in xrange(1, len(sa)):
+            length = lcp[i]
+            if length < min_length:
+                continue
+            first, second = min(sa[i - 1], sa[i]), max(sa[i - 1], sa[i])
+            if second - first < min_length:
+                continue # the same few instructions over and over
+            if first > 0 and symbols[first - 1] == symbols[second - 1]:
+                continue # part of a longer repeat
+            candidates.add((first, second - first, length))
+        result = self.__describe_loop_candidates(self.__rank_loop_candidates(candidates), len(symbols))
+        return self.AnalysisResult("Longest repeated sections (suffix array)", result)
+
+    def analyze_rolling_hash_candidates(self, dro_song):
+        """
+        Hashes every window of instructions (Rabin-Karp), at a few different window lengths,
+        and notes the distance back to the last window with the same hash. When the song
+        loops, lots of windows will share the same distance: the length of the loop.
+        The most common distances are then checked against the actual instructions, to find
+        where the repeat starts and how long it goes for.
+
+        Candidates are ranked by how much of the song they cover (see __rank_loop_candidates).
+        """
+        window_lengths = (64, 512, 4096)
+        candidates_per_window = 5 # most common distances to check, for each window length
+        symbols = encode_instruction_symbols(dro_song)
+        n = len(symbols)
+
+        periods = {} # loop length -> earliest position seen with that distance
+        for window_length in window_lengths:
+            if window_length * 2 > n:
+                break
+            votes = defaultdict(int)
+            first_seen = {}
+            for position, period in _iter_hash_repeats(symbols, window_length):
+                # Shorter repeats (e.g. the same delay over and over) aren't interesting.
+                if period < window_length:
+                    continue
+                votes[period] += 1
+                if period not in first_seen:
+                    first_seen[period] = position
+            best = sorted(votes, key=lambda period: (-votes[period], period))[:candidates_per_window]
+            for period in best:
+                periods[period] = min(first_seen[period], periods.get(period, n))
+
+        # Check each one, in case of hash collisions, and find the full extent of the repeat.
+        candidates = set()
+        for period, position in periods.iteritems():
+            start, length = _extend_repeat(symbols, position, position + period)
+            if length >= window_lengths[0]:
+                candidates.add((start, period, length))
+        result = self.__describe_loop_candidates(self.__rank_loop_candidates(candidates), n)
+        return self.AnalysisResult("Loop candidates (rolling hash)", result)
+
+    def __rank_loop_candidates(self, candidates):
+        """ Takes loop candidates as tuples of (loop start, loop length, length of the repeat),
+        and returns the best few. They're ranked by how much of the song they cover (the loop,
+        plus the repeat), then by the shortest loop length.
+
+        Candidates that are just another view of a better one are dropped: the same loop found
+        from a later start, or at a multiple of its length (a song that loops three times also
+        repeats at twice the loop length).
+        """
+        num_to_display = 10
+        ranked = []
+        for start, period, length in sorted(candidates, key=lambda c: (-(c[1] + c[2]), c[1], c[0])):
+            end = start + period + length
+            for kept_start, kept_period, kept_length in ranked:
+                if (period % kept_period == 0 and
+                        kept_start <= start and end <= kept_start + kept_period + kept_length):
+                    break
+            else:
+                ranked.append((start, period, length))
+                if len(ranked) == num_to_display:
+                    break
+        return ranked
+
+    def __describe_loop_candidates(self, candidates, n):
+        result = "Loop candidates:\n"
+        for start, period, length in candidates:
+            result += ("loop start=%s, loops back at=%s, loop length=%s, repeated for=%s, coverage=%.1f%%\n" %
+                       (start, start + period, period, length, (period + length) * 100.0 / n))
+        result += "\nMy conclusions:\n"
+        if not candidates:
+            result += "No match found. I'm sorry.\n"
+        else:
+            start, period, length = candidates[0]
+            result += ("Loop section 1: start=%s, end=%s, length=%s.\n" %
+                       (start, start + period - 1, period))
+            result += ("Loop section 2: start=%s, end=%s, length=%s.\n" %
+                       (start + period, min(start + 2 * period, n) - 1, min(period, n - start - period)))
+            result += ("The song may loop back to instruction %s at instruction %s.\n" %
+                       (start, start + period))
+        return result
+
+
+class DRODetailedRegisterAnalyzer(DROAnalyzerVisitor):
+    """ Describes what each instruction changes, by keeping track of the state of the chip's
+    registers.
+
+    Along the way, a checkpoint of the chip state (the current bank and the value of every
+    register) is kept at the start of each batch of instructions. After the song is edited,
+    reanalyze_dro can then start from the last checkpoint before the edit, instead of the
+    start of the song, and stop as soon as the chip state matches the previous analysis again.
+    """
+    # TODO: output channels and banks in the table.
+    OPL_TYPE_OPL2, OPL_TYPE_DUAL_OPL2, OPL_TYPE_OPL3 = range(3)
+
+    def __init__(self):
+        super(DRODetailedRegisterAnalyzer, self).__init__()
+        self.state_descriptions = []
+        self.opl_type = None
+        self.current_bank = 0
+        self.current_state = None
+        self.checkpoint_indexes = [] # instruction index of each checkpoint, in order
+        self.checkpoint_states = [] # (current bank, tuple of current_state) before that instruction
+        self.complete = False # whether the last run finished, without being cancelled
+        self.OPL_TYPE_DRO1_MAP = [
+            self.OPL_TYPE_OPL2,
+            self.OPL_TYPE_OPL3,
+            self.OPL_TYPE_DUAL_OPL2
+        ]
+        self.OPL_TYPE_DRO2_MAP = [
+            self.OPL_TYPE_OPL2,
+            self.OPL_TYPE_DUAL_OPL2,
+            self.OPL_TYPE_OPL3
+        ] # a bit pointless, but added for consistency.
+        self._stop = threading.Event()
+
+    def cancel(self):
+        self._stop.set()
+
+    def analyze_dro(self, dro_song):
+        """ Returns a list of (bank, description) for each instruction, or None if cancelled."""
+        if DROCompositeAnalyzer([self], self._stop).analyze_dro(dro_song) is None:
+            return None
+        return self.state_descriptions
+
+    def reanalyze_dro(self, dro_song, previous, first_changed, end_changed, length_change):
+        """ Analyzes the song after an edit, reusing as much as possible from "previous", a
+        DRODetailedRegisterAnalyzer that finished analyzing the song before the edit.
+
+        The edit is described by three numbers: every instruction before first_changed is the same
+        as before, every instruction from end_changed onwards is the same as the instruction
+        length_change places earlier before the edit (indexes as they are after the edit), and
+        anything in between may have changed.
+
+        Returns a list of (bank, description) for each instruction, or None if cancelled."""
+        if not previous.complete or previous.opl_type != self.__get_opl_type(dro_song):
+            return self.analyze_dro(dro_song)
+        old_descriptions = previous.state_descriptions
+        old_indexes = previous.checkpoint_indexes
+        old_states = previous.checkpoint_states
+        # Start again from the last checkpoint before the edit.
+        checkpoint = bisect.bisect_right(old_indexes, first_changed) - 1
+        if checkpoint < 0:
+            return self.analyze_dro(dro_song)
+        position = old_indexes[checkpoint]
+        self.opl_type = previous.opl_type
+        self.current_bank, current_state = old_states[checkpoint]
+        self.current_state = list(current_state)
+        self.state_descriptions = old_descriptions[:position]
+        self.checkpoint_indexes = old_indexes[:checkpoint]
+        self.checkpoint_states = old_states[:checkpoint]
+        self.complete = False
+
+        with dro_song.data_lock.read_locked():
+            song_length = len(dro_song.data)
+            # Work through to each of the old checkpoints after the edit (where they are now), and
+            #  compare states. Once they match, so will everything after.
+            old_checkpoint = bisect.bisect_left(old_indexes, end_changed - length_change)
+            while True:
+                if old_checkpoint < len(old_indexes):
+                    segment_end = min(old_indexes[old_checkpoint] + length_change, song_length)
+                else:
+                    segment_end = song_length
+                for batch in dro_song.data.iter_batches(start=position, stop=segment_end):
+                    if self._stop.isSet():
+                        return None
+                    self.visit_batch(*batch)
+                position = segment_end
+                if old_checkpoint >= len(old_indexes) or position >= song_length:
+                    break
+                if (self.current_bank, tuple(self.current_state)) == old_states[old_checkpoint]:
+                    self.state_descriptions.extend(
+                        itertools.islice(old_descriptions, old_indexes[old_checkpoint], None))
+                    self.checkpoint_indexes.extend(index + length_change
+                                                   for index in old_indexes[old_checkpoint:])
+                    self.checkpoint_states.extend(old_states[old_checkpoint:])
+                    break
+                old_checkpoint += 1
+        self.finish_song()
+        return self.state_descriptions
+
+    def __get_opl_type(self, dro_song):
+        if dro_song.file_version == DRO_FILE_V1:
+            return self.OPL_TYPE_DRO1_MAP[dro_song.opl_type]
+        elif dro_song.file_version == DRO_FILE_V2:
+            return self.OPL_TYPE_DRO2_MAP[dro_song.opl_type]
+        else:
+            raise (DROTrimmerException("Unrecognised DRO version: %s. Cannot perform state analysis." %
+                                       (dro_song.file_version,)))
+
+    def start_song(self, dro_song):
+        self.state_descriptions = []
+        self.current_bank = 0
+        self.current_state = [None] * 0x1FF
+        self.checkpoint_indexes = []
+        self.checkpoint_states = []
+        self.complete = False
+        self.opl_type = self.__get_opl_type(dro_song)
+
+    def visit_batch(self, start, inst_types, commands, values, banks):
+        self.checkpoint_indexes.append(start)
+        self.checkpoint_states.append((self.current_bank, tuple(self.current_state)))
+        state_descriptions = self.state_descriptions
+        opl_type = self.opl_type
+        for inst_type, command, value, bank in itertools.izip(inst_types, commands, values, banks):
+            if inst_type == dro_data.DROInstruction.T_DELAY:
+                state_descriptions.append(
+                    (self.current_bank, "Delay: %s ms" % (value,)))
+            elif inst_type == dro_data.DROInstruction.T_BANK_SWITCH:
+                self.current_bank = value
+                state_descriptions.append(
+                    (self.current_bank, "Bank switch: %s" % (("low", "high")[self.current_bank],))
+                )
+            else:
+                if bank != dro_data.NO_BANK:
+                    self.current_bank = bank
+                desc = self.__analyze_and_update_register(self.current_bank,
+                                                          command,
+                                                          value,
+                                                          opl_type)
+                state_descriptions.append(
+                    (self.current_bank, desc))
+
+    def finish_song(self):
+        self.result = self.state_descriptions
+        self.complete = True
+
+    def __analyze_and_update_register(self, bank, reg, val, opl_type):
+        try:
+            if bank and regdata.registers.has_key(0x100 | reg):
+                register_description = regdata.registers[0x100 | reg]
+            else:
+                register_description = regdata.registers[reg]
+        except Exception:
+            return "Unknown register: %s" % (reg,)
+
+        reg_and_bank = (bank << 8) | reg
+        old_val = self.current_state[reg_and_bank]
+
+        changed_desc = []
+        bitmasks = regdata.register_bitmask_lookup[register_description]
+        for bm in bitmasks:
+            # Output the description for this bitmask, if the old value is None (start of the song), or the
+            #  value has changed.
+            if old_val is None or (bm.mask & old_val) ^ (bm.mask & val):
+                changed_desc.append(bm.description)
+
+        self.current_state[reg_and_bank] = val
+
+        return ' / '.join(changed_desc) if len(changed_desc) else '(no changes)'
+
+
+class DRORegisterUsageAnalyzer(DROAnalyzerVisitor):
+    PERC_CHANNEL = 0xBD
+
+    def __init__(self, detailed_percussion_analysis=False):
+        super(DRORegisterUsageAnalyzer, self).__init__()
+        self.detailed_percussion_analysis = detailed_percussion_analysis
+        self.bank = 0
+        self.perc_usage = defaultdict(bool)
+        self.usage = defaultdict(int)
+
+    def analyze_dro(self, dro_song):
+        """Returns two dicts. First dict is register usage, second dictt is perc inst usage.
+        Keys are registers, with the bank set in bit 0x100. e.g.
+         register 0xDB on the high bank will return a key of 0x1DB.
+        Values are the number of times that register is used in the DRO file.
+
+        Perc usage dict:
+        Keys are bitmasks (powers of 2), values are "True" if that bit was set during
+        the analysis."""
+        return super(DRORegisterUsageAnalyzer, self).analyze_dro(dro_song)
+
+    def start_song(self, dro_song):
+        self.usage = defaultdict(int)
+        self.perc_usage = defaultdict(bool)
+        self.bank = 0
+
+    def visit_batch(self, start, inst_types, commands, values, banks):
+        perc_bitmasks = regdata.register_bitmask_lookup[regdata.registers[self.PERC_CHANNEL]]
+        bank = self.bank
+        for inst_type, command, value, inst_bank in itertools.izip(inst_types, commands, values, banks):
+            if inst_bank != dro_data.NO_BANK:
+                bank = inst_bank
+            if inst_type == dro_data.DROInstruction.T_BANK_SWITCH:
+                bank = value
+            if inst_type == dro_data.DROInstruction.T_REGISTER:
+                self.usage[(bank << 8) | command] += 1
+                if command == self.PERC_CHANNEL and self.detailed_percussion_analysis:
+                    # Go through all bitmasks, mark any usages.
+                    for i, pb in enumerate(perc_bitmasks):
+                        if value & pb.mask:
+                            self.perc_usage[(bank << 8) | pb.mask] = True
+        self.bank = bank
+
+    def finish_song(self):
+        self.result = (self.usage, self.perc_usage)
+
+
+class DRODebugAnalyzer(object):
+    def __init__(self):
+        pass
+
+    def analyze_dro(self, dro_song):
+        """Prints out the DRO song info, then prints each instruction."""
+        with dro_song.data_lock.read_locked():
+            print dro_song
+            for inst in dro_song.data:
+                print inst
+
+
+class DROSimpleNoteAnalyser(object):
+    PITCH_REGISTERS = frozenset(range(0xA0, 0xA8 + 1))
+    KEY_ON_REGISTERS = frozenset(range(0xB0, 0xB8 + 1))
+    CHANNELS_PER_BANK = 9
+
+    class NoteStatus(object):
+        PITCH_MAP = {
+            0x015B : ' C',
+            0x016B : 'C#',
+            0x0181 : ' D',
+            0x0198 : 'D#',
+            0x01B0 : ' E',
+            0x01CA : ' F',
+            0x01E5 : 'F#',
+            0x0202 : ' G',
+            0x0220 : 'G#',
+            0x0241 : ' A',
+            0x0263 : 'A#',
+            0x0287 : ' B',
+            0x02AE : ' C'
+        }
+
+        def __init__(self, channel=None, note_status_to_clone=None):
+            if note_status_to_clone is not None:
+                self.channel = note_status_to_clone.channel
+                self.pitch = note_status_to_clone.pitch
+                self.octave = note_status_to_clone.octave
+                self.on = note_status_to_clone.on
+            else:
+                self.channel = channel
+                self.pitch = 0
+                self.octave = 0
+                self.on = False
+
+        def __str__(self):
+            # 0x241 = 440.0 hz
+            # 0x241 = 577
+            # 24.7 hz between notes
+            # approx 1.31 per hz
+            closest_value = min(self.PITCH_MAP.keys(), key=lambda x: abs(x - self.pitch))
+            note_name = "%s-%s" % (self.PITCH_MAP[closest_value], self.octave)
+            return "(ch: %s, pitch: %x, oct: %s, note: %s)" % (self.channel, self.pitch, self.octave, note_name)
+
+    def analyze_dro(self, dro_song):
+        """
+        Returns a list of of "Note on" pitch values (as NoteStatus objects), containing one list per channel.
+        Ignores pitch bends and other pitch changes while a note is on.
+
+        @type dro_song: DROSong
+        """
+        channel_notes = [DROSimpleNoteAnalyser.NoteStatus(channel=i + 1) for i in xrange(DROSimpleNoteAnalyser.CHANNELS_PER_BANK * 2)]
+        output = [[] for i in xrange(DROSimpleNoteAnalyser.CHANNELS_PER_BANK * 2)]
+        with dro_song.data_lock.read_locked():
+            for inst in dro_song.data:
+                # Ignore non-register stuff.
+                if inst.inst_type != dro_data.DROInstruction.T_REGISTER:
+                    continue
+                # If it's A0 - A8, update the pitch
+                elif inst.command in DROSimpleNoteAnalyser.PITCH_REGISTERS:
+                    note_status = self.get_channel_status(channel_notes, inst)
+                    note_status.pitch = (note_status.pitch & 0xFF00) | inst.value
+                # If it's B0 - B8, update the pitch and note on/off
+                elif inst.command in DROSimpleNoteAnalyser.KEY_ON_REGISTERS:
+                    note_status = self.get_channel_status(channel_notes, inst)
+                    note_status.pitch = (note_status.pitch & 0x00FF) | ((inst.value & 0x03) << 8)
+                    note_status.octave = (inst.value & 0x1C) >> 2
+                    orig_on_value = note_status.on
+                    note_status.on = (inst.value & 0x20) > 0
+                    # If note on status changes, make a new entry in the output list
+                    if note_status.on ^ orig_on_value and note_status.on:
+                        output[note_status.channel - 1].append(DROSimpleNoteAnalyser.NoteStatus(note_status_to_clone=note_status))
+        return output
+
+    def get_channel_status(self, channel_notes, inst):
+        channel_index = (inst.command & 0x0F) + (inst.bank * DROSimpleNoteAnalyser.CHANNELS_PER_BANK)
+        return channel_notes[channel_index]
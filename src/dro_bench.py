@@ -0,0 +1,195 @@
+#!/usr/bin/python
+#
+#    Use, distribution, and modification of the DRO Trimmer binaries, source code,
+#    or documentation, is subject to the terms of the MIT license, as below.
+#
+#    Copyright (c) 2008 - 2014 Laurence Dougal Myers
+#
+#    Permission is hereby granted, free of charge, to any person obtaining a copy
+#    of this software and associated documentation files (the "Software"), to deal
+#    in the Software without restriction, including without limitation the rights
+#    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#    copies of the Software, and to permit persons to whom the Software is
+#    furnished to do so, subject to the following conditions:
+#
+#    The above copyright notice and this permission notice shall be included in
+#    all copies or substantial portions of the Software.
+#
+#    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+#    THE SOFTWARE.
+
+"""
+Rough benchmarks for the data handling code. Not part of the application; run it directly:
+
+    python dro_bench.py [dro_file]
+
+V1 files are used to benchmark index map generation, and V2 files to benchmark compression.
+If no file is given, some random data is generated for both.
+"""
+import array
+import os
+import random
+import shutil
+import sys
+import tempfile
+import timeit
+import dro_data
+import dro_io
+
+
+def generate_v1_data(num_instructions, seed=0):
+    """Returns an array of random, but valid, DRO v1 instructions. Mostly register writes,
+    with some delays and bank switches thrown in, much like a DOSBox capture."""
+    rand = random.Random(seed)
+    data = array.array('B')
+    for i in xrange(num_instructions):
+        roll = rand.random()
+        if roll < 0.15:
+            data.extend((0x00, rand.randrange(0x100)))
+        elif roll < 0.17:
+            data.extend((0x01, rand.randrange(0x100), rand.randrange(0x100)))
+        elif roll < 0.19:
+            data.append(rand.choice((0x02, 0x03)))
+        elif roll < 0.20:
+            data.extend((0x04, rand.randrange(0x05), rand.randrange(0x100)))
+        else:
+            data.extend((rand.randrange(0x05, 0x100), rand.randrange(0x100)))
+    return data
+
+
+def generate_v2_song(num_instructions, seed=0):
+    """Returns a DROSongV2 of random, but valid, instructions. Real captures repeat themselves
+    a lot, so the song is made up of a small set of phrases, each slightly varied as it's reused."""
+    rand = random.Random(seed)
+    codemap = range(0x20, 0x40) + range(0xA0, 0xC0) # somewhat like the registers a song would use
+    short_delay_code, long_delay_code = len(codemap), len(codemap) + 1
+    phrases = []
+    for p in xrange(16):
+        phrase = []
+        for i in xrange(rand.randrange(32, 256)):
+            if rand.random() < 0.2:
+                phrase.extend((short_delay_code, rand.randrange(0x40)))
+            else:
+                phrase.extend((rand.randrange(len(codemap)) | rand.choice((0x00, 0x80)), rand.randrange(0x100)))
+        phrases.append(phrase)
+    data = array.array('B')
+    while len(data) < num_instructions * 2:
+        phrase = list(rand.choice(phrases))
+        for i in xrange(rand.randrange(3)):
+            phrase[rand.randrange(len(phrase) // 2) * 2 + 1] = rand.randrange(0x100) # vary a value
+        data.extend(phrase)
+    del data[num_instructions * 2:]
+
+    dro_data_v2 = dro_data.DRODataV2()
+    dro_data_v2.set_data(data)
+    dro_data_v2.codemap = codemap
+    dro_data_v2.short_delay_code = short_delay_code
+    dro_data_v2.long_delay_code = long_delay_code
+    dro_data_v2.delay_codes = (short_delay_code, long_delay_code)
+    return dro_data.DROSongV2(dro_data.DRO_FILE_V2, "generated.dro", dro_data_v2,
+                              dro_data_v2.delay_index.total(), 2, codemap, short_delay_code, long_delay_code)
+
+
+def legacy_v1_index_map(data):
+    """The original byte-by-byte index map generation, kept for comparison."""
+    index_map = []
+    i = 0
+    while i < len(data):
+        index_map.append(i)
+        cmd = data[i]
+        if cmd == 0x00:
+            i += 2
+        elif cmd == 0x01:
+            i += 3
+        elif cmd in (0x02, 0x03):
+            i += 1
+        elif cmd == 0x04:
+            i += 3
+        else:
+            i += 2
+    return index_map
+
+
+def time_it(func, repeat=3):
+    """Returns the best time of a few runs, in seconds."""
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def bench_v1_index_map(v1_data):
+    index_map = dro_data.build_v1_index_map(v1_data)
+    legacy_index_map = legacy_v1_index_map(v1_data)
+    if list(index_map) != legacy_index_map:
+        raise AssertionError("Index maps don't match!")
+    legacy_time = time_it(lambda: legacy_v1_index_map(v1_data))
+    new_time = time_it(lambda: dro_data.build_v1_index_map(v1_data))
+    legacy_size = len(legacy_index_map) * array.array('I').itemsize
+    new_size = (len(index_map.run_slots) + len(index_map.run_offsets)) * array.array('I').itemsize
+    print "V1 index map, %d bytes, %d instructions:" % (len(v1_data), len(index_map))
+    print "  legacy loop: %.3f s, %d bytes as an array('I')" % (legacy_time, legacy_size)
+    print "  run scan:    %.3f s (%.1fx), %d bytes (%.1fx smaller)" % (
+        new_time, legacy_time / new_time, new_size, float(legacy_size) / new_size)
+
+
+def bench_v2_compression(dro_song):
+    temp_dir = tempfile.mkdtemp()
+    try:
+        file_io = dro_io.DroFileIO()
+        raw_file_name = os.path.join(temp_dir, "raw.dro")
+        compressed_file_name = os.path.join(temp_dir, "compressed.dro")
+        dro_song.compression = dro_io.DRO_COMPRESSION_NONE
+        file_io.write(raw_file_name, dro_song)
+        dro_song.compression = dro_io.DRO_COMPRESSION_ZLIB
+        compress_time = time_it(lambda: file_io.write(compressed_file_name, dro_song))
+        if list(file_io.read(compressed_file_name).data) != list(dro_song.data):
+            raise AssertionError("Compressed file doesn't match!")
+
+        def stream(file_name):
+            with dro_io.DroStreamReader(file_name) as reader:
+                for chunk in reader.iter_chunks():
+                    pass
+
+        def read_blocks(file_name, block_nums):
+            with dro_io.DroStreamReader(file_name) as reader:
+                for block_num in block_nums:
+                    reader.read_block(block_num)
+
+        raw_size = os.path.getsize(raw_file_name)
+        compressed_size = os.path.getsize(compressed_file_name)
+        megabytes = dro_song.data.raw_len() / float(1 << 20)
+        print "V2 compression, %d instructions:" % (len(dro_song.data),)
+        print "  size:    %d -> %d bytes (%.1fx smaller)" % (raw_size, compressed_size, float(raw_size) / compressed_size)
+        print "  save:    %.3f s (%.1f MB/s)" % (compress_time, megabytes / compress_time)
+        for description, file_name in (("raw", raw_file_name), ("compressed", compressed_file_name)):
+            read_time = time_it(lambda: file_io.read(file_name))
+            stream_time = time_it(lambda: stream(file_name))
+            print "  %-10s read: %.3f s (%.1f MB/s), stream + decode: %.3f s (%.1f MB/s)" % (
+                description, read_time, megabytes / read_time, stream_time, megabytes / stream_time)
+        with dro_io.DroStreamReader(compressed_file_name) as reader:
+            num_blocks = reader.num_blocks()
+        block_nums = [random.randrange(num_blocks) for i in xrange(100)]
+        block_time = time_it(lambda: read_blocks(compressed_file_name, block_nums))
+        print "  100 random blocks: %.3f s (%.2f ms per block)" % (block_time, block_time * 10)
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def main():
+    if len(sys.argv) > 1:
+        dro_song = dro_io.DroFileIO().read(sys.argv[1])
+        if dro_song.file_version == dro_data.DRO_FILE_V1:
+            bench_v1_index_map(dro_song.data.data)
+        else:
+            bench_v2_compression(dro_song)
+    else:
+        bench_v1_index_map(generate_v1_data(1000000))
+        bench_v2_compression(generate_v2_song(1000000))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+#!/usr/bin/python
+#
+#    Use, distribution, and modification of the DRO Trimmer binaries, source code,
+#    or documentation, is subject to the terms of the MIT license, as below.
+#
+#    Copyright (c) 2008 - 2014 Laurence Dougal Myers
+#
+#    Permission is hereby granted, free of charge, to any person obtaining a copy
+#    of this software and associated documentation files (the "Software"), to deal
+#    in the Software without restriction, including without limitation the rights
+#    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#    copies of the Software, and to permit persons to whom the Software is
+#    furnished to do so, subject to the following conditions:
+#
+#    The above copyright notice and this permission notice shall be included in
+#    all copies or substantial portions of the Software.
+#
+#    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+#    THE SOFTWARE.
+
+
+from __future__ import with_statement
+import optparse
+import os
+import sys
+try:
+    import sqlite3
+except ImportError:
+    sqlite3 = None
+import dro_globals
+import dro_io
+import dro_util
+
+DEFAULT_CATALOG_NAME = "drocatalog.db"
+
+_CATALOG_COLUMNS = ["name", "file_size", "mtime", "file_version", "ms_length", "opl_type", "byte_length", "error"]
+
+
+class DROCatalog(object):
+    """ Keeps the header information of DRO files (see DroFileIO.read_info) in an SQLite
+    database. A file's header is only read again if its size or modification time has changed
+    since it was last catalogued, so rescanning a large archive is quick.
+
+    Files that couldn't be read are catalogued too, along with the error, so they aren't
+    retried until they change.
+    """
+    def __init__(self, db_file_name):
+        if sqlite3 is None:
+            raise dro_util.DROTrimmerException("The DRO catalog needs the sqlite3 module, which is not available.")
+        self.file_reader = dro_io.DroFileIO()
+        self.conn = sqlite3.connect(db_file_name)
+        self.conn.text_factory = str # file names are byte strings
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS dro_files ("
+                "name TEXT PRIMARY KEY, file_size INTEGER, mtime REAL, file_version INTEGER, "
+                "ms_length INTEGER, opl_type INTEGER, byte_length INTEGER, error TEXT)")
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def get(self, file_name):
+        """ Returns the catalogued DroFileInfo for the given file, or None if it's not in the
+        catalog. Doesn't check whether the file has changed."""
+        row = self.conn.execute("SELECT %s FROM dro_files WHERE name = ?" % (", ".join(_CATALOG_COLUMNS),),
+                                (self._key(file_name),)).fetchone()
+        if row is None:
+            return None
+        return dro_io.DroFileInfo(*row)
+
+    def update(self, file_name):
+        """ Returns the DroFileInfo for the given file, reading its header only if the
+        catalogued copy is missing or out of date."""
+        with self.conn:
+            return self._update(file_name)
+
+    def scan(self, dir_name):
+        """ Updates the catalog with every DRO file in the given directory and its
+        subdirectories, and forgets any catalogued files in there that no longer exist.
+        Returns a list of DroFileInfo objects, sorted by file name."""
+        with self.conn: # one transaction for the whole scan
+            results = [self._update(file_name) for file_name in dro_io.find_dro_files(dir_name)]
+            found_keys = set(info.name for info in results)
+            prefix = os.path.join(self._key(dir_name), "")
+            for (name,) in self.conn.execute("SELECT name FROM dro_files WHERE substr(name, 1, ?) = ?",
+                                             (len(prefix), prefix)).fetchall():
+                if name not in found_keys:
+                    self.conn.execute("DELETE FROM dro_files WHERE name = ?", (name,))
+        return results
+
+    def _key(self, file_name):
+        return os.path.normcase(os.path.abspath(file_name))
+
+    def _update(self, file_name):
+        key = self._key(file_name)
+        file_stat = os.stat(file_name)
+        info = self.get(key)
+        if info is not None and info.file_size == file_stat.st_size and info.mtime == file_stat.st_mtime:
+            return info
+        try:
+            info = self.file_reader.read_info(file_name)
+        except (dro_util.DROTrimmerException, EnvironmentError), e:
+            info = dro_io.DroFileInfo(file_name, file_stat.st_size, file_stat.st_mtime, error=str(e))
+        info.name = key
+        self.conn.execute("INSERT OR REPLACE INTO dro_files (%s) VALUES (%s)" %
+                          (", ".join(_CATALOG_COLUMNS), ", ".join("?" * len(_CATALOG_COLUMNS))),
+                          [getattr(info, column) for column in _CATALOG_COLUMNS])
+        return info
+
+
+def __parse_arguments():
+    usage = ("Usage: %prog [options] directory [directory ...]\n\n" +
+             "Lists the DRO files in the given directories, reading only their headers. The headers are\n" +
+             "kept in a catalog, so files that haven't changed don't need to be read again.")
+    version = dro_globals.g_app_version
+    oparser = optparse.OptionParser(usage, version=version)
+    oparser.add_option("-c", "--catalog", dest="catalog", default=DEFAULT_CATALOG_NAME,
+        help="The catalog file to use. Defaults to %s in the current directory." % DEFAULT_CATALOG_NAME)
+    options, args = oparser.parse_args()
+    return oparser, options, args
+
+
+def main():
+    oparser, options, args = __parse_arguments()
+    if len(args) < 1:
+        print "Please pass the name of at least one directory to scan."
+        oparser.print_help()
+        return 1
+    for dir_name in args:
+        if not os.path.isdir(dir_name):
+            print "Directory not found, or is not a directory: %s" % dir_name
+            return 3
+
+    try:
+        with DROCatalog(options.catalog) as catalog:
+            for dir_name in args:
+                for info in catalog.scan(dir_name):
+                    if info.error is not None:
+                        print "%s: ERROR - %s" % (info.name, info.error)
+                    else:
+                        print "%s: v%i, %s, %s" % (info.name, info.file_version,
+                            dro_util.ms_to_timestr(info.ms_length), info.get_opl_type_display())
+    except Exception, e:
+        print e
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,550 +1,1255 @@
-#!/usr/bin/python
-#
-#    Use, distribution, and modification of the DRO Trimmer binaries, source code,
-#    or documentation, is subject to the terms of the MIT license, as below.
-#
-#    Copyright (c) 2008 - 2014 Laurence Dougal Myers
-#
-#    Permission is hereby granted, free of charge, to any person obtaining a copy
-#    of this software and associated documentation files (the "Software"), to deal
-#    in the Software without restriction, including without limitation the rights
-#    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
-#    copies of the Software, and to permit persons to whom the Software is
-#    furnished to do so, subject to the following conditions:
-#
-#    The above copyright notice and this permission notice shall be included in
-#    all copies or substantial portions of the Software.
-#
-#    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
-#    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
-#    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
-#    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
-#    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
-#    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
-#    THE SOFTWARE.
-
-import array
-import dro_analysis
-import dro_globals
-import dro_undo
-import dro_util
-import regdata
-import threading
-
-DRO_FILE_V1 = 1
-DRO_FILE_V2 = 2
-
-
-class DROInstruction(object):
-    __slots__ = ["inst_type", "command", "value", "bank"]
-    T_REGISTER, T_DELAY, T_BANK_SWITCH = range(3)
-    TYPE_MAP = ["T_REGISTER", "T_DELAY", "T_BANK_SWITCH"]
-
-    def __init__(self, inst_type, command, value, bank=None):
-        self.inst_type = inst_type
-        self.command = command
-        self.value = value
-        self.bank = bank
-
-    def __repr__(self):
-        return ("DROInstruction(DROInstruction.%s, %s, %s, bank=%s)" %
-            (self.TYPE_MAP[self.inst_type],
-                self.command,
-                self.value,
-                self.bank))
-
-    def __eq__(self, other):
-        if type(other) == DROInstruction:
-            if (self.inst_type == other.inst_type and
-                self.command == other.command and
-                self.value == other.value and
-                self.bank == other.bank):
-                return True
-        return False
-
-    def __hash__(self):
-        return hash((self.inst_type,
-                     self.command,
-                     self.value,
-                     self.bank))
-
-
-class DRODataFactory(object):
-    def __new__(cls, file_version, *args, **kwds):
-        if file_version == DRO_FILE_V1:
-            return DRODataV1(*args, **kwds)
-        elif file_version == DRO_FILE_V2:
-            return DRODataV1(*args, **kwds)
-        else:
-            return dro_util.DROTrimmerException("Unknown DRO version for data factory: %s" % file_version)
-
-
-class DROData(object):
-    """ Wraps around the DRO data, providing access to each instruction,
-    while efficiently storing the item in memory.
-    Locking should be performed by
-    """
-    def __init__(self, *args, **kwds):
-        self.data = array.array('B')
-        self.short_delay_code = None
-        self.long_delay_code = None
-        self.delay_codes = None
-
-    def translate_index(self, key):
-        raise NotImplementedError()
-
-    def interpret_data(self, real_index):
-        raise NotImplementedError()
-
-    def __len__(self):
-        raise NotImplementedError()
-
-    def iter_indexes(self):
-        raise NotImplementedError()
-
-    def shallow_copy(self, new_data=None):
-        """Copies everything except the actual underlying data. You can pass in
-        new data to assign to the copy."""
-        new_copy = type(self)()
-        new_copy.short_delay_code = self.short_delay_code
-        new_copy.long_delay_code = self.long_delay_code
-        new_copy.delay_codes = self.delay_codes
-        if new_data is not None:
-            new_copy.data = new_data
-        return new_copy
-
-    def __delitem__(self, key):
-        if type(key) == slice:
-            if key.start is None:
-                first_index = None
-            else:
-                first_index = self.translate_index(key.start)
-            if key.stop is None:
-                second_index = None
-            else:
-                try:
-                    second_index = self.translate_index(key.stop + 1)
-                except IndexError:
-                    second_index = None # possibly dangerous
-        else:
-            first_index = self.translate_index(key)
-            try:
-                second_index = self.translate_index(key + 1)
-            except IndexError:
-                second_index = None # possibly dangerous
-        del self.data[first_index:second_index]
-
-    def delete_multiple(self, index_list, is_sorted=False):
-        """NOTE: the given index_list will be sorted in-place, and reversed in-place."""
-        # Sort if required
-        if not is_sorted:
-            index_list.sort() # dodgy, hidden side effects
-        index_list.reverse() # dodgy, hidden side effects
-        # We're usually going to delete slices, so convert ranges of
-        #  indexes into slices. Will be more efficient to do one
-        #  deletion of 10000 items, than 10000 deletions of one item.
-        #  (That's my theory, anyway.)
-        index_list = dro_util.condense_slices(index_list)
-        for i in index_list:
-            del self[i]
-
-    def __getitem__(self, key):
-        """ Returns the item, translated from the "logical" index
-        to the real index in the underlying array. The returned item is
-        a DROInstruction object, interpreted from the raw data.
-
-        Support slices, but only return a raw array. (Only like this for one
-        of the analysers, should really return a DROData or something.)"""
-        if type(key) == slice:
-            first_index = None if key.start is None else self.translate_index(key.start)
-            last_index = None if key.stop is None else self.translate_index(key.stop)
-            new_data = self.data[first_index:last_index]
-            new_copy = self.shallow_copy(new_data)
-            return new_copy
-        else:
-            real_index = self.translate_index(key)
-            return self.interpret_data(real_index)
-
-    def __iter__(self):
-        for i in self.iter_indexes():
-            yield self[i]
-
-    def _insert(self, key, value_array):
-        assert type(value_array) == array.array
-        real_i = self.translate_index(key)
-        self.data[real_i:real_i] = value_array
-
-    def insert_multiple(self, i_and_val_list):
-        for i, val in i_and_val_list:
-            self._insert(i, val)
-
-    def fromfile(self, file_handle, num_entries):
-        self.data.fromfile(file_handle, num_entries)
-
-    def tofile(self, file_handle):
-        self.data.tofile(file_handle)
-
-    def raw_len(self):
-        return len(self.data)
-
-    def raw_iter(self):
-        return iter(self.data)
-
-    def get_raw(self, key):
-        first_index = self.translate_index(key)
-        try:
-            second_index = self.translate_index(key + 1)
-        except IndexError:
-            second_index = None
-        if second_index is None:
-            return self.data[first_index:]
-        else:
-            return self.data[first_index:second_index]
-
-    def append_raw(self, value_array):
-        self.data.extend(value_array)
-
-
-class DRODataV1(DROData):
-    def __init__(self, *args, **kwds):
-        super(DRODataV1, self).__init__(*args, **kwds)
-        self.index_map = [] # keys are indexes.
-        self.short_delay_code = 0x00
-        self.long_delay_code = 0x01
-        self.delay_codes = (self.short_delay_code, self.long_delay_code)
-
-    def delete_multiple(self, index_list, is_sorted=False):
-        super(DRODataV1, self).delete_multiple(index_list, is_sorted)
-        self.generate_index_map()
-
-    def insert_multiple(self, i_and_val_list):
-        real_offset = 0
-        for num_inserted, (i, val) in enumerate(i_and_val_list):
-            real_index = self.translate_index(i - num_inserted) + real_offset
-            self.data[real_index:real_index] = val
-            real_offset += len(val)
-        self.generate_index_map()
-
-    def append_raw(self, value_array):
-        self.index_map.append(self.raw_len())
-        super(DRODataV1, self).append_raw(value_array)
-
-    def shallow_copy(self, new_data=None):
-        new_copy = super(DRODataV1, self).shallow_copy(new_data)
-        if new_data is not None:
-            new_copy.generate_index_map()
-        return new_copy
-
-    def translate_index(self, index):
-        try:
-            return self.index_map[index]
-        except IndexError, ie:
-            if index == len(self.index_map):
-                return len(self.data)
-            else:
-                raise ie
-
-    def interpret_data(self, real_index):
-        cmd = self.data[real_index]
-        if cmd == 0x00:
-            inst_type = DROInstruction.T_DELAY
-            val = self.data[real_index + 1] + 1
-        elif cmd == 0x01:
-            inst_type = DROInstruction.T_DELAY
-            val = (self.data[real_index + 1] | (self.data[real_index + 2] << 8)) + 1
-        elif cmd == 0x02:
-            inst_type = DROInstruction.T_BANK_SWITCH
-            val = 0x00
-        elif cmd == 0x03:
-            inst_type = DROInstruction.T_BANK_SWITCH
-            val = 0x01
-        elif cmd == 0x04:
-            inst_type = DROInstruction.T_REGISTER
-            cmd = self.data[real_index + 1]
-            val = self.data[real_index + 2]
-        else:
-            inst_type = DROInstruction.T_REGISTER
-            val = self.data[real_index + 1]
-
-        return DROInstruction(inst_type, cmd, val)
-
-    def __len__(self):
-        return len(self.index_map)
-
-    def iter_indexes(self):
-        return xrange(len(self.index_map))
-
-    def generate_index_map(self):
-        self.index_map = []
-        i = 0
-        while i < len(self.data):
-            # Map the logical index to the real index
-            self.index_map.append(i)
-            # Skip to the next instruction
-            cmd = self.data[i]
-            if cmd == 0x00:
-                i += 2
-            elif cmd == 0x01:
-                i += 3
-            elif cmd in (0x02, 0x03):
-                i += 1
-            elif cmd == 0x04:
-                i += 3
-            else:
-                i+= 2
-
-
-class DRODataV2(DROData):
-    def __init__(self, *args, **kwds):
-        super(DRODataV2, self).__init__(self, *args, **kwds)
-        self.codemap = None
-        self.short_delay_code = None
-        self.long_delay_code = None
-        self.delay_codes = (self.short_delay_code, self.long_delay_code)
-
-    def shallow_copy(self, new_data=None):
-        new_copy = super(DRODataV2, self).shallow_copy(new_data)
-        new_copy.codemap = self.codemap
-        return new_copy
-
-    def translate_index(self, key):
-        return key * 2
-
-    def interpret_data(self, real_index):
-        cmd = self.data[real_index]
-        bank = None
-        if cmd == self.short_delay_code:
-            inst_type = DROInstruction.T_DELAY
-            val = self.data[real_index + 1] + 1
-        elif cmd == self.long_delay_code:
-            inst_type = DROInstruction.T_DELAY
-            val = (self.data[real_index + 1] + 1) << 8
-        else:
-            inst_type = DROInstruction.T_REGISTER
-            bank = (cmd & 0x80) >> 7
-            cmd = self.codemap[cmd & 0x7F]
-            val = self.data[real_index + 1]
-
-        return DROInstruction(inst_type, cmd, val, bank)
-
-    def __len__(self):
-        return len(self.data) / 2
-
-    def iter_indexes(self):
-        return xrange(len(self.data) / 2)
-
-
-class DROSong(object):
-    """ NOTE: this actually implements methods for the V1 file format.
-    """
-    OPL_TYPE_MAP = [
-        "OPL-2",
-        "OPL-3",
-        "Dual OPL-2"
-    ]
-
-    def __init__(self, file_version, name, data, ms_length, opl_type):
-        self.file_version = file_version
-        self.name = name
-        self.data = data
-        self.ms_length = ms_length
-        self.opl_type = opl_type
-        self.short_delay_code = 0x00
-        self.long_delay_code = 0x01
-        self.detailed_register_descriptions = None
-        self.data_lock = threading.RLock()
-
-    def getLengthMS(self):
-        return self.ms_length
-
-    def getLengthData(self):
-        return len(self.data)
-
-    def find_next_instruction(self, start, s_inst, look_backwards=False):
-        """ Takes a starting index and register number (as a hex string) or
-        a special value of "DLYS", "DLYL" or "BANK", and finds the next
-        occurrence of that register after the given index. Returns the index."""
-
-        # This is nuts. Change the comparison test depending on what we're
-        #  looking for.
-        i = start
-        if s_inst == "DLYS":
-            ct = lambda datum, inst: datum.inst_type == DROInstruction.T_DELAY and datum.command == self.data.short_delay_code
-        elif s_inst == "DLYL":
-            ct = lambda datum, inst: datum.inst_type == DROInstruction.T_DELAY and datum.command == self.data.long_delay_code
-        elif s_inst == "DALL":
-            ct = lambda datum, inst: datum.inst_type == DROInstruction.T_DELAY
-        elif s_inst == "BANK":
-            ct = lambda datum, inst: datum.inst_type == DROInstruction.T_BANK_SWITCH
-        else:
-            ct = lambda datum, inst: datum.inst_type == DROInstruction.T_REGISTER and datum.command == inst
-            s_inst = int(s_inst, 16)
-
-        if look_backwards:
-            i -= 2 # so we don't get stuck on the currently selected instruction
-            while i >= 0:
-                if ct(self.data[i], s_inst):
-                    return i
-                i -= 1
-        else:
-            while i < len(self.data):
-                if ct(self.data[i], s_inst):
-                    return i
-                i += 1
-
-        return -1
-
-    def __insert_instructions(self, index_and_value_list):
-        """ Currently just an internal method, used for undoing deletions.
-
-        (Note to self: if this gets exposed to outside calls, make it
-        "undoable" too.)
-        """
-        self.stop_detailed_register_descriptions()
-        with self.data_lock:
-            self.data.insert_multiple(index_and_value_list)
-        # Keep track of delays inserted, so we can update the total delay count.
-        for i, val in index_and_value_list:
-            inst = self.data[i]
-            if inst.inst_type == DROInstruction.T_DELAY:
-                self.ms_length += inst.value
-        # Also need to update our register descriptions, since the data has changed.
-        self.generate_detailed_register_descriptions()
-
-    @dro_undo.undoable("Delete Instruction(s)", dro_globals.get_undo_controller, __insert_instructions)
-    def delete_instructions(self, index_list):
-        """ Deletes instructions at the given indexes.
-
-        Returns a list of tuples, containing the index deleted and the value
-        that was stored at that index."""
-        self.stop_detailed_register_descriptions()
-
-        # First, copy the data to be deleted.
-        deleted_data = []
-        index_list.sort()
-        for i in index_list:
-            # Keep track of delays deleted, so we can update the total delay count.
-            inst = self.data[i]
-            if inst.inst_type == DROInstruction.T_DELAY:
-                self.ms_length -= inst.value
-            deleted_data.append((i, self.data.get_raw(i)))
-        # Now delete each item, in reverse order.
-        with self.data_lock:
-            self.data.delete_multiple(index_list, is_sorted=True)
-        # Also need to update our register descriptions, since the data has changed.
-        self.generate_detailed_register_descriptions()
-        return deleted_data
-
-    def get_register_display(self, item):
-        inst = self.data[item]
-        if inst.inst_type == DROInstruction.T_DELAY:
-            if inst.command == self.data.short_delay_code:
-                return "DLYS"
-            elif inst.command == self.data.long_delay_code:
-                return "DLYL"
-            else:
-                return "???"
-        elif inst.inst_type == DROInstruction.T_BANK_SWITCH:
-            return "BANK"
-        else: # must be a register instruction
-            return '0x%02X' % (inst.command,)
-
-    def get_value_display(self, item):
-        inst = self.data[item]
-        if inst.inst_type == DROInstruction.T_DELAY:
-            return "%d ms" % (inst.value,)
-        elif inst.inst_type == DROInstruction.T_BANK_SWITCH:
-            return ("low", "high")[inst.value]
-        else: # must be a register instruction
-            return '0x%02X (%d)' % (inst.value, inst.value)
-
-    def get_instruction_description(self, item):
-        inst = self.data[item]
-        if inst.inst_type == DROInstruction.T_DELAY:
-            if inst.command == self.data.short_delay_code:
-                return "Delay (short)"
-            elif inst.command == self.data.long_delay_code:
-                return "Delay (long)"
-            else:
-                return "???"
-        elif inst.inst_type == DROInstruction.T_BANK_SWITCH:
-            return ("Switch to %s registers (Dual OPL-2 / OPL-3)" %
-                    (("low", "high")[inst.value],))
-        else: # must be a register instruction
-            try:
-                reg_desc = regdata.registers[inst.command]
-            except KeyError:
-                # OPL-3 has some special registers that are only in the high bank
-                if inst.bank == 1:
-                    try:
-                        reg_desc = regdata.registers[0x100 | inst.command]
-                    except KeyError:
-                        reg_desc = "(unknown)"
-                else:
-                    reg_desc = "(unknown)"
-            return reg_desc
-
-    def get_detailed_register_description(self, item):
-        if (self.detailed_register_descriptions is None or
-            item >= len(self.detailed_register_descriptions)):
-            return "(not available)"
-        else:
-            return self.detailed_register_descriptions[item][1]
-
-    def get_bank_description(self, item):
-        if (self.detailed_register_descriptions is None or
-            item >= len(self.detailed_register_descriptions)):
-            return "(N/A)"
-        else:
-            return self.detailed_register_descriptions[item][0]
-
-    def generate_detailed_register_descriptions(self):
-        self.stop_detailed_register_descriptions()
-        self.detailed_register_descriptions = None
-        detailed_register_analyzer = dro_analysis.DRODetailedRegisterAnalyzer()
-        # Delay running analysis for a fraction of a second, this gives a better user experience. For example,
-        # when selecting an instruction and holding down the "delete" key to delete lots of instructions.
-        dro_globals.task_master().start_task(
-            "REG_ANALYSIS",
-            0.1,
-            detailed_register_analyzer.analyze_dro,
-            detailed_register_analyzer.cancel,
-            [self]
-        )
-
-    def stop_detailed_register_descriptions(self):
-        dro_globals.task_master().cancel_task("REG_ANALYSIS")
-
-    def __str__(self):
-        return "DRO[name = '%s', ver = '%s', opl_type = '%s' (%s), ms_length = '%s']" % (
-            self.name, self.file_version, self.opl_type, self.OPL_TYPE_MAP[self.opl_type], self.ms_length
-        )
-
-    def pretty_string(self):
-        pstr = (
-            "DRO Song: %(name)s\n"
-            "Format: v%(file_version)s\n"
-            "OPL Type: %(opl_type)s\n"
-            "Length (ms): %(ms_length)s"
-        ) % {
-            "name" : self.name,
-            "file_version" : self.file_version,
-            "opl_type" : self.OPL_TYPE_MAP[self.opl_type],
-            "ms_length" : self.ms_length
-        }
-        return pstr
-
-
-class DROSongV2(DROSong):
-    OPL_TYPE_MAP = [
-        "OPL-2",
-        "Dual OPL-2",
-        "OPL-3"
-    ]
-
-    def __init__(self, file_version, name, data, ms_length, opl_type, codemap, short_delay_code, long_delay_code):
-        super(DROSongV2, self).__init__(file_version, name, data, ms_length, opl_type)
-        # TODO: remove this, unnecessary
-        self.codemap = codemap
-        self.short_delay_code = short_delay_code
-        self.long_delay_code = long_delay_code
+#!/usr/bin/python
+#
+#    Use, distribution, and modification of the DRO Trimmer binaries, source code,
+#    or documentation, is subject to the terms of the MIT license, as below.
+#
+#    Copyright (c) 2008 - 2014 Laurence Dougal Myers
+#
+#    Permission is hereby granted, free of charge, to any person obtaining a copy
+#    of this software and associated documentation files (the "Software"), to deal
+#    in the Software without restriction, including without limitation the rights
+#    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#    copies of the Software, and to permit persons to whom the Software is
+#    furnished to do so, subject to the following conditions:
+#
+#    The above copyright notice and this permission notice shall be included in
+#    all copies or substantial portions of the Software.
+#
+#    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+#    THE SOFTWARE.
+
+from collections import defaultdict
+import array
+import bisect
+import itertools
+import re
+import dro_analysis
+import dro_globals
+import dro_pieces
+import dro_undo
+import dro_util
+import regdata
+import threading
+
+DRO_FILE_V1 = 1
+DRO_FILE_V2 = 2
+
+# Number of instructions decoded at a time by DROData.iter_batches.
+DEFAULT_BATCH_SIZE = 4096
+# The bank iter_batches gives DRO v1 instructions, which don't have one (DROInstruction uses None).
+NO_BANK = -1
+
+# Size in bytes of each DRO v1 instruction, indexed by its command byte.
+V1_INSTRUCTION_LENGTHS = [2, 3, 1, 1, 3] + [2] * 0xFB
+
+# Translation table mapping each V1 command byte to its size, if it isn't two bytes long (long
+#  delays, bank switches and escaped register writes), or to 0 if it is.
+_V1_ODD_LENGTH_TABLE = "".join(chr(length if length != 2 else 0) for length in V1_INSTRUCTION_LENGTHS)
+
+# Matches, in V1 data translated through _V1_ODD_LENGTH_TABLE, a run of two-byte instructions, or
+#  a single instruction of any other size. Every byte is covered, so consecutive matches are
+#  contiguous. (The last two alternatives only match incomplete instructions at the end.)
+_V1_INSTRUCTION_RE = re.compile(r"(?:\x00[\x00-\xFF])+|\x01|\x03[\x00-\xFF]{0,2}|\x00")
+
+# Bytes of V1 data scanned at a time by build_v1_index_map.
+_V1_SCAN_CHUNK_SIZE = 1 << 16
+
+
+class DROV1IndexMap(object):
+    """ Where each instruction in some DRO v1 data starts, numbered from 0 (the instruction's
+    "slot").
+
+    Most of a V1 song is made up of two-byte instructions, so instead of storing every offset,
+    we only store where each run of them starts: "run_slots" holds the slot of the first
+    instruction in each run, and "run_offsets" its offset. Each run ends with an instruction of
+    a different size (or the end of the data), and the next run starts after it. So the memory
+    used, and the time taken to build the map, depend on the number of odd-sized instructions,
+    rather than the size of the song.
+    """
+    __slots__ = ["run_slots", "run_offsets", "length"]
+
+    def __init__(self):
+        self.run_slots = array.array('I')
+        self.run_offsets = array.array('I')
+        self.length = 0
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, slot):
+        if slot < 0:
+            slot += self.length
+        if not 0 <= slot < self.length:
+            raise IndexError("index map slot out of range")
+        run = bisect.bisect_right(self.run_slots, slot) - 1
+        return self.run_offsets[run] + ((slot - self.run_slots[run]) << 1)
+
+    def __iter__(self):
+        return iter(self.offsets(0, self.length))
+
+    def offsets(self, slot_start, slot_stop):
+        """ Returns a list of the offsets of the instructions in a range of slots."""
+        result = []
+        if slot_start >= slot_stop:
+            return result
+        run_slots = self.run_slots
+        run_offsets = self.run_offsets
+        run = bisect.bisect_right(run_slots, slot_start) - 1
+        slot = slot_start
+        while slot < slot_stop:
+            run += 1
+            run_stop = run_slots[run] if run < len(run_slots) else self.length
+            run_stop = min(run_stop, slot_stop)
+            first = run_offsets[run - 1] + ((slot - run_slots[run - 1]) << 1)
+            result.extend(xrange(first, first + ((run_stop - slot) << 1), 2))
+            slot = run_stop
+        return result
+
+    def _add_run(self, slot, offset):
+        """ Starts a run of two-byte instructions at the given slot and offset."""
+        if self.run_slots and self.run_slots[-1] == slot:
+            self.run_offsets[-1] = offset
+        else:
+            self.run_slots.append(slot)
+            self.run_offsets.append(offset)
+
+    def extend(self, other, base):
+        """ Appends another index map, for data that comes straight after this one's.
+        "base" is the offset of the other map's data in this map's data."""
+        for slot, offset in itertools.izip(other.run_slots, other.run_offsets):
+            self._add_run(self.length + slot, base + offset)
+        self.length += other.length
+
+
+def build_v1_index_map(data, start=0):
+    """ Scans DRO v1 data from the given byte offset, returning a DROV1IndexMap of the
+    instructions from there on. Any incomplete instruction at the end of the data is kept,
+    like we always have.
+
+    The data is translated a chunk at a time, so that two-byte commands become 0 and every
+    other command becomes its size. Then the regex engine splits it into runs of two-byte
+    instructions and single odd-sized instructions, and we only need the size of each match:
+    a run has an even size, and any other instruction an odd size. So we only loop in Python
+    once per match, without creating a match object, or an int for each instruction."""
+    run_slots = [0]
+    run_offsets = [start]
+    end = len(data)
+    position = start
+    slot = 0
+    while position < end:
+        chunk_end = min(position + _V1_SCAN_CHUNK_SIZE, end)
+        # Go a little past the end of the chunk, so the last instruction in it is complete.
+        sizes = str(buffer(data, position, min(chunk_end + 2, end) - position)).translate(_V1_ODD_LENGTH_TABLE)
+        for size in map(len, _V1_INSTRUCTION_RE.findall(sizes)):
+            if position >= chunk_end:
+                break # carry on from here in the next chunk
+            position += size
+            if size & 1:
+                slot += 1
+                run_slots.append(slot)
+                run_offsets.append(position)
+            else:
+                slot += size >> 1
+    index_map = DROV1IndexMap()
+    index_map.run_slots.fromlist(run_slots)
+    index_map.run_offsets.fromlist(run_offsets)
+    index_map.length = slot
+    return index_map
+
+
+class DROInstruction(object):
+    __slots__ = ["inst_type", "command", "value", "bank"]
+    T_REGISTER, T_DELAY, T_BANK_SWITCH = range(3)
+    TYPE_MAP = ["T_REGISTER", "T_DELAY", "T_BANK_SWITCH"]
+
+    def __init__(self, inst_type, command, value, bank=None):
+        self.inst_type = inst_type
+        self.command = command
+        self.value = value
+        self.bank = bank
+
+    def __repr__(self):
+        return ("DROInstruction(DROInstruction.%s, %s, %s, bank=%s)" %
+            (self.TYPE_MAP[self.inst_type],
+                self.command,
+                self.value,
+                self.bank))
+
+    def __eq__(self, other):
+        if type(other) == DROInstruction:
+            if (self.inst_type == other.inst_type and
+                self.command == other.command and
+                self.value == other.value and
+                self.bank == other.bank):
+                return True
+        return False
+
+    def __hash__(self):
+        return hash((self.inst_type,
+                     self.command,
+                     self.value,
+                     self.bank))
+
+
+# Translation tables for instruction_type_mask. Maps the wanted instruction type to 1, and everything else to 0.
+_TYPE_MASK_TABLES = ['\x00' * inst_type + '\x01' + '\x00' * (0xFF - inst_type)
+                     for inst_type in xrange(len(DROInstruction.TYPE_MAP))]
+
+
+def instruction_type_mask(inst_types, inst_type):
+    """ Takes a list or array of instruction types. Returns a bytearray with 1 for each
+    instruction of the given type, and 0 for the rest. Handy for itertools.compress,
+    e.g. summing all delay values without looping in Python."""
+    return bytearray(inst_types).translate(_TYPE_MASK_TABLES[inst_type])
+
+
+class _DROSourceIndex(object):
+    """ Base class for indexes over a DROData, which are kept up to date as it's edited.
+
+    The index holds an entry for each piece source, describing the instructions in it. Sources
+    only ever get appended to, so an entry is built once, then only extended with any new slots
+    (see _extend_entry). After an edit, subclasses can recalculate anything they keep per piece
+    in _refresh_pieces, which should take one step per piece.
+    """
+    def __init__(self, dro_data):
+        self.dro_data = dro_data
+        self._source_entries = {}
+        self._generation = None
+        self._lock = threading.Lock() # the GUI and player threads can both be asking
+
+    def reset(self):
+        """ Forgets everything worked out so far. Needed when the way the data is decoded changes,
+        e.g. a DRO v2 song's delay codes."""
+        with self._lock:
+            self._source_entries = {}
+            self._generation = None
+
+    def _decode_source(self, source, slot_start, slot_stop=None):
+        """ Decodes a source from the given slot up to (not including) slot_stop, or the end.
+        Yields (first slot, instruction types, commands, values) for each batch."""
+        if slot_stop is None:
+            slot_stop = len(source)
+        for batch_start in xrange(slot_start, slot_stop, DEFAULT_BATCH_SIZE):
+            inst_types, commands, values, banks = [], [], [], []
+            batch_stop = min(batch_start + DEFAULT_BATCH_SIZE, slot_stop)
+            self.dro_data._decode_span(source.data, source.offsets(batch_start, batch_stop),
+                                       inst_types, commands, values, banks)
+            yield batch_start, inst_types, commands, values
+
+    def _extend_entry(self, source, entry):
+        """ Returns the entry for the given source, built or extended to cover all its slots.
+        "entry" is the entry from last time, or None if there isn't one."""
+        raise NotImplementedError()
+
+    def _refresh_pieces(self, pieces):
+        """ Called after an edit, once every source's entry is up to date."""
+        pass
+
+    def _refresh(self):
+        """ Brings the index up to date with the data, if it's been edited."""
+        pieces = self.dro_data.pieces
+        with self._lock:
+            if self._generation == self.dro_data.generation:
+                return
+            source_entries = {}
+            for piece in pieces.pieces:
+                if piece.source not in source_entries:
+                    source_entries[piece.source] = self._extend_entry(piece.source,
+                                                                      self._source_entries.get(piece.source))
+            # Only keep sources that are still in use.
+            self._source_entries = source_entries
+            self._refresh_pieces(pieces)
+            self._generation = self.dro_data.generation
+
+
+# Number of slots between the running delay totals kept by DRODelayIndex.
+DELAY_INDEX_INTERVAL = 32
+
+
+class _DRODelayIndexEntry(object):
+    """ DRODelayIndex's entry for a source. "totals" holds the total delay of the slots before
+    every DELAY_INDEX_INTERVAL'th slot, and "total" the total of the first "num_slots" slots
+    (the ones indexed so far)."""
+    __slots__ = ["totals", "num_slots", "total"]
+
+    def __init__(self):
+        self.totals = array.array('l', [0])
+        self.num_slots = 0
+        self.total = 0
+
+
+class DRODelayIndex(_DROSourceIndex):
+    """ Keeps track of the time (in milliseconds) at which each instruction in a DROData plays,
+    i.e. the total of all the delays before it. Converting between positions and times, or
+    totalling the delays in a range, then takes a couple of bisects and a short decode instead
+    of a pass over the song.
+
+    Each source's entry holds a running delay total every DELAY_INDEX_INTERVAL slots (see
+    _DRODelayIndexEntry), rather than one for every slot, so the index stays small next to the
+    song data, even if that's a memory-mapped file. The time at any other slot is worked out by
+    decoding the few slots since the last running total. After an edit, the total delay of each
+    piece is recalculated, unless the same piece was there before.
+    """
+    def __init__(self, dro_data):
+        super(DRODelayIndex, self).__init__(dro_data)
+        self._piece_times = [] # total delay up to the end of each piece
+        self._piece_starts = [] # time within its source at which each piece starts
+        self._piece_cache = {} # (source, start, stop) -> (time within the source at the start, total delay)
+
+    def reset(self):
+        with self._lock:
+            self._piece_cache = {}
+        super(DRODelayIndex, self).reset()
+
+    def _source_delays(self, source, slot_start, slot_stop):
+        """ Decodes a range of slots in a source, returning a list with the delay of each one
+        (0 for anything that isn't a delay)."""
+        delays = []
+        delay_type = DROInstruction.T_DELAY
+        for batch_start, inst_types, commands, values in self._decode_source(source, slot_start, slot_stop):
+            delays.extend([value if inst_type == delay_type else 0
+                           for inst_type, value in itertools.izip(inst_types, values)])
+        return delays
+
+    def _extend_entry(self, source, entry):
+        if entry is None:
+            entry = _DRODelayIndexEntry()
+        interval = DELAY_INDEX_INTERVAL
+        total = entry.total
+        new_totals = []
+        for batch_start, inst_types, commands, values in self._decode_source(source, entry.num_slots):
+            delay_mask = instruction_type_mask(inst_types, DROInstruction.T_DELAY)
+            # Sum up to each multiple of the interval.
+            i = 0
+            while i < len(values):
+                stop = min(len(values), i + interval - (batch_start + i) % interval)
+                total += sum(itertools.compress(values[i:stop], delay_mask[i:stop]))
+                i = stop
+                if (batch_start + i) % interval == 0:
+                    new_totals.append(total)
+        entry.totals.fromlist(new_totals)
+        entry.num_slots = len(source)
+        entry.total = total
+        return entry
+
+    def _source_time(self, source, slot):
+        """ Returns the total delay of the slots before the given one in a source."""
+        entry = self._source_entries[source]
+        if slot == entry.num_slots:
+            return entry.total
+        checkpoint = slot - slot % DELAY_INDEX_INTERVAL
+        time = entry.totals[checkpoint // DELAY_INDEX_INTERVAL]
+        if checkpoint < slot:
+            time += sum(self._source_delays(source, checkpoint, slot))
+        return time
+
+    def _refresh_pieces(self, pieces):
+        piece_times = []
+        piece_starts = []
+        piece_cache = {}
+        total = 0
+        for piece in pieces.pieces:
+            key = (piece.source, piece.start, piece.stop)
+            cached = self._piece_cache.get(key)
+            if cached is None:
+                start_time = self._source_time(piece.source, piece.start)
+                cached = (start_time, self._source_time(piece.source, piece.stop) - start_time)
+            piece_cache[key] = cached
+            total += cached[1]
+            piece_times.append(total)
+            piece_starts.append(cached[0])
+        self._piece_times = piece_times
+        self._piece_starts = piece_starts
+        self._piece_cache = piece_cache
+
+    def total(self):
+        """ Returns the total of all delays in the song."""
+        self._refresh()
+        if not self._piece_times:
+            return 0
+        return self._piece_times[-1]
+
+    def time_at(self, index):
+        """ Returns the time at which the instruction at the given index plays, i.e. the total of all
+        delays before it. Passing the length of the song gives the total."""
+        self._refresh()
+        pieces = self.dro_data.pieces
+        if index >= len(pieces):
+            return self.total()
+        piece_i, first = pieces.find(index)
+        piece = pieces.pieces[piece_i]
+        before = self._piece_times[piece_i - 1] if piece_i else 0
+        return before + self._source_time(piece.source, piece.start + index - first) - self._piece_starts[piece_i]
+
+    def time_between(self, start, stop):
+        """ Returns the total of all delays from start up to (not including) stop."""
+        return self.time_at(stop) - self.time_at(start)
+
+    def _bisect(self, ms, bisect_func):
+        self._refresh()
+        pieces = self.dro_data.pieces
+        # Find the piece, then the running total within its source, then the slot.
+        piece_i = bisect_func(self._piece_times, ms)
+        if piece_i >= len(pieces.pieces):
+            return len(pieces) + 1
+        piece = pieces.pieces[piece_i]
+        entry = self._source_entries[piece.source]
+        before = self._piece_times[piece_i - 1] if piece_i else 0
+        source_ms = ms - before + self._piece_starts[piece_i]
+        # The slot is after the last running total that's too early, and no later than the next one.
+        checkpoint = (bisect_func(entry.totals, source_ms) - 1) * DELAY_INDEX_INTERVAL
+        slot_start = max(piece.start, checkpoint)
+        slot_stop = min(piece.stop, checkpoint + DELAY_INDEX_INTERVAL)
+        times = [self._source_time(piece.source, slot_start)]
+        for delay in self._source_delays(piece.source, slot_start, slot_stop):
+            times.append(times[-1] + delay)
+        slot = slot_start + bisect_func(times, source_ms)
+        first = pieces.ends[piece_i - 1] if piece_i else 0
+        return first + slot - piece.start
+
+    def bisect_left(self, ms):
+        """ Returns the first index at which the time (see time_at) is at least the given time.
+        Index len(song) + 1 means none, as if the song had a time_at beyond its end."""
+        if ms <= 0:
+            return 0
+        return self._bisect(ms, bisect.bisect_left)
+
+    def bisect_right(self, ms):
+        """ Returns the first index at which the time (see time_at) is greater than the given time.
+        Index len(song) + 1 means none, as if the song had a time_at beyond its end."""
+        if ms < 0:
+            return 0
+        return self._bisect(ms, bisect.bisect_right)
+
+
+class DROInstructionIndex(_DROSourceIndex):
+    """ An inverted index, giving the positions of each kind of instruction in a DROData, so
+    searching for the next register write or delay is a bisect rather than a scan.
+
+    Instructions are keyed by (instruction type, command), e.g. (DROInstruction.T_REGISTER, 0xB0).
+    Each source's entry is a dict mapping each key to a sorted array of the slots holding it.
+    Looking something up means checking each piece in turn, from the one holding the start index.
+
+    Unlike the delay index, this holds every slot (4 bytes each), so it's only built the first
+    time something is searched for.
+    """
+    def _extend_entry(self, source, slot_lists):
+        if slot_lists is None:
+            slot_lists = {}
+            done = 0
+        else:
+            # Every slot is under exactly one key, so carry on after the highest one so far.
+            done = max(slots[-1] for slots in slot_lists.itervalues()) + 1 if slot_lists else 0
+        new_slots = defaultdict(list)
+        for batch_start, inst_types, commands, values in self._decode_source(source, done):
+            for slot, key in enumerate(itertools.izip(inst_types, commands), batch_start):
+                new_slots[key].append(slot)
+        for key, slots in new_slots.iteritems():
+            if key not in slot_lists:
+                slot_lists[key] = array.array('I')
+            slot_lists[key].fromlist(slots)
+        return slot_lists
+
+    def keys(self, inst_type=None):
+        """ Returns the keys of every kind of instruction in the song (or that used to be in it),
+        optionally only of the given instruction type."""
+        self._refresh()
+        keys = set()
+        for slot_lists in self._source_entries.itervalues():
+            keys.update(slot_lists)
+        if inst_type is not None:
+            keys = set(key for key in keys if key[0] == inst_type)
+        return keys
+
+    def find_next(self, keys, start):
+        """ Returns the index of the first instruction at or after "start" that matches any of the
+        given keys, or -1 if there isn't one."""
+        self._refresh()
+        pieces = self.dro_data.pieces
+        if start < 0:
+            start = 0
+        if start >= len(pieces):
+            return -1
+        piece_i, first = pieces.find(start)
+        while piece_i < len(pieces.pieces):
+            piece = pieces.pieces[piece_i]
+            slot_lists = self._source_entries[piece.source]
+            slot_start = piece.start + max(start - first, 0)
+            found = None
+            for key in keys:
+                slots = slot_lists.get(key)
+                if slots is None:
+                    continue
+                i = bisect.bisect_left(slots, slot_start)
+                if i < len(slots) and slots[i] < piece.stop and (found is None or slots[i] < found):
+                    found = slots[i]
+            if found is not None:
+                return first + found - piece.start
+            first = pieces.ends[piece_i]
+            piece_i += 1
+        return -1
+
+    def find_previous(self, keys, start):
+        """ Returns the index of the last instruction at or before "start" that matches any of the
+        given keys, or -1 if there isn't one."""
+        self._refresh()
+        pieces = self.dro_data.pieces
+        if start >= len(pieces):
+            start = len(pieces) - 1
+        if start < 0:
+            return -1
+        piece_i, first = pieces.find(start)
+        while piece_i >= 0:
+            piece = pieces.pieces[piece_i]
+            first = pieces.ends[piece_i - 1] if piece_i else 0
+            slot_lists = self._source_entries[piece.source]
+            slot_stop = piece.start + min(start - first + 1, piece.stop - piece.start)
+            found = None
+            for key in keys:
+                slots = slot_lists.get(key)
+                if slots is None:
+                    continue
+                i = bisect.bisect_left(slots, slot_stop) - 1
+                if i >= 0 and slots[i] >= piece.start and (found is None or slots[i] > found):
+                    found = slots[i]
+            if found is not None:
+                return first + found - piece.start
+            piece_i -= 1
+        return -1
+
+    def count(self, keys, start=0, stop=None):
+        """ Returns the number of instructions from start up to (not including) stop that match any
+        of the given keys."""
+        self._refresh()
+        total = 0
+        for source, slot_start, slot_stop in self.dro_data.pieces.iter_spans(start, stop):
+            slot_lists = self._source_entries[source]
+            for key in keys:
+                slots = slot_lists.get(key)
+                if slots is not None:
+                    total += bisect.bisect_left(slots, slot_stop) - bisect.bisect_left(slots, slot_start)
+        return total
+
+
+class DRODataFactory(object):
+    def __new__(cls, file_version, *args, **kwds):
+        if file_version == DRO_FILE_V1:
+            return DRODataV1(*args, **kwds)
+        elif file_version == DRO_FILE_V2:
+            return DRODataV1(*args, **kwds)
+        else:
+            return dro_util.DROTrimmerException("Unknown DRO version for data factory: %s" % file_version)
+
+
+class DROData(object):
+    """ Wraps around the DRO data, providing access to each instruction,
+    while efficiently storing the item in memory.
+    Locking should be performed by
+
+    Instructions are edited through a piece table (see dro_pieces). "data" holds the
+    instructions as loaded, and is never modified, so it can be a read-only view of a
+    memory-mapped file. Inserted instructions are kept in a separate buffer; the pieces say
+    which instructions make up the song, and in what order.
+    """
+    def __init__(self, *args, **kwds):
+        self.generation = 0 # incremented on every edit
+        self.delay_index = DRODelayIndex(self)
+        self.instruction_index = DROInstructionIndex(self)
+        self.short_delay_code = None
+        self.long_delay_code = None
+        self.delay_codes = None
+        self.pieces = dro_pieces.DROPieceTable()
+        self.set_data(array.array('B'))
+
+    def _create_source(self, data):
+        """ Returns a piece source for the given raw data."""
+        raise NotImplementedError()
+
+    def set_data(self, data):
+        """ Replaces all the instructions with the given raw data. The data is used as-is,
+        not copied. It can be an array('B'), or anything else that acts like one when indexed,
+        such as a view of a memory-mapped file."""
+        self.data = data
+        self._loaded = self._create_source(data)
+        self._added = self._create_source(array.array('B')) # inserted instructions go here
+        self.pieces.reset(self._loaded)
+        self._data_changed()
+        self.mark_saved() # as loaded
+
+    def mark_saved(self):
+        """ Records the current instructions as matching what's saved on disk, so changed_ranges
+        can tell which of them have been edited since."""
+        self._saved_layout = self.pieces.snapshot()
+
+    def changed_ranges(self):
+        """ Returns a list of (start, stop) index ranges, covering every instruction that may have
+        changed since the data was loaded, or since mark_saved was last called. Instructions
+        past the end of the saved data always count as changed."""
+        return self.pieces.changed_ranges(self._saved_layout)
+
+    def is_mapped(self):
+        """ Whether the loaded data is still a view of a memory-mapped file."""
+        return type(self.data) != array.array
+
+    def unmap(self):
+        """ Copies the loaded data into memory, if it's a view of a memory-mapped file.
+        Must be done before overwriting or truncating the mapped file, e.g. when saving
+        over it."""
+        if not self.is_mapped():
+            return
+        data = array.array('B')
+        data.fromstring(buffer(self.data))
+        # The pieces refer to the source, so swap the data out underneath them.
+        self.data = data
+        self._loaded.data = data
+
+    def decode_instruction(self, data, real_index):
+        """ Decodes the instruction at the given offset in the given raw data. Returns a tuple of
+        (instruction type, command, value, bank), the same values a DROInstruction would hold."""
+        raise NotImplementedError()
+
+    def interpret_data(self, data, real_index):
+        """ Decodes the instruction at the given offset in the given raw data, returning
+        a DROInstruction."""
+        return DROInstruction(*self.decode_instruction(data, real_index))
+
+    def _decode_span(self, data, offsets, inst_types, commands, values, banks):
+        """ Decodes the instructions at the given offsets in the given raw data, appending
+        their instruction types, commands, values and banks to the given lists."""
+        raise NotImplementedError()
+
+    def _complete_offsets(self, data):
+        """ Returns the offsets of the complete instructions at the start of the given raw data,
+        and the number of bytes they take up."""
+        raise NotImplementedError()
+
+    def decode_raw(self, data, inst_types, commands, values, banks):
+        """ Decodes raw instruction data that isn't part of this object, using this object's
+        settings (e.g. a V2 codemap). Appends to the given lists, like iter_batches fills its lists.
+        Any incomplete instruction at the end of the data is left alone.
+
+        Returns the number of bytes decoded."""
+        offsets, byte_length = self._complete_offsets(data)
+        self._decode_span(data, offsets, inst_types, commands, values, banks)
+        return byte_length
+
+    def iter_batches(self, batch_size=DEFAULT_BATCH_SIZE, start=0, stop=None):
+        """ Decodes the instructions from start up to (not including) stop, a batch at a time,
+        without creating a DROInstruction for each one. For each batch, yields a tuple of
+        (index of the first instruction, instruction types, commands, values, banks). The last
+        four are parallel lists, holding the same values as each DROInstruction would, except
+        V1 instructions have a bank of NO_BANK.
+
+        The same lists are cleared and refilled for every batch, so copy anything you want to
+        keep. Hold the song's data lock for reading while iterating."""
+        if stop is None or stop > len(self):
+            stop = len(self)
+        decoded = ([], [], [], [])
+        for batch_start in xrange(start, stop, batch_size):
+            for column in decoded:
+                del column[:]
+            batch_stop = min(batch_start + batch_size, stop)
+            for source, slot_start, slot_stop in self.pieces.iter_spans(batch_start, batch_stop):
+                self._decode_span(source.data, source.offsets(slot_start, slot_stop), *decoded)
+            yield (batch_start,) + decoded
+
+    def _data_changed(self):
+        """ Must be called whenever the underlying data is modified."""
+        self.generation += 1
+
+    def __len__(self):
+        return len(self.pieces)
+
+    def iter_indexes(self):
+        return xrange(len(self.pieces))
+
+    def shallow_copy(self, new_data=None):
+        """Copies everything except the actual underlying data. You can pass in
+        new data to assign to the copy."""
+        new_copy = type(self)()
+        new_copy.short_delay_code = self.short_delay_code
+        new_copy.long_delay_code = self.long_delay_code
+        new_copy.delay_codes = self.delay_codes
+        if new_data is not None:
+            new_copy.set_data(new_data)
+        return new_copy
+
+    def __delitem__(self, key):
+        # NOTE: slices include the stop index.
+        if type(key) == slice:
+            start = 0 if key.start is None else key.start
+            stop = len(self) if key.stop is None else key.stop + 1
+        else:
+            start = key
+            stop = key + 1
+        self.pieces.delete(start, stop)
+        self._data_changed()
+
+    def delete_multiple(self, index_list, is_sorted=False):
+        """ Deletes the instructions at all the given indexes in one go, however scattered they are.
+
+        Returns what was deleted, as a tuple of a list of (start, stop) index ranges and an array
+        holding the raw data of all the deleted instructions, in order. Pass it to reinsert_multiple
+        to put them back.
+
+        NOTE: the given index_list will be sorted in-place."""
+        # Sort if required
+        if not is_sorted:
+            index_list.sort() # dodgy, hidden side effects
+        # Convert runs of indexes into ranges.
+        ranges = []
+        length = len(self)
+        for i in index_list:
+            if i < 0 or i >= length:
+                continue
+            if ranges and i <= ranges[-1][1]:
+                ranges[-1][1] = max(ranges[-1][1], i + 1)
+            else:
+                ranges.append([i, i + 1])
+        ranges = [tuple(r) for r in ranges]
+        # Copy out the deleted data, then remove it all in one pass over the pieces.
+        deleted_data = array.array('B')
+        for start, stop in ranges:
+            for source, slot_start, slot_stop in self.pieces.iter_spans(start, stop):
+                deleted_data.fromstring(source.buffer(slot_start, slot_stop))
+        self.pieces.delete_ranges(ranges)
+        self._data_changed()
+        return ranges, deleted_data
+
+    def reinsert_multiple(self, deleted):
+        """ Puts back instructions removed by delete_multiple, given what it returned."""
+        ranges, deleted_data = deleted
+        slot_start, slot_stop = self._added.extend(deleted_data)
+        runs = []
+        for start, stop in ranges:
+            runs.append((start, self._added, slot_start, slot_start + stop - start))
+            slot_start += stop - start
+        assert slot_start == slot_stop
+        self.pieces.insert_runs(runs)
+        self._data_changed()
+
+    def __getitem__(self, key):
+        """ Returns the item, translated from the "logical" index
+        to the real index in the underlying array. The returned item is
+        a DROInstruction object, interpreted from the raw data.
+
+        Support slices, but only return a raw array. (Only like this for one
+        of the analysers, should really return a DROData or something.)"""
+        if type(key) == slice:
+            start, stop, step = key.indices(len(self))
+            new_data = array.array('B')
+            for source, slot_start, slot_stop in self.pieces.iter_spans(start, stop):
+                new_data.fromstring(source.buffer(slot_start, slot_stop))
+            return self.shallow_copy(new_data)
+        else:
+            source, slot = self.pieces.locate(key)
+            return self.interpret_data(source.data, source.offset(slot))
+
+    def get_decoded(self, key):
+        """ Like self[key], but returns a tuple of (instruction type, command, value, bank)
+        instead of creating a DROInstruction. For hot loops, like the player's."""
+        source, slot = self.pieces.locate(key)
+        return self.decode_instruction(source.data, source.offset(slot))
+
+    def __iter__(self):
+        for source, slot_start, slot_stop in self.pieces.iter_spans():
+            data = source.data
+            for real_index in source.offsets(slot_start, slot_stop):
+                yield self.interpret_data(data, real_index)
+
+    def _insert(self, key, value_array):
+        assert type(value_array) == array.array
+        slot_start, slot_stop = self._added.extend(value_array)
+        self.pieces.insert(key, self._added, slot_start, slot_stop)
+        self._data_changed()
+
+    def insert_multiple(self, i_and_val_list):
+        for i, val in i_and_val_list:
+            self._insert(i, val)
+
+    def fromfile(self, file_handle, num_entries):
+        data = array.array('B')
+        try:
+            data.fromfile(file_handle, num_entries)
+        finally:
+            # Keep whatever was read, even if the file was too short.
+            self.set_data(data)
+
+    def tofile(self, file_handle, start=0, stop=None):
+        """ Writes the raw data of the instructions from start up to (not including) stop,
+        or all of them."""
+        # Only now do the pieces get flattened out.
+        for source, slot_start, slot_stop in self.pieces.iter_spans(start, stop):
+            file_handle.write(source.buffer(slot_start, slot_stop))
+
+    def raw_len(self):
+        return self.pieces.byte_length
+
+    def raw_iter(self):
+        for source, slot_start, slot_stop in self.pieces.iter_spans():
+            for i in xrange(source.offset(slot_start), source.slot_end(slot_stop - 1)):
+                yield source.data[i]
+
+    def get_raw(self, key):
+        source, slot = self.pieces.locate(key)
+        return source.raw(slot, slot + 1)
+
+    def append_raw(self, value_array):
+        self._insert(len(self), value_array)
+
+
+class DRODataV1(DROData):
+    """ V1 instructions vary in size, so each source keeps a map of where each
+    instruction starts.
+    """
+    def __init__(self, *args, **kwds):
+        super(DRODataV1, self).__init__(*args, **kwds)
+        self.short_delay_code = 0x00
+        self.long_delay_code = 0x01
+        self.delay_codes = (self.short_delay_code, self.long_delay_code)
+
+    def _create_source(self, data):
+        return dro_pieces.DROPieceSource(data, build_v1_index_map)
+
+    def decode_instruction(self, data, real_index):
+        cmd = data[real_index]
+        if cmd == 0x00:
+            inst_type = DROInstruction.T_DELAY
+            val = data[real_index + 1] + 1
+        elif cmd == 0x01:
+            inst_type = DROInstruction.T_DELAY
+            val = (data[real_index + 1] | (data[real_index + 2] << 8)) + 1
+        elif cmd == 0x02:
+            inst_type = DROInstruction.T_BANK_SWITCH
+            val = 0x00
+        elif cmd == 0x03:
+            inst_type = DROInstruction.T_BANK_SWITCH
+            val = 0x01
+        elif cmd == 0x04:
+            inst_type = DROInstruction.T_REGISTER
+            cmd = data[real_index + 1]
+            val = data[real_index + 2]
+        else:
+            inst_type = DROInstruction.T_REGISTER
+            val = data[real_index + 1]
+
+        return inst_type, cmd, val, None
+
+    def _complete_offsets(self, data):
+        index_map = build_v1_index_map(data)
+        num_complete = len(index_map)
+        if not num_complete:
+            return [], 0
+        last = index_map[-1]
+        end = last + V1_INSTRUCTION_LENGTHS[data[last]]
+        if end > len(data):
+            num_complete -= 1
+            end = last
+        return index_map.offsets(0, num_complete), end
+
+    def _decode_span(self, data, offsets, inst_types, commands, values, banks):
+        # Same as decode_instruction, but in bulk.
+        for real_index in offsets:
+            cmd = data[real_index]
+            if cmd == 0x00:
+                inst_type = DROInstruction.T_DELAY
+                val = data[real_index + 1] + 1
+            elif cmd == 0x01:
+                inst_type = DROInstruction.T_DELAY
+                val = (data[real_index + 1] | (data[real_index + 2] << 8)) + 1
+            elif cmd == 0x02:
+                inst_type = DROInstruction.T_BANK_SWITCH
+                val = 0x00
+            elif cmd == 0x03:
+                inst_type = DROInstruction.T_BANK_SWITCH
+                val = 0x01
+            elif cmd == 0x04:
+                inst_type = DROInstruction.T_REGISTER
+                cmd = data[real_index + 1]
+                val = data[real_index + 2]
+            else:
+                inst_type = DROInstruction.T_REGISTER
+                val = data[real_index + 1]
+            inst_types.append(inst_type)
+            commands.append(cmd)
+            values.append(val)
+        banks.extend([NO_BANK] * len(offsets))
+
+
+class DRODataV2(DROData):
+    """ V2 instructions are all two bytes: a command byte, then a value. Every possible command
+    byte is decoded up front into a lookup table (see _build_opcode_table), so decoding an
+    instruction doesn't have to compare it against the delay codes or look up the codemap.
+    """
+    def __init__(self, *args, **kwds):
+        self._codemap = None
+        self._short_delay_code = None
+        self._long_delay_code = None
+        self._opcode_table = None
+        super(DRODataV2, self).__init__(self, *args, **kwds)
+        self.delay_codes = (self.short_delay_code, self.long_delay_code)
+
+    # The opcode table depends on these, so it gets rebuilt whenever they change.
+    @property
+    def codemap(self):
+        return self._codemap
+
+    @codemap.setter
+    def codemap(self, value):
+        self._codemap = value
+        self._build_opcode_table()
+
+    @property
+    def short_delay_code(self):
+        return self._short_delay_code
+
+    @short_delay_code.setter
+    def short_delay_code(self, value):
+        self._short_delay_code = value
+        self._build_opcode_table()
+
+    @property
+    def long_delay_code(self):
+        return self._long_delay_code
+
+    @long_delay_code.setter
+    def long_delay_code(self, value):
+        self._long_delay_code = value
+        self._build_opcode_table()
+
+    def _build_opcode_table(self):
+        """ Works out what each of the 256 possible command bytes decodes to. Each entry is
+        (instruction type, command, bank, bank for iter_batches, add, shift), where the
+        instruction's value is (value byte + add) << shift. Entries are None for command bytes
+        that aren't in the codemap."""
+        table = [None] * 0x100
+        codemap = self._codemap or ()
+        for cmd in xrange(0x100):
+            if (cmd & 0x7F) < len(codemap):
+                bank = (cmd & 0x80) >> 7
+                table[cmd] = (DROInstruction.T_REGISTER, codemap[cmd & 0x7F], bank, bank, 0, 0)
+        # Delay codes take priority over the codemap, and the short delay code over the long one.
+        if self._long_delay_code is not None:
+            table[self._long_delay_code] = (DROInstruction.T_DELAY, self._long_delay_code,
+                                            None, NO_BANK, 1, 8)
+        if self._short_delay_code is not None:
+            table[self._short_delay_code] = (DROInstruction.T_DELAY, self._short_delay_code,
+                                             None, NO_BANK, 1, 0)
+        self._opcode_table = table
+        # Anything decoded with the old table is out of date.
+        self.delay_index.reset()
+        self.instruction_index.reset()
+        self._data_changed()
+
+    def valid_command_bytes(self):
+        """ Returns the command bytes that decode to an instruction: the delay codes, and the
+        codemap entries in either bank."""
+        return [cmd for cmd, entry in enumerate(self._opcode_table) if entry is not None]
+
+    def _unknown_command(self, cmd):
+        return dro_util.DROTrimmerException("Unknown command byte in DRO v2 data, not in the codemap: 0x%02X" % (cmd,))
+
+    def _create_source(self, data):
+        return dro_pieces.DROFixedWidthPieceSource(data, 2)
+
+    def _complete_offsets(self, data):
+        byte_length = len(data) & ~1
+        return xrange(0, byte_length, 2), byte_length
+
+    def shallow_copy(self, new_data=None):
+        new_copy = super(DRODataV2, self).shallow_copy(new_data)
+        new_copy.codemap = self.codemap
+        return new_copy
+
+    def decode_instruction(self, data, real_index):
+        try:
+            inst_type, cmd, bank, column_bank, add, shift = self._opcode_table[data[real_index]]
+        except TypeError:
+            raise self._unknown_command(data[real_index])
+        return inst_type, cmd, (data[real_index + 1] + add) << shift, bank
+
+    def _decode_span(self, data, offsets, inst_types, commands, values, banks):
+        # Same as decode_instruction, but in bulk.
+        table = self._opcode_table
+        try:
+            for real_index in offsets:
+                inst_type, cmd, bank, column_bank, add, shift = table[data[real_index]]
+                inst_types.append(inst_type)
+                commands.append(cmd)
+                values.append((data[real_index + 1] + add) << shift)
+                banks.append(column_bank)
+        except TypeError:
+            raise self._unknown_command(data[real_index])
+
+
+class DROSong(object):
+    """ NOTE: this actually implements methods for the V1 file format.
+    """
+    OPL_TYPE_MAP = [
+        "OPL-2",
+        "OPL-3",
+        "Dual OPL-2"
+    ]
+
+    def __init__(self, file_version, name, data, ms_length, opl_type):
+        self.file_version = file_version
+        self.name = name
+        self.data = data
+        self.ms_length = ms_length
+        self.opl_type = opl_type
+        self.short_delay_code = 0x00
+        self.long_delay_code = 0x01
+        self.detailed_register_descriptions = None
+        # The last detailed register analysis to finish, and the edits made since (see
+        #  generate_detailed_register_descriptions).
+        self._register_analysis_lock = threading.Lock()
+        self._register_analysis_base = None
+        self._register_analysis_changes = None
+        self._register_analysis_latest = None
+        self.data_lock = dro_util.ReadWriteLock() # analyses read, edits write
+        self.saved_file_state = None # see dro_io.DroFileIO.write_incremental
+
+    def getLengthMS(self):
+        return self.ms_length
+
+    def getLengthData(self):
+        return len(self.data)
+
+    def _instruction_keys(self, s_inst):
+        """ Takes a register number (as a hex string) or a special value of "DLYS", "DLYL", "DALL"
+        or "BANK". Returns the keys to look up in the data's instruction index."""
+        index = self.data.instruction_index
+        if s_inst == "DLYS":
+            return [(DROInstruction.T_DELAY, self.data.short_delay_code)]
+        elif s_inst == "DLYL":
+            return [(DROInstruction.T_DELAY, self.data.long_delay_code)]
+        elif s_inst == "DALL":
+            return index.keys(DROInstruction.T_DELAY)
+        elif s_inst == "BANK":
+            return index.keys(DROInstruction.T_BANK_SWITCH)
+        else:
+            return [(DROInstruction.T_REGISTER, int(s_inst, 16))]
+
+    def find_next_instruction(self, start, s_inst, look_backwards=False):
+        """ Takes a starting index and register number (as a hex string) or
+        a special value of "DLYS", "DLYL" or "BANK", and finds the next
+        occurrence of that register after the given index. Returns the index."""
+        keys = self._instruction_keys(s_inst)
+        if look_backwards:
+            # -2 so we don't get stuck on the currently selected instruction
+            return self.data.instruction_index.find_previous(keys, start - 2)
+        else:
+            return self.data.instruction_index.find_next(keys, start)
+
+    def count_instructions(self, s_inst, start=0, stop=None):
+        """ Returns how many times the register or special value (see find_next_instruction) occurs
+        from start up to (not including) stop."""
+        return self.data.instruction_index.count(self._instruction_keys(s_inst), start, stop)
+
+    def __insert_instructions(self, deleted):
+        """ Currently just an internal method, used for undoing deletions.
+        Takes what delete_instructions returned.
+
+        (Note to self: if this gets exposed to outside calls, make it
+        "undoable" too.)
+        """
+        self.stop_detailed_register_descriptions()
+        with self.data_lock.write_locked():
+            # Keep track of delays inserted, so we can update the total delay count.
+            total_delay = self.data.delay_index.total()
+            self.data.reinsert_multiple(deleted)
+            self.ms_length += self.data.delay_index.total() - total_delay
+        # Also need to update our register descriptions, since the data has changed.
+        ranges = deleted[0]
+        if ranges:
+            num_inserted = sum(stop - start for start, stop in ranges)
+            self.generate_detailed_register_descriptions((ranges[0][0], ranges[-1][1], num_inserted))
+        else:
+            self.generate_detailed_register_descriptions((0, 0, 0))
+
+    @dro_undo.undoable("Delete Instruction(s)", dro_globals.get_undo_controller, __insert_instructions)
+    def delete_instructions(self, index_list):
+        """ Deletes instructions at the given indexes.
+
+        Returns what was deleted, as returned by DROData.delete_multiple."""
+        self.stop_detailed_register_descriptions()
+
+        index_list.sort()
+        with self.data_lock.write_locked():
+            # Keep track of delays deleted, so we can update the total delay count.
+            total_delay = self.data.delay_index.total()
+            deleted = self.data.delete_multiple(index_list, is_sorted=True)
+            self.ms_length -= total_delay - self.data.delay_index.total()
+        # Also need to update our register descriptions, since the data has changed.
+        ranges = deleted[0]
+        if ranges:
+            num_deleted = sum(stop - start for start, stop in ranges)
+            self.generate_detailed_register_descriptions((ranges[0][0], ranges[-1][1] - num_deleted, -num_deleted))
+        else:
+            self.generate_detailed_register_descriptions((0, 0, 0))
+        return deleted
+
+    def get_time_display(self, item):
+        """ Returns the time at which the instruction plays, as minutes, seconds and milliseconds."""
+        minutes, milliseconds = divmod(self.data.delay_index.time_at(item), 60000)
+        return "%02i:%02i.%03i" % (minutes, milliseconds // 1000, milliseconds % 1000)
+
+    def get_register_display(self, item):
+        inst = self.data[item]
+        if inst.inst_type == DROInstruction.T_DELAY:
+            if inst.command == self.data.short_delay_code:
+                return "DLYS"
+            elif inst.command == self.data.long_delay_code:
+                return "DLYL"
+            else:
+                return "???"
+        elif inst.inst_type == DROInstruction.T_BANK_SWITCH:
+            return "BANK"
+        else: # must be a register instruction
+            return '0x%02X' % (inst.command,)
+
+    def get_value_display(self, item):
+        inst = self.data[item]
+        if inst.inst_type == DROInstruction.T_DELAY:
+            return "%d ms" % (inst.value,)
+        elif inst.inst_type == DROInstruction.T_BANK_SWITCH:
+            return ("low", "high")[inst.value]
+        else: # must be a register instruction
+            return '0x%02X (%d)' % (inst.value, inst.value)
+
+    def get_instruction_description(self, item):
+        inst = self.data[item]
+        if inst.inst_type == DROInstruction.T_DELAY:
+            if inst.command == self.data.short_delay_code:
+                return "Delay (short)"
+            elif inst.command == self.data.long_delay_code:
+                return "Delay (long)"
+            else:
+                return "???"
+        elif inst.inst_type == DROInstruction.T_BANK_SWITCH:
+            return ("Switch to %s registers (Dual OPL-2 / OPL-3)" %
+                    (("low", "high")[inst.value],))
+        else: # must be a register instruction
+            try:
+                reg_desc = regdata.registers[inst.command]
+            except KeyError:
+                # OPL-3 has some special registers that are only in the high bank
+                if inst.bank == 1:
+                    try:
+                        reg_desc = regdata.registers[0x100 | inst.command]
+                    except KeyError:
+                        reg_desc = "(unknown)"
+                else:
+                    reg_desc = "(unknown)"
+            return reg_desc
+
+    def get_detailed_register_description(self, item):
+        if (self.detailed_register_descriptions is None or
+            item >= len(self.detailed_register_descriptions)):
+            return "(not available)"
+        else:
+            return self.detailed_register_descriptions[item][1]
+
+    def get_bank_description(self, item):
+        if (self.detailed_register_descriptions is None or
+            item >= len(self.detailed_register_descriptions)):
+            return "(N/A)"
+        else:
+            return self.detailed_register_descriptions[item][0]
+
+    def generate_detailed_register_descriptions(self, changes=None):
+        """ Starts the detailed register analysis in the background. After an edit, pass in a tuple
+        of (first changed index, end of the changed indexes, change in length) describing it (see
+        DRODetailedRegisterAnalyzer.reanalyze_dro), and only the part of the song affected by the
+        edit gets analyzed again. Edits made while an analysis is still running are combined."""
+        self.stop_detailed_register_descriptions()
+        self.detailed_register_descriptions = None
+        detailed_register_analyzer = dro_analysis.DRODetailedRegisterAnalyzer()
+        with self._register_analysis_lock:
+            if changes is None or self._register_analysis_base is None:
+                self._register_analysis_base = None
+                self._register_analysis_changes = None
+            else:
+                self._register_analysis_changes = self.__combine_changes(self._register_analysis_changes, changes)
+            self._register_analysis_latest = detailed_register_analyzer
+            base = self._register_analysis_base
+            changes = self._register_analysis_changes
+        # Delay running analysis for a fraction of a second, this gives a better user experience. For example,
+        # when selecting an instruction and holding down the "delete" key to delete lots of instructions.
+        dro_globals.task_master().start_task(
+            "REG_ANALYSIS",
+            0.1,
+            self.__run_detailed_register_analysis,
+            detailed_register_analyzer.cancel,
+            [detailed_register_analyzer, base, changes]
+        )
+
+    def __run_detailed_register_analysis(self, detailed_register_analyzer, base, changes):
+        # Runs in the background task.
+        if base is None:
+            result = detailed_register_analyzer.analyze_dro(self)
+        else:
+            result = detailed_register_analyzer.reanalyze_dro(self, base, *changes)
+        with self._register_analysis_lock:
+            # Only the latest analysis can be the base for the next one. (An older one could
+            #  finish just as it's cancelled, but the edits since are relative to its base.)
+            if result is not None and detailed_register_analyzer is self._register_analysis_latest:
+                self._register_analysis_base = detailed_register_analyzer
+                self._register_analysis_changes = None
+        return result
+
+    @staticmethod
+    def __combine_changes(first_changes, second_changes):
+        """ Combines the descriptions of two edits, one after the other, into one describing both
+        (see generate_detailed_register_descriptions)."""
+        if first_changes is None:
+            return second_changes
+        first_1, end_1, length_change_1 = first_changes
+        first_2, end_2, length_change_2 = second_changes
+        first = min(first_1, first_2)
+        # Instructions after the first edit's changes get moved by the second edit.
+        end = max(end_2, end_1 + length_change_2, first)
+        return first, end, length_change_1 + length_change_2
+
+    def stop_detailed_register_descriptions(self):
+        dro_globals.task_master().cancel_task("REG_ANALYSIS")
+
+    def __str__(self):
+        return "DRO[name = '%s', ver = '%s', opl_type = '%s' (%s), ms_length = '%s']" % (
+            self.name, self.file_version, self.opl_type, self.OPL_TYPE_MAP[self.opl_type], self.ms_length
+        )
+
+    def pretty_string(self):
+        pstr = (
+            "DRO Song: %(name)s\n"
+            "Format: v%(file_version)s\n"
+            "OPL Type: %(opl_type)s\n"
+            "Length (ms): %(ms_length)s"
+        ) % {
+            "name" : self.name,
+            "file_version" : self.file_version,
+            "opl_type" : self.OPL_TYPE_MAP[self.opl_type],
+            "ms_length" : self.ms_length
+        }
+        return pstr
+
+
+class DROSongV2(DROSong):
+    OPL_TYPE_MAP = [
+        "OPL-2",
+        "Dual OPL-2",
+        "OPL-3"
+    ]
+
+    def __init__(self, file_version, name, data, ms_length, opl_type, codemap, short_delay_code, long_delay_code):
+        super(DROSongV2, self).__init__(file_version, name, data, ms_length, opl_type)
+        # TODO: remove this, unnecessary
+        self.codemap = codemap
+        self.short_delay_code = short_delay_code
+        self.long_delay_code = long_delay_code
+        self.compression = 0 # see dro_io.DRO_COMPRESSION_NONE
@@ -1,209 +1,973 @@
-#!/usr/bin/python
-#
-#    Use, distribution, and modification of the DRO Trimmer binaries, source code,
-#    or documentation, is subject to the terms of the MIT license, as below.
-#
-#    Copyright (c) 2008 - 2014 Laurence Dougal Myers
-#
-#    Permission is hereby granted, free of charge, to any person obtaining a copy
-#    of this software and associated documentation files (the "Software"), to deal
-#    in the Software without restriction, including without limitation the rights
-#    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
-#    copies of the Software, and to permit persons to whom the Software is
-#    furnished to do so, subject to the following conditions:
-#
-#    The above copyright notice and this permission notice shall be included in
-#    all copies or substantial portions of the Software.
-#
-#    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
-#    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
-#    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
-#    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
-#    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
-#    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
-#    THE SOFTWARE.
-
-from __future__ import with_statement
-from dro_data import DRO_FILE_V1, DRO_FILE_V2, DROSong, DROSongV2, DRODataV1, DRODataV2, DROInstruction
-from dro_util import *
-
-DRO_HEADER = "DBRAWOPL"
-DRO_VERSION_V1_OLD = (1, 0)
-DRO_VERSION_V1_NEW = (0, 1) # the DOSBox devs really screwed the versioning up, didn't they?
-DRO_VERSION_V2 = (2, 0)
-
-# This var is just for backwards compatability - it seems old versions of DRO
-#  files wrote the OPL type as a char, whereas newer versions write it as a 4-byte
-#  int. This program supports either, but it's hard coded.
-WRITE_CHAR_OPL = False
-
-class DroFileIO(object):
-    def read(self, file_name):
-        """ Accepts a file name (string). Returns a DROSong object and whether it was auto-trimmed (boolean).
-
-        Raises DROFileException on invalid file data/version."""
-        with file(file_name, 'rb') as drof:
-            header_name = drof.read(8)
-            if header_name != DRO_HEADER:
-                raise DROFileException("Does not appear to be a DRO file (invalid header. Expected %s, found %s)." %
-                                       (DRO_HEADER, header_name))
-
-            header_version = struct.unpack('<2H', drof.read(4))
-            if header_version in (DRO_VERSION_V1_OLD, DRO_VERSION_V1_NEW):
-                reader = DroFileIOv1()
-            elif header_version == DRO_VERSION_V2:
-                reader = DroFileIOv2()
-            else:
-                raise DROFileException("Unsupported version of the DRO file format. Supported: v1 or v2. Found: %s" %
-                                       (header_version,))
-
-            dro_song = reader.read_data(file_name, drof)
-            return dro_song
-
-    def write(self, file_name, dro_song):
-        with file(file_name, 'wb') as drof:
-            drof.write(DRO_HEADER)
-            if dro_song.file_version == DRO_FILE_V1:
-                writer = DroFileIOv1()
-                drof.write(struct.pack('<2H', *DRO_VERSION_V1_NEW)) # hmm, maybe shouldn't be here
-            elif dro_song.file_version == DRO_FILE_V2:
-                writer = DroFileIOv2()
-                drof.write(struct.pack('<2H', *DRO_VERSION_V2)) # hmm, maybe shouldn't be here
-            else:
-                # Should never get here.
-                raise DROFileException("Tried to save an unsupported version of the DRO file format. Support v1 or v2, found: %s" %
-                                       (dro_song.file_version,))
-            writer.write_data(drof, dro_song)
-
-class DroFileIOv1(object):
-    def read_data(self, file_name, drof):
-        """ Accepts an open DRO file. Returns a DROSong object and whether it was auto-trimmed (boolean).
-
-        Raises DROFileException on invalid file data/version."""
-        # Code interpreted from the adplug source code.
-        dro_byte_length = 0
-        dro_ms_length = 0
-        dro_opl_type = 0
-
-        # Actually load some data
-        dro_ms_length = read_int(drof) # Total milliseconds in file (not used)
-        dro_byte_length = read_int(drof) # Total data bytes in file (not used)
-
-        # Looking at the samurai.dro file in the adplug testing dir, it uses a char for
-        #  the OPL type, but my rips use words.
-        #  Looks like there's two different file formats, with the same version number.
-        dro_opl_type = read_int(drof) # Type of opl data this can contain
-
-        # To avoid the char/word problem, we'll just assume if the word we read in is
-        #  too large (say, more than 0xFF), we probably meant to read a char, so go back
-        #  and try again. Obviously this will cause problems if for some reason the DOSBox
-        #  guys want to use an opl_type of e.g. 1893647, but I think that's unlikely.
-        if dro_opl_type > 0xFF:
-            drof.seek(-4, 1)
-            dro_opl_type = read_char(drof)
-
-        dro_data = DRODataV1()
-        dro_data.fromfile(drof, dro_byte_length)
-        dro_data.generate_index_map()
-
-        # If we haven't reached the EOF we must have an error somewhere in the code.
-        m = drof.read(1)
-        if m != "":
-            raise DROFileException("Tried to read the specified number of bytes in the data stream, but there were some bytes left over!")
-
-        return DROSong(DRO_FILE_V1, file_name, dro_data, dro_ms_length, dro_opl_type)
-
-    def write_data(self, drof, dro_song):
-        """ Accepts a file name (string), and a DROSong object. Saves the DROSong
-        data to a file."""
-
-        header_start = drof.tell()
-
-        self.write_header(drof, 0, 0, 0) # write a dummy header
-
-        total_size = dro_song.data.raw_len()
-        total_delay = 0
-        # Would be nice to use the DROTotalDelayCalculator, but that
-        # introduces a circular import.
-        # (Why don't we use the value stored in the dro_song object? Seems
-        #  to be a discrepancy between how V1 and V2 files write this value)
-        for inst in dro_song.data:
-            if inst.inst_type == DROInstruction.T_DELAY:
-                total_delay += inst.value
-        dro_song.data.tofile(drof)
-
-        # rewind and rewrite the header
-        drof.seek(header_start)
-        self.write_header(drof, total_delay, total_size, dro_song.opl_type)
-
-        print("DRO file saved. total_delay: " + str(total_delay) + " total_size: " + str(total_size))
-
-    def write_header(self, in_f, length, size, opl_type):
-        write_int(in_f, length)
-        write_int(in_f, size)
-        if WRITE_CHAR_OPL: # I guess for backwards compatibility?
-            write_char(in_f, opl_type)
-        else:
-            write_int(in_f, opl_type)
-
-
-class DroFileIOv2(object):
-    def read_data(self, file_name, drof):
-        """
-        @type file_name: str
-        @type drof: File
-        """
-        (iLengthPairs, iLengthMS, iHardwareType, iFormat, iCompression, iShortDelayCode, iLongDelayCode,
-         iCodemapLength) = struct.unpack('<2L6B', drof.read(14))
-        codemap = struct.unpack(str(iCodemapLength) + 'B', drof.read(iCodemapLength))
-        if iFormat != 0:
-            raise DROFileException("Unsupported DRO v2 format. Only 0 is supported, found format ID %s" % iFormat)
-        if iCompression != 0:
-            raise DROFileException("Unsupported DRO v2 compression. Only 0 is supported, found compression ID %s" % iFormat)
-        if len(codemap) > 128:
-            raise DROFileException("DRO v2 file has too many entries in the codemap. Maximum 128, found %s. Is the file corrupt?" %
-                len(codemap))
-
-        dro_data = DRODataV2()
-        dro_data.fromfile(drof, iLengthPairs * 2)
-        dro_data.codemap = codemap
-        dro_data.short_delay_code = iShortDelayCode
-        dro_data.long_delay_code = iLongDelayCode
-        dro_data.delay_codes = (iShortDelayCode, iLongDelayCode) # meh
-
-        # NOTE: iHardwareType value is different compared to V1. Really should cater for it better by converting to another value.
-        return DROSongV2(DRO_FILE_V2, file_name, dro_data, iLengthMS, iHardwareType, codemap, iShortDelayCode, iLongDelayCode)
-
-    def write_data(self, drof, dro_song):
-        """
-        @type drof: File
-        @type dro_song: DROSongV2
-        """
-        # Write the header
-        drof.write(
-            struct.pack(
-                '<2L6B',
-                len(dro_song.data), # length in reg/val pairs
-                dro_song.ms_length, # length in MS
-                dro_song.opl_type, # hardware type
-                0, # format
-                0, # compression
-                dro_song.short_delay_code,
-                dro_song.long_delay_code,
-                len(dro_song.codemap) # length of codemap
-            )
-        )
-        # Write the codemap
-        drof.write(
-            struct.pack(
-                str(len(dro_song.codemap)) + 'B',
-                *dro_song.codemap
-            )
-        )
-        # Write the data
-        dro_song.data.tofile(drof)
-
-
-
-
-
+#!/usr/bin/python
+#
+#    Use, distribution, and modification of the DRO Trimmer binaries, source code,
+#    or documentation, is subject to the terms of the MIT license, as below.
+#
+#    Copyright (c) 2008 - 2014 Laurence Dougal Myers
+#
+#    Permission is hereby granted, free of charge, to any person obtaining a copy
+#    of this software and associated documentation files (the "Software"), to deal
+#    in the Software without restriction, including without limitation the rights
+#    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#    copies of the Software, and to permit persons to whom the Software is
+#    furnished to do so, subject to the following conditions:
+#
+#    The above copyright notice and this permission notice shall be included in
+#    all copies or substantial portions of the Software.
+#
+#    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+#    THE SOFTWARE.
+
+from __future__ import with_statement
+import array
+import cStringIO
+import ctypes
+import itertools
+import mmap
+import os
+import re
+import shutil
+import sys
+import tempfile
+import zlib
+from dro_data import DRO_FILE_V1, DRO_FILE_V2, DROSong, DROSongV2, DRODataV1, DRODataV2, DROInstruction
+from dro_util import *
+import regdata
+
+DRO_HEADER = "DBRAWOPL"
+DRO_VERSION_V1_OLD = (1, 0)
+DRO_VERSION_V1_NEW = (0, 1) # the DOSBox devs really screwed the versioning up, didn't they?
+DRO_VERSION_V2 = (2, 0)
+
+# This var is just for backwards compatability - it seems old versions of DRO
+#  files wrote the OPL type as a char, whereas newer versions write it as a 4-byte
+#  int. This program supports either, but it's hard coded.
+WRITE_CHAR_OPL = False
+
+# Values for the compression field of a DRO v2 header. Compression isn't part of the official
+#  format; files saved compressed can only be read by DRO Trimmer.
+DRO_COMPRESSION_NONE = 0
+DRO_COMPRESSION_ZLIB = 1 # data split into separately compressed blocks, see DROBlockTable
+
+# Bytes of instruction data in each block of a compressed file (must be even, so no pairs are split).
+DRO_COMPRESSED_BLOCK_SIZE = 0x10000
+DRO_COMPRESSION_LEVEL = 6
+
+# When recovering a damaged file, a run of instructions is only trusted once this many valid
+#  instructions have been found in a row (except at the very start or end of the data).
+RECOVERY_SYNC_LENGTH = 4
+
+# Delay codes used by transcode_v1_to_v2. The codemap never has more than 126 entries, so these
+#  are never used for a register, in either bank.
+TRANSCODE_SHORT_DELAY_CODE = 0x7E
+TRANSCODE_LONG_DELAY_CODE = 0x7F
+# V1 and V2 number the hardware types differently. (This maps both ways.)
+V1_TO_V2_HARDWARE_TYPES = [0, 2, 1] # V1 goes OPL-2, 3, Dual 2. V2 goes OPL-2, Dual 2, 3.
+# V2 hardware types used when a V1 song's type is unknown: OPL-2, or OPL-3 if the high bank is used.
+TRANSCODE_FALLBACK_HARDWARE_TYPES = (0, 2)
+
+# File extensions picked up by find_dro_files.
+DRO_EXTENSIONS = (".dro",)
+
+# Size of the buffer used when saving, so most songs are written in one go.
+WRITE_BUFFER_SIZE = 0x400000
+
+# Flags for MoveFileEx, used to replace a file when saving on Windows.
+MOVEFILE_REPLACE_EXISTING = 0x1
+MOVEFILE_WRITE_THROUGH = 0x8
+
+# Bytes of instruction data read at a time by DroStreamReader.
+DEFAULT_STREAM_CHUNK_SIZE = 0x10000
+
+def _byte_class(byte_values):
+    """ Returns a regex matching any one of the given byte values."""
+    byte_values = sorted(byte_values)
+    if not byte_values:
+        return "(?!)" # never matches
+    return "[%s]" % ("".join(re.escape(chr(value)) for value in byte_values),)
+
+def build_recovery_re(instruction_pattern):
+    """ Returns a regex matching a run of instructions that can be trusted (see
+    RECOVERY_SYNC_LENGTH), given a regex matching one valid instruction. Every attempt to
+    match fails within RECOVERY_SYNC_LENGTH instructions or succeeds, so scanning through
+    garbage takes linear time."""
+    return re.compile(r"(?:%(inst)s){%(sync)d,}|\A(?:%(inst)s)+|(?:%(inst)s)+\Z" %
+                      {"inst": instruction_pattern, "sync": RECOVERY_SYNC_LENGTH})
+
+# Register numbers (ignoring the bank) that exist on an OPL chip. Anything else in a
+#  register's place means the data's damaged, or we've lost track of where instructions start.
+#  (Every byte is the start of some V1 instruction, so without this, V1 recovery couldn't tell
+#  damaged data from real data at all. The catch is that real writes to other registers, which
+#  the chip ignores anyway, get skipped as damage.)
+_OPL_REGISTERS = set(register & 0xFF for register in regdata.registers)
+
+_V1_RECOVERY_RE = build_recovery_re(r"\x00[\x00-\xFF]|\x01[\x00-\xFF]{2}|[\x02\x03]|\x04%s[\x00-\xFF]|%s[\x00-\xFF]" %
+                                    (_byte_class(_OPL_REGISTERS),
+                                     _byte_class(register for register in _OPL_REGISTERS if register >= 0x05)))
+
+def recover_instructions(raw_data, recovery_re, data_offset, report):
+    """ Picks out the runs of valid instructions from some raw data (a string), skipping
+    anything between them, and records what was skipped in the given DRORecoveryReport.
+    "data_offset" is where the data starts in the file. Returns the recovered data, as an array('B')."""
+    data = array.array('B')
+    pos = 0
+    for match in recovery_re.finditer(raw_data):
+        start, end = match.span()
+        if start > pos:
+            report.skip(data_offset + pos, start - pos, "invalid instructions")
+        data.fromstring(buffer(raw_data, start, end - start))
+        pos = end
+    if pos < len(raw_data):
+        report.skip(data_offset + pos, len(raw_data) - pos, "invalid or incomplete instructions at the end of the data")
+    report.bytes_recovered += len(data)
+    return data
+
+def find_dro_files(dir_name):
+    """ Returns the names of all the DRO files in the given directory and its subdirectories,
+    in a consistent order."""
+    found = []
+    for dir_path, dir_names, file_names in os.walk(dir_name):
+        dir_names.sort()
+        for file_name in sorted(file_names):
+            if os.path.splitext(file_name)[1].lower() in DRO_EXTENSIONS:
+                found.append(os.path.join(dir_path, file_name))
+    return found
+
+def _copy_file_mode(file_name, temp_name):
+    """ Gives a temporary file the permissions of the file it's replacing, or the usual
+    permissions for a new file. (Temporary files are only readable by their owner.)"""
+    if os.path.exists(file_name):
+        shutil.copymode(file_name, temp_name)
+    else:
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(temp_name, 0666 & ~umask)
+
+def _replace_file(temp_name, file_name):
+    """ Renames a temporary file over the file it's replacing, atomically. On Windows, os.rename
+    won't replace an existing file, so MoveFileEx is used instead."""
+    if sys.platform != "win32":
+        os.rename(temp_name, file_name)
+        return
+    if isinstance(temp_name, str):
+        temp_name = temp_name.decode(sys.getfilesystemencoding())
+    if isinstance(file_name, str):
+        file_name = file_name.decode(sys.getfilesystemencoding())
+    if not ctypes.windll.kernel32.MoveFileExW(temp_name, file_name,
+                                              MOVEFILE_REPLACE_EXISTING | MOVEFILE_WRITE_THROUGH):
+        raise ctypes.WinError()
+
+def map_file_data(drof, length):
+    """ Maps the next "length" bytes of an open file into memory, copy-on-write, and
+    returns a view of them that can be indexed like an array('B'). Pages are only read
+    from disk when they're used, and changes are never written back to the file.
+    The mapping stays open as long as the view does, even after the file is closed.
+
+    Raises DROFileException if the file is too short."""
+    offset = drof.tell()
+    available = os.fstat(drof.fileno()).st_size - offset
+    if length > available:
+        raise DROFileException("The DRO file is too short. Expected %s bytes of data, found %s." %
+                               (length, available))
+    if length == 0:
+        return array.array('B') # can't map an empty range
+    mapping = mmap.mmap(drof.fileno(), 0, access=mmap.ACCESS_COPY)
+    view = (ctypes.c_ubyte * length).from_buffer(mapping, offset)
+    drof.seek(length, 1)
+    return view
+
+def read_file_data(drof, length):
+    """ Reads the next "length" bytes of a file-like object into a new array('B'). If the object
+    has a readinto method, the data is read straight into the array, rather than being read
+    into a string and copied.
+
+    Raises DROFileException if the object runs out of data."""
+    data = array.array('B')
+    if not hasattr(drof, "readinto"):
+        data.fromstring(drof.read(length))
+    elif length:
+        data = array.array('B', [0]) * length
+        # Arrays don't have the buffer interface readinto wants, but a ctypes view of one does.
+        view = memoryview((ctypes.c_ubyte * length).from_buffer(data))
+        filled = 0
+        while filled < length:
+            num_read = drof.readinto(view[filled:])
+            if not num_read:
+                break
+            filled += num_read
+        del data[filled:]
+    if len(data) < length:
+        raise DROFileException("The DRO file is too short. Expected %s bytes of data, found %s." %
+                               (length, len(data)))
+    return data
+
+def load_file_data(dro_data, drof, length, use_mmap=False):
+    """ Loads the next "length" bytes of an open file or file-like object into the given DROData,
+    either reading them in or memory-mapping them (see map_file_data). Only real files can be
+    memory-mapped."""
+    if use_mmap:
+        dro_data.set_data(map_file_data(drof, length))
+    elif isinstance(drof, file):
+        dro_data.fromfile(drof, length)
+    else:
+        dro_data.set_data(read_file_data(drof, length))
+
+class _BufferFile(object):
+    """ Lets the DRO readers read from an in-memory buffer, as if it were a file. Reading into
+    another buffer (with readinto) copies straight out of this one.
+    """
+    def __init__(self, data):
+        try:
+            self.view = memoryview(data)
+        except TypeError:
+            # Old-style buffers, like arrays and mmaps. If it's writable, a ctypes view of it has
+            #  the new buffer interface. Otherwise, there's no choice but to copy it.
+            data_buffer = buffer(data)
+            try:
+                self.view = memoryview((ctypes.c_ubyte * len(data_buffer)).from_buffer(data))
+            except TypeError:
+                self.view = memoryview(str(data_buffer))
+        self.pos = 0
+
+    def read(self, size=-1):
+        if size < 0:
+            size = len(self.view)
+        start = min(self.pos, len(self.view))
+        self.pos = min(start + size, len(self.view))
+        return self.view[start:self.pos].tobytes()
+
+    def readinto(self, target):
+        target_view = memoryview(target)
+        start = min(self.pos, len(self.view))
+        self.pos = min(start + len(target_view), len(self.view))
+        target_view[:self.pos - start] = self.view[start:self.pos]
+        return self.pos - start
+
+    def seek(self, offset, whence=0):
+        if whence == 1:
+            offset += self.pos
+        elif whence == 2:
+            offset += len(self.view)
+        self.pos = max(offset, 0)
+
+    def tell(self):
+        return self.pos
+
+def iter_file_data(drof, length, chunk_size):
+    """ Reads the next "length" bytes of an open file, yielding them "chunk_size" bytes at a time.
+
+    Raises DROFileException if the file is too short."""
+    remaining = length
+    while remaining > 0:
+        chunk = drof.read(min(chunk_size, remaining))
+        if not chunk:
+            raise DROFileException("The DRO file is too short. Expected %s bytes of data, found %s." %
+                                   (length, length - remaining))
+        remaining -= len(chunk)
+        yield chunk
+
+def transcode_v1_to_v2(dro_song):
+    """ Converts a V1 song straight to a new DROSongV2, without playing it back. Each register
+    used is given a code in the codemap the first time it's written to, bank switches are folded
+    into the high bit of each register's code, and runs of delays are merged and re-encoded as
+    long and short delays. The length of the new song is the sum of its delays.
+
+    If the song's hardware type isn't one DRO v1 defines (some real files have other values,
+    or a damaged header), the new song is marked OPL-3 if it uses the high bank, or OPL-2 if not.
+
+    Raises DROFileException if more than 126 different registers are used."""
+    T_REGISTER, T_DELAY = DROInstruction.T_REGISTER, DROInstruction.T_DELAY
+    codemap = []
+    codes = ([None] * 0x100, [None] * 0x100) # the V2 command byte for each register, in each bank
+    bank_codes = codes[0]
+    data = array.array('B')
+    delay = 0 # delays since the last register write
+    high_bank_used = False
+    with dro_song.data_lock.read_locked():
+        for batch in dro_song.data.iter_batches():
+            for inst_type, cmd, val in itertools.izip(batch[1], batch[2], batch[3]):
+                if inst_type == T_REGISTER:
+                    if delay:
+                        _append_v2_delay(data, delay)
+                        delay = 0
+                    code = bank_codes[cmd]
+                    if code is None:
+                        if len(codemap) >= TRANSCODE_SHORT_DELAY_CODE:
+                            raise DROFileException("Too many different registers to convert to DRO v2. Maximum %s, found at least %s." %
+                                                   (TRANSCODE_SHORT_DELAY_CODE, len(codemap) + 1))
+                        codes[0][cmd] = len(codemap)
+                        codes[1][cmd] = len(codemap) | 0x80
+                        codemap.append(cmd)
+                        code = bank_codes[cmd]
+                    data.append(code)
+                    data.append(val)
+                elif inst_type == T_DELAY:
+                    delay += val
+                else:
+                    bank_codes = codes[val]
+                    high_bank_used |= val == 1
+        if delay:
+            _append_v2_delay(data, delay)
+        ms_length = dro_song.data.delay_index.total()
+
+    dro_data = DRODataV2()
+    dro_data.set_data(data)
+    dro_data.codemap = codemap
+    dro_data.short_delay_code = TRANSCODE_SHORT_DELAY_CODE
+    dro_data.long_delay_code = TRANSCODE_LONG_DELAY_CODE
+    dro_data.delay_codes = (TRANSCODE_SHORT_DELAY_CODE, TRANSCODE_LONG_DELAY_CODE)
+    if 0 <= dro_song.opl_type < len(V1_TO_V2_HARDWARE_TYPES):
+        opl_type = V1_TO_V2_HARDWARE_TYPES[dro_song.opl_type]
+    else:
+        opl_type = TRANSCODE_FALLBACK_HARDWARE_TYPES[high_bank_used]
+    return DROSongV2(DRO_FILE_V2, dro_song.name, dro_data, ms_length, opl_type,
+                     codemap, TRANSCODE_SHORT_DELAY_CODE, TRANSCODE_LONG_DELAY_CODE)
+
+def _append_v2_delay(data, ms):
+    """ Appends a delay of any length to some V2 data, as long delays (multiples of 256 ms)
+    followed by a short delay for the rest."""
+    long_delays, short_delay = divmod(ms, 256)
+    while long_delays > 0:
+        delays_to_write = min(long_delays, 256)
+        data.append(TRANSCODE_LONG_DELAY_CODE)
+        data.append(delays_to_write - 1)
+        long_delays -= delays_to_write
+    if short_delay:
+        data.append(TRANSCODE_SHORT_DELAY_CODE)
+        data.append(short_delay - 1)
+
+class DROBlockTable(object):
+    """ Describes the data of a compressed DRO v2 file. The data is split into blocks of
+    "block_size" bytes (the last one may be shorter), and each block is compressed separately with
+    zlib, so any block can be read without reading the ones before it.
+
+    In the file, the codemap is followed by the block size and number of blocks, the compressed
+    size of each block (all 32-bit unsigned ints), then the compressed blocks.
+    """
+    def __init__(self, block_size, compressed_sizes, data_offset, byte_length):
+        self.block_size = block_size
+        self.byte_length = byte_length
+        self.compressed_sizes = compressed_sizes
+        self.offsets = [data_offset] # the file offset of each block, and the end of the last one
+        for size in compressed_sizes:
+            self.offsets.append(self.offsets[-1] + size)
+
+    @classmethod
+    def fromfile(cls, drof, byte_length):
+        """ Reads a block table from an open DRO file, positioned after the codemap.
+
+        Raises DROFileException if the table doesn't match the data length."""
+        table_header = drof.read(8)
+        if len(table_header) < 8:
+            raise DROFileException("Compressed DRO v2 file ends in the block table. Is the file corrupt?")
+        block_size, num_blocks = struct.unpack('<2L', table_header)
+        if block_size <= 0 or block_size % 2:
+            raise DROFileException("Invalid block size in compressed DRO v2 file: %s. Is the file corrupt?" % block_size)
+        if num_blocks != (byte_length + block_size - 1) // block_size:
+            raise DROFileException("Compressed DRO v2 file has the wrong number of blocks. Expected %s, found %s. Is the file corrupt?" %
+                                   ((byte_length + block_size - 1) // block_size, num_blocks))
+        table = drof.read(4 * num_blocks)
+        if len(table) < 4 * num_blocks:
+            raise DROFileException("Compressed DRO v2 file ends in the block table. Is the file corrupt?")
+        compressed_sizes = struct.unpack('<%dL' % num_blocks, table)
+        return cls(block_size, compressed_sizes, drof.tell(), byte_length)
+
+    @staticmethod
+    def write_data(drof, dro_data, block_size=DRO_COMPRESSED_BLOCK_SIZE):
+        """ Compresses the data of a DRODataV2 object a block at a time, and writes it to an open
+        file along with its block table. Only one block of the song is flattened out at a time,
+        but the compressed blocks are kept until the end, since the table comes first."""
+        instructions_per_block = block_size // 2
+        blocks = []
+        for first_index in xrange(0, len(dro_data), instructions_per_block):
+            raw_block = cStringIO.StringIO()
+            dro_data.tofile(raw_block, first_index, first_index + instructions_per_block)
+            blocks.append(zlib.compress(raw_block.getvalue(), DRO_COMPRESSION_LEVEL))
+        drof.write(struct.pack('<2L', block_size, len(blocks)))
+        drof.write(struct.pack('<%dL' % len(blocks), *[len(block) for block in blocks]))
+        for block in blocks:
+            drof.write(block)
+
+    def __len__(self):
+        return len(self.compressed_sizes)
+
+    def block_for_index(self, index):
+        """ Returns the number of the block holding the instruction at the given index."""
+        return index * 2 // self.block_size
+
+    def first_index(self, block_num):
+        """ Returns the index of the first instruction in the given block."""
+        return block_num * self.block_size // 2
+
+    def read_block(self, drof, block_num):
+        """ Reads and decompresses one block of data from the file, returning a string."""
+        drof.seek(self.offsets[block_num])
+        return self._decompress(block_num, drof.read(self.compressed_sizes[block_num]))
+
+    def iter_blocks(self, drof):
+        """ Reads and decompresses each block in turn, from the start of the data. The file
+        must be positioned at the start of the data, e.g. straight after reading the table."""
+        for block_num, size in enumerate(self.compressed_sizes):
+            yield self._decompress(block_num, drof.read(size))
+
+    def _decompress(self, block_num, compressed):
+        try:
+            block = zlib.decompress(compressed)
+        except zlib.error, e:
+            raise DROFileException("Could not decompress block %s of the DRO data: %s" % (block_num, e))
+        expected = min(self.block_size, self.byte_length - block_num * self.block_size)
+        if len(block) != expected:
+            raise DROFileException("Block %s of the DRO data is the wrong size. Expected %s bytes, found %s. Is the file corrupt?" %
+                                   (block_num, expected, len(block)))
+        return block
+
+class DRORecoveryReport(object):
+    """ Describes what DroFileIO.read_recover had to do to recover a damaged file. "problems" lists
+    anything wrong with the header, "skipped" holds (file offset, length, reason) for each
+    run of bytes that had to be thrown away, and "notes" holds anything else worth knowing
+    about how the file was recovered.
+    """
+    def __init__(self, file_name):
+        self.file_name = file_name
+        self.problems = []
+        self.skipped = []
+        self.notes = []
+        self.bytes_recovered = 0
+
+    def skip(self, offset, length, reason):
+        self.skipped.append((offset, length, reason))
+
+    def bytes_skipped(self):
+        return sum(length for offset, length, reason in self.skipped)
+
+    def is_clean(self):
+        """ Whether the file turned out to be undamaged."""
+        return not self.problems and not self.skipped
+
+    def __str__(self):
+        lines = ["Recovered %s bytes of instructions from %s, skipped %s bytes." %
+                 (self.bytes_recovered, self.file_name, self.bytes_skipped())]
+        lines.extend(self.problems)
+        for offset, length, reason in self.skipped:
+            lines.append("Skipped %s bytes at offset 0x%X: %s" % (length, offset, reason))
+        lines.extend(self.notes)
+        return "\n".join(lines)
+
+class DroFileInfo(object):
+    """ The header information of a DRO file, as read by DroFileIO.read_info, along with
+    the file's size and modification time. If the header couldn't be read, "error" holds the
+    reason, and the header fields are None.
+    """
+    __slots__ = ["name", "file_size", "mtime", "file_version", "ms_length", "opl_type", "byte_length", "error"]
+
+    def __init__(self, name, file_size, mtime, file_version=None, ms_length=None, opl_type=None,
+                 byte_length=None, error=None):
+        self.name = name
+        self.file_size = file_size
+        self.mtime = mtime
+        self.file_version = file_version
+        self.ms_length = ms_length
+        self.opl_type = opl_type
+        self.byte_length = byte_length
+        self.error = error
+
+    def get_opl_type_display(self):
+        # V1 and V2 number their OPL types differently.
+        opl_type_map = DROSongV2.OPL_TYPE_MAP if self.file_version == DRO_FILE_V2 else DROSong.OPL_TYPE_MAP
+        if self.opl_type is None or not 0 <= self.opl_type < len(opl_type_map):
+            return "(unknown)"
+        return opl_type_map[self.opl_type]
+
+    def __repr__(self):
+        return "DroFileInfo(%r, file_version=%r, ms_length=%r, opl_type=%r, error=%r)" % (
+            self.name, self.file_version, self.ms_length, self.opl_type, self.error)
+
+class DroStreamReader(object):
+    """ Reads the header of a DRO file, then decodes its instructions a chunk at a time as
+    they're read in, so a song can be processed without loading the whole thing into memory.
+    For example:
+
+        with DroStreamReader(file_name) as reader:
+            print reader.song.ms_length
+            for first_index, inst_types, commands, values, banks in reader.iter_chunks():
+                ...
+
+    "song" holds the header information, but no instructions. Each chunk is a tuple like the
+    ones DROData.iter_batches yields (and the same lists are refilled for every chunk).
+    """
+    def __init__(self, file_name, chunk_size=DEFAULT_STREAM_CHUNK_SIZE):
+        """ Raises DROFileException on invalid file data/version."""
+        self.chunk_size = chunk_size
+        self.drof = file(file_name, 'rb')
+        try:
+            self.reader = DroFileIO().get_reader(self.drof)
+            self.song, self.byte_length = self.reader.read_header(file_name, self.drof)
+        except:
+            self.drof.close()
+            raise
+
+    def close(self):
+        self.drof.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def iter_chunks(self):
+        """ Reads the instruction data "chunk_size" bytes at a time (or a block at a time, for a
+        compressed file), and yields the decoded instructions from each chunk. A V1 instruction
+        that's split between two chunks is decoded with the second chunk.
+
+        Raises DROFileException if the file is too short, or ends part way through an instruction."""
+        decoder = self.song.data
+        decoded = ([], [], [], [])
+        first_index = 0
+        pending = array.array('B') # the undecoded bytes, i.e. the new chunk and any split instruction
+        for chunk in self.reader.iter_data(self.drof, self.byte_length, self.chunk_size):
+            pending.fromstring(chunk)
+            for column in decoded:
+                del column[:]
+            del pending[:decoder.decode_raw(pending, *decoded)]
+            if decoded[0]:
+                yield (first_index,) + decoded
+                first_index += len(decoded[0])
+        if pending:
+            raise DROFileException("The DRO data ends part way through an instruction.")
+
+    def num_blocks(self):
+        """ The number of blocks that can be read with read_block, or 0 if the file isn't compressed."""
+        if self.reader.block_table is None:
+            return 0
+        return len(self.reader.block_table)
+
+    def read_block(self, block_num):
+        """ Decodes the instructions in one block of a compressed file, without reading the
+        blocks before it. Returns a tuple like the ones iter_chunks yields, but with new lists.
+        Use the song's block table to find which block holds a given instruction. (Don't call
+        this while iterating over iter_chunks.)
+
+        Raises DROFileException if the file isn't compressed."""
+        block_table = self.reader.block_table
+        if block_table is None:
+            raise DROFileException("Only compressed DRO files can be read a block at a time.")
+        data = array.array('B')
+        data.fromstring(block_table.read_block(self.drof, block_num))
+        decoded = ([], [], [], [])
+        self.song.data.decode_raw(data, *decoded)
+        return (block_table.first_index(block_num),) + decoded
+
+class DroFileIO(object):
+    def read(self, file_name, use_mmap=False):
+        """ Accepts a file name (string). Returns a DROSong object and whether it was auto-trimmed (boolean).
+        If use_mmap is True, the song data is memory-mapped instead of read in (see map_file_data),
+        so opening a large file is quick and only edits take up extra memory.
+
+        Raises DROFileException on invalid file data/version."""
+        with file(file_name, 'rb') as drof:
+            reader = self.get_reader(drof)
+            dro_song = reader.read_data(file_name, drof, use_mmap)
+        self._record_saved_file_state(file_name, dro_song)
+        return dro_song
+
+    def read_from(self, source, file_name=""):
+        """ Reads a DRO file that's already in memory, or that comes from somewhere other than a
+        named file. "source" can be a string, bytearray, memoryview, array, mmap or similar, or
+        any file-like object with a read method (and ideally readinto). The song is given the
+        name "file_name". Returns a DROSong object, just like read.
+
+        The data is only copied once, into the song. (Only a read-only buffer without the new
+        buffer interface, like a buffer object, has to be copied first.) A file-like object
+        must be able to seek, if it's a V1 file.
+
+        Raises DROFileException on invalid file data/version."""
+        # (Arrays and mmaps have read methods too, but aren't file-like enough.)
+        if isinstance(source, (array.array, mmap.mmap)) or not hasattr(source, "read"):
+            source = _BufferFile(source)
+        reader = self.get_reader(source)
+        return reader.read_data(file_name, source)
+
+    def convert_v1_to_v2(self, input_file_name, output_file_name, compression=DRO_COMPRESSION_NONE):
+        """ Reads a V1 file, and saves it as a V2 file (see transcode_v1_to_v2). Returns the new song.
+
+        Raises DROFileException if the input isn't a valid V1 file."""
+        dro_song = self.read(input_file_name, use_mmap=True)
+        if dro_song.file_version != DRO_FILE_V1:
+            raise DROFileException("Not a DRO v1 file: %s" % (input_file_name,))
+        v2_song = transcode_v1_to_v2(dro_song)
+        v2_song.name = output_file_name
+        v2_song.compression = compression
+        self.write(output_file_name, v2_song)
+        return v2_song
+
+    def read_recover(self, file_name):
+        """ Reads a damaged DRO file, recovering as many instructions as possible. Instructions
+        are checked as they're read, and anything that isn't valid (e.g. garbage written over the
+        data, or a truncated instruction) is skipped, then reading picks up again at the next run
+        of valid instructions. The data length in the header is ignored; everything after the
+        header is scanned. For a compressed file, any block that can't be decompressed is skipped.
+        In a V1 file, a write to a register that doesn't exist on an OPL chip counts as invalid.
+
+        Returns a DROSong object, and a DRORecoveryReport saying what was skipped.
+
+        Raises DROFileException if the header itself is invalid."""
+        report = DRORecoveryReport(file_name)
+        with file(file_name, 'rb') as drof:
+            try:
+                reader = self.get_reader(drof)
+                dro_song, byte_length = reader.read_header(file_name, drof)
+            except struct.error:
+                raise DROFileException("The DRO file is too short to hold a complete header.")
+            reader.recover_data(dro_song, drof, byte_length, report)
+        return dro_song, report
+
+    def read_info(self, file_name):
+        """ Reads just the header of a DRO file, without loading any of its instructions.
+        Returns a DroFileInfo object.
+
+        Raises DROFileException on invalid file data/version."""
+        with file(file_name, 'rb') as drof:
+            file_stat = os.fstat(drof.fileno())
+            try:
+                reader = self.get_reader(drof)
+                dro_song, byte_length = reader.read_header(file_name, drof)
+            except struct.error:
+                raise DROFileException("The DRO file is too short to hold a complete header.")
+            return DroFileInfo(file_name, file_stat.st_size, file_stat.st_mtime, dro_song.file_version,
+                               dro_song.ms_length, dro_song.opl_type, byte_length)
+
+    def get_reader(self, drof):
+        """ Reads the file signature and version from an open DRO file. Returns the object
+        that can read the rest of the file, a DroFileIOv1 or DroFileIOv2.
+
+        Raises DROFileException on invalid file data/version."""
+        header_name = drof.read(8)
+        if header_name != DRO_HEADER:
+            raise DROFileException("Does not appear to be a DRO file (invalid header. Expected %s, found %s)." %
+                                   (DRO_HEADER, header_name))
+
+        header_version = struct.unpack('<2H', drof.read(4))
+        if header_version in (DRO_VERSION_V1_OLD, DRO_VERSION_V1_NEW):
+            return DroFileIOv1()
+        elif header_version == DRO_VERSION_V2:
+            return DroFileIOv2()
+        else:
+            raise DROFileException("Unsupported version of the DRO file format. Supported: v1 or v2. Found: %s" %
+                                   (header_version,))
+
+    def write(self, file_name, dro_song):
+        """ Saves the song to the given file name. The file is written in one go to a temporary
+        file in the same directory, which then replaces the original, so if saving fails part way
+        through, the original file is left as it was."""
+        if dro_song.file_version == DRO_FILE_V1:
+            writer = DroFileIOv1()
+            header_version = DRO_VERSION_V1_NEW
+        elif dro_song.file_version == DRO_FILE_V2:
+            writer = DroFileIOv2()
+            header_version = DRO_VERSION_V2
+        else:
+            # Should never get here.
+            raise DROFileException("Tried to save an unsupported version of the DRO file format. Support v1 or v2, found: %s" %
+                                   (dro_song.file_version,))
+        # We may be saving over the mapped file, so stop using it first. Some platforms won't
+        #  replace a file that's mapped.
+        with dro_song.data_lock.write_locked():
+            dro_song.data.unmap()
+
+        file_name = os.path.abspath(file_name)
+        handle, temp_name = tempfile.mkstemp(prefix=os.path.basename(file_name) + ".", suffix=".tmp",
+                                             dir=os.path.dirname(file_name))
+        try:
+            with os.fdopen(handle, 'wb', WRITE_BUFFER_SIZE) as drof:
+                drof.write(DRO_HEADER)
+                drof.write(struct.pack('<2H', *header_version))
+                writer.write_data(drof, dro_song)
+                drof.flush()
+                os.fsync(drof.fileno())
+            _copy_file_mode(file_name, temp_name)
+            _replace_file(temp_name, file_name)
+        except:
+            if os.path.exists(temp_name):
+                os.remove(temp_name)
+            raise
+        dro_song.data.mark_saved()
+        self._record_saved_file_state(file_name, dro_song)
+
+    def write_incremental(self, file_name, dro_song):
+        """ Saves a DRO v2 song by only writing what's changed since it was loaded from, or last
+        saved to, the same file: the header, and each range of changed instructions. If the song
+        got shorter, the file is truncated. For a large file with a few edits (especially near
+        the end), this is much quicker than write. Unlike write, if saving fails part way
+        through, the file is left corrupt.
+
+        Falls back to write for V1 or compressed songs, or if the file isn't the one the song
+        was loaded from or saved to, or has changed since. Returns whether the save was incremental."""
+        file_name = os.path.abspath(file_name)
+        if (dro_song.file_version != DRO_FILE_V2 or dro_song.compression != DRO_COMPRESSION_NONE or
+                dro_song.saved_file_state is None or not os.path.isfile(file_name)):
+            self.write(file_name, dro_song)
+            return False
+        writer = DroFileIOv2()
+        file_stat = os.stat(file_name)
+        header_length = writer.header_length(dro_song)
+        if dro_song.saved_file_state != (file_name, file_stat.st_size, file_stat.st_mtime, header_length):
+            self.write(file_name, dro_song)
+            return False
+
+        # Any instructions still being read from the file could end up somewhere we're about
+        #  to overwrite, or past the end of the truncated file.
+        with dro_song.data_lock.write_locked():
+            dro_song.data.unmap()
+        with file(file_name, 'r+b') as drof:
+            drof.seek(len(DRO_HEADER) + 4) # the version doesn't change
+            writer.write_header(drof, dro_song)
+            for start, stop in dro_song.data.changed_ranges():
+                drof.seek(header_length + start * 2)
+                dro_song.data.tofile(drof, start, stop)
+            drof.truncate(header_length + dro_song.data.raw_len())
+            drof.flush()
+            os.fsync(drof.fileno())
+        dro_song.data.mark_saved()
+        self._record_saved_file_state(file_name, dro_song)
+        return True
+
+    def _record_saved_file_state(self, file_name, dro_song):
+        """ Remembers the state of the file the song was loaded from or saved to, so
+        write_incremental can tell if it's safe to use."""
+        if dro_song.file_version == DRO_FILE_V2 and dro_song.compression == DRO_COMPRESSION_NONE:
+            file_stat = os.stat(file_name)
+            dro_song.saved_file_state = (os.path.abspath(file_name), file_stat.st_size, file_stat.st_mtime,
+                                         DroFileIOv2().header_length(dro_song))
+        else:
+            dro_song.saved_file_state = None
+
+class DroFileIOv1(object):
+    def __init__(self):
+        self.block_table = None # V1 files are never compressed
+
+    def read_header(self, file_name, drof):
+        """ Accepts an open DRO file, positioned after the version. Returns a DROSong object with
+        no instructions, and the number of bytes of instruction data that follow the header.
+
+        Raises DROFileException on invalid file data/version."""
+        # Code interpreted from the adplug source code.
+        dro_byte_length = 0
+        dro_ms_length = 0
+        dro_opl_type = 0
+
+        # Actually load some data
+        dro_ms_length = read_int(drof) # Total milliseconds in file (not used)
+        dro_byte_length = read_int(drof) # Total data bytes in file (not used)
+
+        # Looking at the samurai.dro file in the adplug testing dir, it uses a char for
+        #  the OPL type, but my rips use words.
+        #  Looks like there's two different file formats, with the same version number.
+        dro_opl_type = read_int(drof) # Type of opl data this can contain
+
+        # To avoid the char/word problem, we'll just assume if the word we read in is
+        #  too large (say, more than 0xFF), we probably meant to read a char, so go back
+        #  and try again. Obviously this will cause problems if for some reason the DOSBox
+        #  guys want to use an opl_type of e.g. 1893647, but I think that's unlikely.
+        if dro_opl_type > 0xFF:
+            drof.seek(-4, 1)
+            dro_opl_type = read_char(drof)
+
+        return DROSong(DRO_FILE_V1, file_name, DRODataV1(), dro_ms_length, dro_opl_type), dro_byte_length
+
+    def read_data(self, file_name, drof, use_mmap=False):
+        """ Accepts an open DRO file. Returns a DROSong object and whether it was auto-trimmed (boolean).
+
+        Raises DROFileException on invalid file data/version."""
+        dro_song, dro_byte_length = self.read_header(file_name, drof)
+        self.load_data(dro_song, drof, dro_byte_length, use_mmap)
+
+        # If we haven't reached the EOF we must have an error somewhere in the code.
+        m = drof.read(1)
+        if m != "":
+            raise DROFileException("Tried to read the specified number of bytes in the data stream, but there were some bytes left over!")
+
+        return dro_song
+
+    def load_data(self, dro_song, drof, byte_length, use_mmap=False):
+        """ Loads the instruction data following the header into the song (see read_header)."""
+        load_file_data(dro_song.data, drof, byte_length, use_mmap)
+
+    def iter_data(self, drof, byte_length, chunk_size):
+        """ Reads the instruction data following the header a chunk at a time (see read_header)."""
+        return iter_file_data(drof, byte_length, chunk_size)
+
+    def recover_data(self, dro_song, drof, byte_length, report):
+        """ Loads whatever valid instructions can be found after the header into the song,
+        recording what was skipped in the DRORecoveryReport (see DroFileIO.read_recover)."""
+        data_offset = drof.tell()
+        raw_data = drof.read()
+        if len(raw_data) != byte_length:
+            report.problems.append("The header says there are %s bytes of data, but the file has %s." %
+                                   (byte_length, len(raw_data)))
+        dro_song.data.set_data(recover_instructions(raw_data, _V1_RECOVERY_RE, data_offset, report))
+        if report.skipped:
+            report.notes.append("Note: only writes to registers that exist on an OPL chip are treated as valid. "
+                                "Any writes to other registers were skipped, along with the data around them.")
+
+    def write_data(self, drof, dro_song):
+        """ Accepts an open file, and a DROSong object. Saves the DROSong
+        data to the file, without seeking."""
+        # Both totals are kept up to date as the song is edited, so there's no need to
+        #  write the data first and come back to fill in the header.
+        total_size = dro_song.data.raw_len()
+        # (Why don't we use the value stored in the dro_song object? Seems
+        #  to be a discrepancy between how V1 and V2 files write this value)
+        total_delay = dro_song.data.delay_index.total()
+        self.write_header(drof, total_delay, total_size, dro_song.opl_type)
+        dro_song.data.tofile(drof)
+
+        print("DRO file saved. total_delay: " + str(total_delay) + " total_size: " + str(total_size))
+
+    def write_header(self, in_f, length, size, opl_type):
+        write_int(in_f, length)
+        write_int(in_f, size)
+        if WRITE_CHAR_OPL: # I guess for backwards compatibility?
+            write_char(in_f, opl_type)
+        else:
+            write_int(in_f, opl_type)
+
+
+class DroFileIOv2(object):
+    def __init__(self):
+        self.block_table = None # only for compressed files
+
+    def read_header(self, file_name, drof):
+        """ Accepts an open DRO file, positioned after the version. Returns a DROSongV2 object with
+        no instructions, and the number of bytes of instruction data that follow the header.
+
+        Raises DROFileException on invalid file data/version.
+        @type file_name: str
+        @type drof: File
+        """
+        (iLengthPairs, iLengthMS, iHardwareType, iFormat, iCompression, iShortDelayCode, iLongDelayCode,
+         iCodemapLength) = struct.unpack('<2L6B', drof.read(14))
+        codemap = struct.unpack(str(iCodemapLength) + 'B', drof.read(iCodemapLength))
+        if iFormat != 0:
+            raise DROFileException("Unsupported DRO v2 format. Only 0 is supported, found format ID %s" % iFormat)
+        if iCompression not in (DRO_COMPRESSION_NONE, DRO_COMPRESSION_ZLIB):
+            raise DROFileException("Unsupported DRO v2 compression. Only 0 or 1 are supported, found compression ID %s" % iCompression)
+        if len(codemap) > 128:
+            raise DROFileException("DRO v2 file has too many entries in the codemap. Maximum 128, found %s. Is the file corrupt?" %
+                len(codemap))
+        if iCompression == DRO_COMPRESSION_ZLIB:
+            self.block_table = DROBlockTable.fromfile(drof, iLengthPairs * 2)
+
+        dro_data = DRODataV2()
+        dro_data.codemap = codemap
+        dro_data.short_delay_code = iShortDelayCode
+        dro_data.long_delay_code = iLongDelayCode
+        dro_data.delay_codes = (iShortDelayCode, iLongDelayCode) # meh
+
+        # NOTE: iHardwareType value is different compared to V1. Really should cater for it better by converting to another value.
+        dro_song = DROSongV2(DRO_FILE_V2, file_name, dro_data, iLengthMS, iHardwareType, codemap, iShortDelayCode, iLongDelayCode)
+        dro_song.compression = iCompression
+        return dro_song, iLengthPairs * 2
+
+    def read_data(self, file_name, drof, use_mmap=False):
+        """
+        @type file_name: str
+        @type drof: File
+        @type use_mmap: bool
+        """
+        dro_song, byte_length = self.read_header(file_name, drof)
+        self.load_data(dro_song, drof, byte_length, use_mmap)
+        return dro_song
+
+    def load_data(self, dro_song, drof, byte_length, use_mmap=False):
+        """ Loads the instruction data following the header into the song (see read_header).
+        Compressed data is always decompressed into memory, so use_mmap has no effect."""
+        if self.block_table is None:
+            load_file_data(dro_song.data, drof, byte_length, use_mmap)
+            return
+        data = array.array('B')
+        for block in self.block_table.iter_blocks(drof):
+            data.fromstring(block)
+        dro_song.data.set_data(data)
+
+    def iter_data(self, drof, byte_length, chunk_size):
+        """ Reads the instruction data following the header a chunk at a time (see read_header).
+        Compressed data is read a block at a time, whatever the chunk size."""
+        if self.block_table is None:
+            return iter_file_data(drof, byte_length, chunk_size)
+        return self.block_table.iter_blocks(drof)
+
+    def recover_data(self, dro_song, drof, byte_length, report):
+        """ Loads whatever valid instructions can be found after the header into the song,
+        recording what was skipped in the DRORecoveryReport (see DroFileIO.read_recover)."""
+        if self.block_table is not None:
+            # Each block is checked when it's decompressed, so just leave out the bad ones.
+            data = array.array('B')
+            for block_num in xrange(len(self.block_table)):
+                try:
+                    data.fromstring(self.block_table.read_block(drof, block_num))
+                except DROFileException, e:
+                    report.skip(self.block_table.offsets[block_num], self.block_table.compressed_sizes[block_num], str(e))
+            report.bytes_recovered += len(data)
+            dro_song.data.set_data(data)
+            return
+        data_offset = drof.tell()
+        raw_data = drof.read()
+        if len(raw_data) != byte_length:
+            report.problems.append("The header says there are %s bytes of data, but the file has %s." %
+                                   (byte_length, len(raw_data)))
+        recovery_re = build_recovery_re(r"%s[\x00-\xFF]" % (_byte_class(dro_song.data.valid_command_bytes()),))
+        dro_song.data.set_data(recover_instructions(raw_data, recovery_re, data_offset, report))
+
+    def header_length(self, dro_song):
+        """ Returns the size of the whole file header, including the signature and version."""
+        return len(DRO_HEADER) + 4 + 14 + len(dro_song.codemap)
+
+    def write_data(self, drof, dro_song):
+        """
+        @type drof: File
+        @type dro_song: DROSongV2
+        """
+        self.write_header(drof, dro_song)
+        # Write the data
+        if dro_song.compression == DRO_COMPRESSION_ZLIB:
+            DROBlockTable.write_data(drof, dro_song.data)
+        else:
+            dro_song.data.tofile(drof)
+
+    def write_header(self, drof, dro_song):
+        """ Writes the V2 header (everything after the version), and the codemap.
+        @type drof: File
+        @type dro_song: DROSongV2
+        """
+        # Write the header
+        drof.write(
+            struct.pack(
+                '<2L6B',
+                len(dro_song.data), # length in reg/val pairs
+                dro_song.ms_length, # length in MS
+                dro_song.opl_type, # hardware type
+                0, # format
+                dro_song.compression,
+                dro_song.short_delay_code,
+                dro_song.long_delay_code,
+                len(dro_song.codemap) # length of codemap
+            )
+        )
+        # Write the codemap
+        drof.write(
+            struct.pack(
+                str(len(dro_song.codemap)) + 'B',
+                *dro_song.codemap
+            )
+        )
+
+
+
+
+
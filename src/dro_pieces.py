@@ -0,0 +1,364 @@
+#!/usr/bin/python
+#
+#    Use, distribution, and modification of the DRO Trimmer binaries, source code,
+#    or documentation, is subject to the terms of the MIT license, as below.
+#
+#    Copyright (c) 2008 - 2014 Laurence Dougal Myers
+#
+#    Permission is hereby granted, free of charge, to any person obtaining a copy
+#    of this software and associated documentation files (the "Software"), to deal
+#    in the Software without restriction, including without limitation the rights
+#    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#    copies of the Software, and to permit persons to whom the Software is
+#    furnished to do so, subject to the following conditions:
+#
+#    The above copyright notice and this permission notice shall be included in
+#    all copies or substantial portions of the Software.
+#
+#    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+#    THE SOFTWARE.
+
+"""
+A piece table, used to edit instruction data without moving the data itself around.
+
+The instructions are kept in "sources", which are never modified, except for being appended
+to. The song is described by a list of pieces, each one a run of consecutive instructions
+from a source. Deleting instructions just trims or splits pieces, and inserting instructions
+appends them to a source and adds a new piece. So the cost of an edit depends on the number
+of pieces, rather than the size of the song.
+
+Since a source is never changed in place, its data can be anything that can be indexed like
+an array of bytes, such as a memory-mapped file.
+"""
+import array
+import bisect
+
+
+class _DROPieceSourceBase(object):
+    """ A buffer of raw instruction data. Each instruction in the buffer is numbered by its
+    "slot". Subclasses work out where each slot is in the buffer.
+    """
+    def __len__(self):
+        raise NotImplementedError()
+
+    def offset(self, slot):
+        """ Returns the offset in the data of the instruction in the given slot."""
+        raise NotImplementedError()
+
+    def offsets(self, slot_start, slot_stop):
+        """ Returns the offsets of the instructions in a range of slots."""
+        raise NotImplementedError()
+
+    def slot_end(self, slot):
+        """ Returns the offset just past the end of the instruction in the given slot."""
+        raise NotImplementedError()
+
+    def extend(self, value_array):
+        """ Appends raw instruction data. Returns the first and last (exclusive) slots of the
+        new instructions."""
+        raise NotImplementedError()
+
+    def buffer(self, slot_start, slot_stop):
+        """ Returns a read-only buffer of the raw data for a range of slots, without copying it."""
+        start = self.offset(slot_start)
+        return buffer(self.data, start, self.slot_end(slot_stop - 1) - start)
+
+    def raw(self, slot_start, slot_stop):
+        """ Returns a copy of the raw data for a range of slots, as an array."""
+        value_array = array.array('B')
+        value_array.fromstring(self.buffer(slot_start, slot_stop))
+        return value_array
+
+
+class DROPieceSource(_DROPieceSourceBase):
+    """ A source for instructions that vary in size. "indexer" is a function that scans raw
+    data, and returns an index map of where each instruction starts. The index map must support
+    len(), indexing by slot, offsets(slot_start, slot_stop) and extend(other_map, base), like
+    dro_data.DROV1IndexMap.
+    """
+    __slots__ = ["data", "index_map", "indexer"]
+
+    def __init__(self, data, indexer):
+        self.data = data
+        self.index_map = indexer(data)
+        self.indexer = indexer
+
+    def __len__(self):
+        return len(self.index_map)
+
+    def offset(self, slot):
+        return self.index_map[slot]
+
+    def offsets(self, slot_start, slot_stop):
+        return self.index_map.offsets(slot_start, slot_stop)
+
+    def slot_end(self, slot):
+        if slot + 1 < len(self.index_map):
+            return self.index_map[slot + 1]
+        return len(self.data)
+
+    def extend(self, value_array):
+        first_slot = len(self.index_map)
+        base = len(self.data)
+        self.index_map.extend(self.indexer(value_array), base)
+        self.data.extend(value_array)
+        return first_slot, len(self.index_map)
+
+
+class DROFixedWidthPieceSource(_DROPieceSourceBase):
+    """ A source for instructions that are all the same size, so we don't need to keep
+    track of where each one starts.
+    """
+    __slots__ = ["data", "width"]
+
+    def __init__(self, data, width):
+        self.data = data
+        self.width = width
+
+    def __len__(self):
+        return len(self.data) // self.width
+
+    def offset(self, slot):
+        return slot * self.width
+
+    def offsets(self, slot_start, slot_stop):
+        return xrange(slot_start * self.width, slot_stop * self.width, self.width)
+
+    def slot_end(self, slot):
+        return (slot + 1) * self.width
+
+    def extend(self, value_array):
+        first_slot = len(self)
+        self.data.extend(value_array)
+        return first_slot, len(self)
+
+
+class _Piece(object):
+    __slots__ = ["source", "start", "stop"]
+
+    def __init__(self, source, start, stop):
+        self.source = source
+        self.start = start # first slot in the source
+        self.stop = stop # last slot in the source, exclusive
+
+    def __repr__(self):
+        return "_Piece(%s, %s, %s)" % (id(self.source), self.start, self.stop)
+
+
+class DROPieceTable(object):
+    def __init__(self):
+        self.pieces = []
+        self.byte_length = 0
+        self.ends = [] # number of instructions up to the end of each piece
+
+    def reset(self, source):
+        """ Starts over, with a single piece covering all of the given source."""
+        if len(source):
+            self.pieces = [_Piece(source, 0, len(source))]
+        else:
+            self.pieces = []
+        self._update()
+
+    def _update(self):
+        """ Recalculates the piece ends and total byte length. Called after every edit."""
+        self.ends = []
+        self.byte_length = 0
+        total = 0
+        for piece in self.pieces:
+            total += piece.stop - piece.start
+            self.ends.append(total)
+            self.byte_length += piece.source.slot_end(piece.stop - 1) - piece.source.offset(piece.start)
+
+    def __len__(self):
+        if not self.ends:
+            return 0
+        return self.ends[-1]
+
+    def find(self, index):
+        """ Returns the position in the piece list of the piece holding the given index, and the index of
+        the first instruction in that piece."""
+        piece_i = bisect.bisect_right(self.ends, index)
+        if index < 0 or piece_i >= len(self.pieces):
+            raise IndexError("Instruction index out of range: %s" % (index,))
+        if piece_i == 0:
+            return piece_i, 0
+        return piece_i, self.ends[piece_i - 1]
+
+    def locate(self, index):
+        """ Returns the source and slot of the instruction at the given index."""
+        if index < 0:
+            index += len(self)
+        piece_i, first = self.find(index)
+        piece = self.pieces[piece_i]
+        return piece.source, piece.start + index - first
+
+    def iter_spans(self, start=0, stop=None):
+        """ Yields (source, first slot, last slot (exclusive)) for each run of instructions
+        between the start and stop indexes."""
+        if stop is None or stop > len(self):
+            stop = len(self)
+        if start >= stop:
+            return
+        piece_i, first = self.find(start)
+        while first < stop:
+            piece = self.pieces[piece_i]
+            slot_start = piece.start + max(start - first, 0)
+            slot_stop = piece.start + min(stop - first, piece.stop - piece.start)
+            yield piece.source, slot_start, slot_stop
+            first = self.ends[piece_i]
+            piece_i += 1
+
+    def snapshot(self):
+        """ Returns a copy of the current layout of the pieces, to compare against later
+        with changed_ranges."""
+        return [(piece.source, piece.start, piece.stop) for piece in self.pieces]
+
+    def changed_ranges(self, snapshot):
+        """ Compares the pieces against an earlier snapshot. Returns a list of (start, stop) index
+        ranges, in order, covering every index that doesn't hold the same source slot as it did
+        in the snapshot. (The instructions might still be the same, e.g. if they were deleted
+        and put back, but there's no cheap way to tell.)"""
+        ranges = []
+        old_i = 0
+        old_first = 0 # index of the snapshot piece at old_i
+        first = 0
+        for piece in self.pieces:
+            last = first + piece.stop - piece.start
+            index = first
+            while index < last:
+                # Find the snapshot piece that held this index.
+                while old_i < len(snapshot) and old_first + snapshot[old_i][2] - snapshot[old_i][1] <= index:
+                    old_first += snapshot[old_i][2] - snapshot[old_i][1]
+                    old_i += 1
+                if old_i < len(snapshot):
+                    old_source, old_start, old_stop = snapshot[old_i]
+                    run_stop = min(last, old_first + old_stop - old_start)
+                    unchanged = old_source is piece.source and old_start - old_first == piece.start - first
+                else:
+                    run_stop = last # past the end of the snapshot
+                    unchanged = False
+                if not unchanged:
+                    if ranges and ranges[-1][1] == index:
+                        ranges[-1][1] = run_stop
+                    else:
+                        ranges.append([index, run_stop])
+                index = run_stop
+            first = last
+        return [tuple(r) for r in ranges]
+
+    def delete(self, start, stop):
+        """ Removes the instructions from start up to (not including) stop."""
+        stop = min(stop, len(self))
+        if start >= stop:
+            return
+        first_i, first_start = self.find(start)
+        last_i, last_start = self.find(stop - 1)
+        replacement = []
+        # Keep whatever's left either side of the deleted instructions.
+        first_piece = self.pieces[first_i]
+        if start > first_start:
+            replacement.append(_Piece(first_piece.source, first_piece.start, first_piece.start + start - first_start))
+        last_piece = self.pieces[last_i]
+        after_slot = last_piece.start + stop - last_start
+        if after_slot < last_piece.stop:
+            replacement.append(_Piece(last_piece.source, after_slot, last_piece.stop))
+        self.pieces[first_i:last_i + 1] = replacement
+        self._update()
+
+    def insert(self, index, source, slot_start, slot_stop):
+        """ Inserts the instructions in the given source slots, so the first one ends up at the given index."""
+        if slot_start >= slot_stop:
+            return
+        if index >= len(self):
+            piece_i = len(self.pieces)
+        else:
+            piece_i, first = self.find(index)
+            if index > first:
+                # Split the piece in two, and insert in between.
+                piece = self.pieces[piece_i]
+                split_slot = piece.start + index - first
+                self.pieces[piece_i:piece_i + 1] = [_Piece(piece.source, piece.start, split_slot),
+                                                    _Piece(piece.source, split_slot, piece.stop)]
+                piece_i += 1
+        previous = self.pieces[piece_i - 1] if piece_i > 0 else None
+        if previous is not None and previous.source is source and previous.stop == slot_start:
+            # Directly follows on from the previous piece (e.g. restoring consecutive instructions), so just grow it.
+            previous.stop = slot_stop
+        else:
+            self.pieces.insert(piece_i, _Piece(source, slot_start, slot_stop))
+        self._update()
+
+    def _append_piece(self, new_pieces, source, slot_start, slot_stop):
+        """ Adds a piece to the end of a new piece list, merging it into the last piece if it
+        directly follows on from it."""
+        if slot_start >= slot_stop:
+            return
+        if new_pieces and new_pieces[-1].source is source and new_pieces[-1].stop == slot_start:
+            new_pieces[-1].stop = slot_stop
+        else:
+            new_pieces.append(_Piece(source, slot_start, slot_stop))
+
+    def delete_ranges(self, ranges):
+        """ Removes several runs of instructions at once. "ranges" is a list of (start, stop) index
+        pairs, in order and not overlapping. Takes a single pass over the pieces and ranges, rather
+        than one pass per range."""
+        new_pieces = []
+        range_i = 0
+        first = 0
+        for piece in self.pieces:
+            last = first + piece.stop - piece.start
+            kept_up_to = first # everything in the piece before this index has been dealt with
+            while range_i < len(ranges) and ranges[range_i][0] < last:
+                start, stop = ranges[range_i]
+                if start > kept_up_to:
+                    self._append_piece(new_pieces, piece.source,
+                                       piece.start + kept_up_to - first, piece.start + start - first)
+                kept_up_to = max(kept_up_to, min(stop, last))
+                if stop > last:
+                    break # carries on into the next piece
+                range_i += 1
+            self._append_piece(new_pieces, piece.source, piece.start + kept_up_to - first, piece.stop)
+            first = last
+        self.pieces = new_pieces
+        self._update()
+
+    def insert_runs(self, runs):
+        """ Inserts several runs of instructions at once. "runs" is a list of (index, source, first slot,
+        last slot (exclusive)), in order of index. Each index is where the run ends up once all the
+        runs are in, so this exactly undoes delete_ranges. Takes a single pass, like delete_ranges."""
+        new_pieces = []
+        piece_i = 0
+        first = 0 # index of the current piece, before any insertions
+        done = 0 # how much of the current piece has been copied over
+        inserted = 0
+        for index, source, slot_start, slot_stop in runs:
+            target = index - inserted # where it goes, before any insertions
+            # Copy over everything before the target.
+            while piece_i < len(self.pieces):
+                piece = self.pieces[piece_i]
+                length = piece.stop - piece.start
+                if first + length > target:
+                    break
+                self._append_piece(new_pieces, piece.source, piece.start + done, piece.stop)
+                first += length
+                done = 0
+                piece_i += 1
+            if piece_i < len(self.pieces) and target > first + done:
+                piece = self.pieces[piece_i]
+                self._append_piece(new_pieces, piece.source, piece.start + done, piece.start + target - first)
+                done = target - first
+            self._append_piece(new_pieces, source, slot_start, slot_stop)
+            inserted += slot_stop - slot_start
+        # Then everything after the last run.
+        while piece_i < len(self.pieces):
+            piece = self.pieces[piece_i]
+            self._append_piece(new_pieces, piece.source, piece.start + done, piece.stop)
+            done = 0
+            piece_i += 1
+        self.pieces = new_pieces
+        self._update()
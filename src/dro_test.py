@@ -0,0 +1,1146 @@
+#!/usr/bin/python
+#
+#    Use, distribution, and modification of the DRO Trimmer binaries, source code,
+#    or documentation, is subject to the terms of the MIT license, as below.
+#
+#    Copyright (c) 2008 - 2014 Laurence Dougal Myers
+#
+#    Permission is hereby granted, free of charge, to any person obtaining a copy
+#    of this software and associated documentation files (the "Software"), to deal
+#    in the Software without restriction, including without limitation the rights
+#    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#    copies of the Software, and to permit persons to whom the Software is
+#    furnished to do so, subject to the following conditions:
+#
+#    The above copyright notice and this permission notice shall be included in
+#    all copies or substantial portions of the Software.
+#
+#    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+#    THE SOFTWARE.
+""" Regression tests for the song data handling, file I/O and analysis. Most of them check
+an optimised code path against a simple, obviously correct version of the same thing.
+
+Run from the src directory with "python -m unittest dro_test". Songs are generated at random
+(from a fixed seed), rather than read from files.
+"""
+import array
+import bisect
+import os
+import random
+import shutil
+import StringIO
+import struct
+import tempfile
+import threading
+import time
+import unittest
+import dro2to1
+import dro_analysis
+import dro_data
+import dro_event
+import dro_globals
+import dro_io
+import dro_tasks
+import dro_undo
+import dro_util
+import dro_validate
+import regdata
+
+# Registers (ignoring the bank) that the generated songs write to.
+REGISTERS = sorted(set(register & 0xFF for register in regdata.registers if register & 0xFF >= 0x20))
+# The codemap and delay codes of generated V2 files.
+V2_CODEMAP = REGISTERS[:100]
+V2_SHORT_DELAY_CODE = 0x7E
+V2_LONG_DELAY_CODE = 0x7F
+
+
+def random_v1_instructions(num_instructions, rand, registers=REGISTERS):
+    """ Returns a list of the raw bytes of random DRO v1 instructions (delays, bank switches
+    and register writes), as strings."""
+    result = []
+    for _ in xrange(num_instructions):
+        r = rand.random()
+        if r < 0.15:
+            result.append(struct.pack('<2B', 0x00, rand.randrange(0x100)))
+        elif r < 0.17:
+            result.append(struct.pack('<BH', 0x01, rand.randrange(0x10000)))
+        elif r < 0.2:
+            result.append(chr(rand.choice((0x02, 0x03))))
+        else:
+            result.append(struct.pack('<2B', rand.choice(registers), rand.randrange(0x100)))
+    return result
+
+
+def v1_file(instructions, opl_type=1):
+    """ Returns the contents of a DRO v1 file holding the given raw instructions, with the
+    song length in the header worked out from the delays."""
+    ms_length = 0
+    for raw in instructions:
+        if raw[0] == '\x00':
+            ms_length += ord(raw[1]) + 1
+        elif raw[0] == '\x01':
+            ms_length += struct.unpack('<H', raw[1:3])[0] + 1
+    data = "".join(instructions)
+    return "DBRAWOPL" + struct.pack('<2H', 0, 1) + struct.pack('<3L', ms_length, len(data), opl_type) + data
+
+
+def make_v1_file(num_instructions, rand):
+    return v1_file(random_v1_instructions(num_instructions, rand))
+
+
+def random_v2_instructions(num_instructions, rand):
+    """ Returns a list of the raw bytes of random DRO v2 instructions (delays, and register
+    writes on both banks), as strings."""
+    result = []
+    for _ in xrange(num_instructions):
+        r = rand.random()
+        if r < 0.15:
+            result.append(struct.pack('<2B', V2_SHORT_DELAY_CODE, rand.randrange(0x100)))
+        elif r < 0.17:
+            result.append(struct.pack('<2B', V2_LONG_DELAY_CODE, rand.randrange(4)))
+        else:
+            result.append(struct.pack('<2B', rand.randrange(len(V2_CODEMAP)) | rand.choice((0, 0x80)),
+                                      rand.randrange(0x100)))
+    return result
+
+
+def v2_file(instructions, codemap=V2_CODEMAP):
+    """ Returns the contents of a DRO v2 file holding the given raw instructions, with the
+    song length in the header worked out from the delays."""
+    ms_length = 0
+    for raw in instructions:
+        if ord(raw[0]) == V2_SHORT_DELAY_CODE:
+            ms_length += ord(raw[1]) + 1
+        elif ord(raw[0]) == V2_LONG_DELAY_CODE:
+            ms_length += (ord(raw[1]) + 1) << 8
+    return ("DBRAWOPL" + struct.pack('<2H', 2, 0) +
+            struct.pack('<2L6B', len(instructions), ms_length, 2, 0, 0, V2_SHORT_DELAY_CODE,
+                        V2_LONG_DELAY_CODE, len(codemap)) +
+            array.array('B', codemap).tostring() + "".join(instructions))
+
+
+def make_v2_file(num_instructions, rand):
+    return v2_file(random_v2_instructions(num_instructions, rand))
+
+
+def instructions(dro_song):
+    return [(inst.inst_type, inst.command, inst.value, inst.bank) for inst in dro_song.data]
+
+
+def raw_data(dro_song):
+    return "".join(dro_song.data.get_raw(i).tostring() for i in xrange(len(dro_song.data)))
+
+
+class DROTestCase(unittest.TestCase):
+    """ Sets up the globals that editing a song relies on (undo, events and background tasks)."""
+    def setUp(self):
+        self.rand = random.Random(1234)
+        dro_globals.g_undo_controller = dro_undo.UndoController()
+        dro_globals.g_custom_event_manager = dro_event.CustomEventManager()
+        dro_globals.g_task_master = dro_tasks.TaskMaster()
+
+    def tearDown(self):
+        dro_globals.g_task_master.stop_all_tasks()
+
+    def random_deletion(self, song_length):
+        """ Returns some indexes to delete: either a run of them, or a few scattered ones."""
+        rand = self.rand
+        if rand.random() < 0.5:
+            start = rand.randrange(song_length)
+            return range(start, min(song_length, start + rand.randrange(1, 300)))
+        return sorted(set(rand.randrange(song_length) for _ in xrange(rand.randrange(1, 30))))
+
+
+def v1_index_map_loop(data, start=0):
+    """ The original way of finding where each V1 instruction starts: one instruction at a time."""
+    offsets = []
+    i = start
+    while i < len(data):
+        offsets.append(i)
+        i += dro_data.V1_INSTRUCTION_LENGTHS[data[i]]
+    return offsets
+
+
+class TestReadWriteLock(unittest.TestCase):
+    def setUp(self):
+        self.log = []
+        self.threads = []
+
+    def tearDown(self):
+        for t in self.threads:
+            t.join(5)
+
+    def start(self, name, lock_method, release):
+        """ Starts a thread that takes the lock, logs that it has it, and holds it until the
+        "release" event is set."""
+        def run():
+            with lock_method():
+                self.log.append(name)
+                release.wait(5)
+        t = threading.Thread(target=run)
+        t.daemon = True
+        t.start()
+        self.threads.append(t)
+        return t
+
+    def wait_for(self, condition):
+        for _ in xrange(500):
+            if condition():
+                return
+            time.sleep(0.01)
+        self.fail("Timed out")
+
+    def check_waiting_writer(self, writer_preference):
+        """ Has a reader take the lock, then a writer wait for it, then another reader try to take
+        it. Returns the order they got it in."""
+        lock = dro_util.ReadWriteLock(writer_preference)
+        first_read_done, done = threading.Event(), threading.Event()
+        self.start("read 1", lock.read_locked, first_read_done)
+        self.wait_for(lambda: self.log == ["read 1"])
+        self.start("write", lock.write_locked, done)
+        self.wait_for(lambda: lock._writers_waiting == 1)
+        self.start("read 2", lock.read_locked, done)
+        time.sleep(0.05)
+        # Let everything go once the first reader has finished.
+        done.set()
+        first_read_done.set()
+        for t in self.threads:
+            t.join(5)
+        return self.log
+
+    def test_writer_preference(self):
+        # The second reader waits behind the writer.
+        self.assertEqual(self.check_waiting_writer(True), ["read 1", "write", "read 2"])
+
+    def test_reader_preference(self):
+        self.assertEqual(self.check_waiting_writer(False), ["read 1", "read 2", "write"])
+
+    def test_writes_wait_for_each_other(self):
+        lock = dro_util.ReadWriteLock()
+        first_done, second_done = threading.Event(), threading.Event()
+        self.start("write 1", lock.write_locked, first_done)
+        self.wait_for(lambda: self.log == ["write 1"])
+        self.start("write 2", lock.write_locked, second_done)
+        time.sleep(0.05)
+        self.assertEqual(self.log, ["write 1"])
+        first_done.set()
+        self.wait_for(lambda: self.log == ["write 1", "write 2"])
+        second_done.set()
+
+    def test_reentrant(self):
+        lock = dro_util.ReadWriteLock()
+        with lock.write_locked():
+            with lock.write_locked():
+                with lock.read_locked():
+                    pass
+        with lock.read_locked():
+            with lock.read_locked():
+                pass
+        # Everything's been released, so another thread can write.
+        done = threading.Event()
+        done.set()
+        self.start("write", lock.write_locked, done).join(5)
+        self.assertEqual(self.log, ["write"])
+
+    def test_upgrade(self):
+        lock = dro_util.ReadWriteLock()
+        with lock.read_locked():
+            self.assertRaises(RuntimeError, lock.acquire_write)
+        # The failed attempt didn't leave the lock in a bad state.
+        self.assertEqual(lock._writers_waiting, 0)
+        done = threading.Event()
+        done.set()
+        self.start("write", lock.write_locked, done).join(5)
+        self.assertEqual(self.log, ["write"])
+
+
+class TestV1IndexMap(unittest.TestCase):
+    def setUp(self):
+        self.rand = random.Random(1234)
+
+    def check_index_map(self, data, start=0):
+        expected = v1_index_map_loop(data, start)
+        index_map = dro_data.build_v1_index_map(data, start)
+        self.assertEqual(len(index_map), len(expected))
+        self.assertEqual(list(index_map), expected)
+        self.assertEqual([index_map[slot] for slot in xrange(len(index_map))], expected)
+        for _ in xrange(20):
+            slot_start = self.rand.randrange(len(expected) + 1)
+            slot_stop = self.rand.randrange(slot_start, len(expected) + 1)
+            self.assertEqual(index_map.offsets(slot_start, slot_stop), expected[slot_start:slot_stop])
+        return index_map
+
+    def test_matches_loop(self):
+        data = array.array('B', "".join(random_v1_instructions(30000, self.rand)))
+        self.check_index_map(data)
+        # Chop the end off the last instruction, whatever size it is.
+        for cut in xrange(1, 4):
+            self.check_index_map(data[:-cut])
+
+    def test_odd_sized_instructions(self):
+        # Lots of instructions that aren't two bytes long, back to back, and incomplete ones at the end.
+        for _ in xrange(200):
+            data = array.array('B', [self.rand.choice((0x00, 0x01, 0x02, 0x03, 0x04, 0x20))
+                                     for _ in xrange(self.rand.randrange(50))])
+            self.check_index_map(data)
+
+    def test_chunks(self):
+        # Instructions that cross from one chunk of the scan into the next.
+        chunk_size = dro_data._V1_SCAN_CHUNK_SIZE
+        try:
+            dro_data._V1_SCAN_CHUNK_SIZE = 7
+            data = array.array('B', "".join(random_v1_instructions(3000, self.rand)))
+            self.check_index_map(data)
+        finally:
+            dro_data._V1_SCAN_CHUNK_SIZE = chunk_size
+
+    def test_rebuild_from_middle(self):
+        # Edit an instruction in the middle of the data, then rescan from there on. Together with
+        #  the map of the data before it, it should match a scan of the whole edited data.
+        instructions = random_v1_instructions(20000, self.rand)
+        for _ in xrange(20):
+            i = self.rand.randrange(len(instructions))
+            instructions[i:i + 1] = random_v1_instructions(self.rand.randrange(3), self.rand)
+            start = len("".join(instructions[:i]))
+            data = array.array('B', "".join(instructions))
+            before = list(dro_data.build_v1_index_map(data[:start]))
+            after = self.check_index_map(data, start)
+            self.assertEqual(before + list(after), v1_index_map_loop(data))
+
+    def test_extend(self):
+        first = array.array('B', "".join(random_v1_instructions(1000, self.rand)))
+        second = array.array('B', "".join(random_v1_instructions(1000, self.rand)))
+        index_map = dro_data.build_v1_index_map(first)
+        index_map.extend(dro_data.build_v1_index_map(second), len(first))
+        self.assertEqual(list(index_map), v1_index_map_loop(first + second))
+
+
+class TestPieceTable(DROTestCase):
+    def check_edits(self, data, make_instructions):
+        """ Makes random deletes and inserts, checking the data against a plain list of
+        each instruction's raw bytes."""
+        rand = self.rand
+        expected = [data.get_raw(i).tostring() for i in xrange(len(data))]
+        for step in xrange(2000):
+            r = rand.random()
+            length = len(expected)
+            if r < 0.3 and length > 1:
+                start = rand.randrange(length)
+                stop = min(length - 1, start + rand.randrange(8))
+                # Slices include the stop index.
+                del data[start:stop]
+                del expected[start:stop + 1]
+            elif r < 0.4 and length > 1:
+                i = rand.randrange(length)
+                del data[i]
+                del expected[i]
+            else:
+                i = rand.randrange(length + 1)
+                new_instructions = make_instructions(rand.randrange(1, 4))
+                data.insert_multiple([(i, array.array('B', "".join(new_instructions)))])
+                expected[i:i] = new_instructions
+            if step % 100 == 0:
+                self.assertEqual(len(data), len(expected))
+                self.assertEqual([data.get_raw(i).tostring() for i in xrange(len(data))], expected)
+                self.assertEqual(array.array('B', data.raw_iter()).tostring(), "".join(expected))
+                self.assertEqual(data.raw_len(), sum(len(raw) for raw in expected))
+                self.assertEqual([(inst.inst_type, inst.command, inst.value, inst.bank) for inst in data],
+                                 [data.decode_instruction(array.array('B', raw), 0) for raw in expected])
+
+    def test_v1(self):
+        dro_song = dro_io.DroFileIO().read_from(make_v1_file(3000, self.rand), "test.dro")
+        self.check_edits(dro_song.data, lambda count: random_v1_instructions(count, self.rand))
+
+    def test_v2(self):
+        dro_song = dro_io.DroFileIO().read_from(make_v2_file(3000, self.rand), "test.dro")
+        self.check_edits(dro_song.data, lambda count: random_v2_instructions(count, self.rand))
+
+
+class TestDeleteAndUndo(DROTestCase):
+    def check_round_trip(self, file_data):
+        dro_song = dro_io.DroFileIO().read_from(file_data, "test.dro")
+        undo_controller = dro_globals.get_undo_controller()
+        states = [(instructions(dro_song), raw_data(dro_song), dro_song.ms_length)]
+        length_offset = dro_song.ms_length - dro_song.data.delay_index.total()
+        for _ in xrange(15):
+            expected = list(states[-1][0])
+            index_list = self.random_deletion(len(dro_song.data))
+            for i in reversed(index_list):
+                del expected[i]
+            dro_song.delete_instructions(index_list)
+            states.append((instructions(dro_song), raw_data(dro_song), dro_song.ms_length))
+            self.assertEqual(states[-1][0], expected)
+            # The song's length goes down by the delays deleted.
+            self.assertEqual(dro_song.ms_length - dro_song.data.delay_index.total(), length_offset)
+        for state in reversed(states[:-1]):
+            undo_controller.undo()
+            self.assertEqual((instructions(dro_song), raw_data(dro_song), dro_song.ms_length), state)
+        for state in states[1:]:
+            undo_controller.redo()
+            self.assertEqual((instructions(dro_song), raw_data(dro_song), dro_song.ms_length), state)
+
+    def test_v1(self):
+        self.check_round_trip(make_v1_file(5000, self.rand))
+
+    def test_v2(self):
+        self.check_round_trip(make_v2_file(5000, self.rand))
+
+
+class TestMemoryMapped(DROTestCase):
+    def setUp(self):
+        super(TestMemoryMapped, self).setUp()
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        super(TestMemoryMapped, self).tearDown()
+        shutil.rmtree(self.temp_dir)
+
+    def check_mapped(self, file_data):
+        file_io = dro_io.DroFileIO()
+        file_name = os.path.join(self.temp_dir, "test.dro")
+        with open(file_name, 'wb') as drof:
+            drof.write(file_data)
+        expected = file_io.read(file_name)
+        dro_song = file_io.read(file_name, use_mmap=True)
+        self.assertTrue(dro_song.data.is_mapped())
+        self.assertEqual(instructions(dro_song), instructions(expected))
+        self.assertEqual(dro_song.data.delay_index.total(), expected.data.delay_index.total())
+        # Edit it, then save over the mapped file.
+        for _ in xrange(5):
+            index_list = self.random_deletion(len(dro_song.data))
+            dro_song.delete_instructions(list(index_list))
+            expected.delete_instructions(list(index_list))
+        file_io.write(file_name, dro_song)
+        self.assertFalse(dro_song.data.is_mapped())
+        self.assertEqual(instructions(file_io.read(file_name)), instructions(expected))
+
+    def test_v1(self):
+        self.check_mapped(make_v1_file(5000, self.rand))
+
+    def test_v2(self):
+        self.check_mapped(make_v2_file(5000, self.rand))
+
+
+class TestDelayIndex(DROTestCase):
+    def check_delay_index(self, dro_song):
+        """ Checks the delay index against a walk through the song."""
+        times = [0]
+        for inst in dro_song.data:
+            times.append(times[-1] + (inst.value if inst.inst_type == dro_data.DROInstruction.T_DELAY else 0))
+        delay_index = dro_song.data.delay_index
+        self.assertEqual(delay_index.total(), times[-1])
+        self.assertEqual([delay_index.time_at(i) for i in xrange(len(times))], times)
+        for _ in xrange(20):
+            start = self.rand.randrange(len(times))
+            stop = self.rand.randrange(start, len(times))
+            self.assertEqual(delay_index.time_between(start, stop), times[stop] - times[start])
+        # Times before the start, at the start and end, past the end, and exactly on instructions.
+        for ms in ([-1, 0, 1, times[-1], times[-1] + 1] + times[::97] +
+                   [self.rand.randrange(times[-1] + 1) for _ in xrange(100)]):
+            expected_left = 0 if ms <= 0 else bisect.bisect_left(times, ms)
+            expected_right = 0 if ms < 0 else bisect.bisect_right(times, ms)
+            self.assertEqual(delay_index.bisect_left(ms), expected_left)
+            self.assertEqual(delay_index.bisect_right(ms), expected_right)
+
+    def check_edits(self, file_data):
+        dro_song = dro_io.DroFileIO().read_from(file_data, "test.dro")
+        self.check_delay_index(dro_song)
+        for _ in xrange(10):
+            # Deleting splits up pieces, and undoing it adds pieces from another source.
+            if self.rand.random() < 0.3:
+                dro_globals.get_undo_controller().undo()
+            else:
+                dro_song.delete_instructions(self.random_deletion(len(dro_song.data)))
+            self.check_delay_index(dro_song)
+
+    def test_v1(self):
+        self.check_edits(make_v1_file(3000, self.rand))
+
+    def test_v2(self):
+        self.check_edits(make_v2_file(3000, self.rand))
+
+
+class TestInstructionSearch(DROTestCase):
+    def check_searches(self, dro_song, search_values):
+        song_instructions = instructions(dro_song)
+        length = len(song_instructions)
+        index = dro_song.data.instruction_index
+        for s_inst in search_values:
+            keys = set(dro_song._instruction_keys(s_inst))
+            matches = [i for i, inst in enumerate(song_instructions) if inst[:2] in keys]
+            # The edges of the song, past them, and some random positions.
+            starts = [-5, -1, 0, 1, length - 2, length - 1, length, length + 5]
+            starts += [self.rand.randrange(length) for _ in xrange(30)]
+            for start in starts:
+                following = [i for i in matches if i >= start]
+                preceding = [i for i in matches if i <= start]
+                self.assertEqual(index.find_next(keys, start), following[0] if following else -1)
+                self.assertEqual(index.find_previous(keys, start), preceding[-1] if preceding else -1)
+                stop = self.rand.randrange(max(start, 0), length + 1) if start < length else length
+                self.assertEqual(index.count(keys, max(start, 0), stop),
+                                 len([i for i in matches if start <= i < stop]))
+            self.assertEqual(dro_song.count_instructions(s_inst), len(matches))
+            # The song's own find steps over the instruction it's on, when looking backwards.
+            for start in (0, length // 2, length):
+                following = [i for i in matches if i >= start]
+                preceding = [i for i in matches if i <= start - 2]
+                self.assertEqual(dro_song.find_next_instruction(start, s_inst),
+                                 following[0] if following else -1)
+                self.assertEqual(dro_song.find_next_instruction(start, s_inst, look_backwards=True),
+                                 preceding[-1] if preceding else -1)
+
+    def check_edits(self, dro_song, search_values):
+        self.check_searches(dro_song, search_values)
+        for _ in xrange(5):
+            if self.rand.random() < 0.3:
+                dro_globals.get_undo_controller().undo()
+            else:
+                dro_song.delete_instructions(self.random_deletion(len(dro_song.data)))
+            self.check_searches(dro_song, search_values)
+
+    def test_v1(self):
+        dro_song = dro_io.DroFileIO().read_from(make_v1_file(3000, self.rand), "test.dro")
+        # Registers are the same key whichever bank they're written to.
+        registers = ["%02X" % register for register in REGISTERS[::10]]
+        self.check_edits(dro_song, ["DLYS", "DLYL", "DALL", "BANK"] + registers)
+
+    def test_v2(self):
+        dro_song = dro_io.DroFileIO().read_from(make_v2_file(3000, self.rand), "test.dro")
+        registers = ["%02X" % register for register in V2_CODEMAP[::10]]
+        self.check_edits(dro_song, ["DLYS", "DLYL", "DALL"] + registers + ["FF"])
+
+    def test_write_delay(self):
+        # Adds the chip's write delay for each register write to the total delay.
+        dro_song = dro_io.DroFileIO().read_from(make_v2_file(3000, self.rand), "test.dro")
+        calculator = dro_analysis.DROTotalDelayWithWriteDelayCalculator()
+        calculator.chip_write_delay = 10
+        num_writes = len([inst for inst in instructions(dro_song)
+                          if inst[0] == dro_data.DROInstruction.T_REGISTER])
+        self.assertEqual(calculator.sum_delay(dro_song),
+                         dro_song.data.delay_index.total() + num_writes * 10 // 1000)
+
+
+class TestStreamReader(DROTestCase):
+    def setUp(self):
+        super(TestStreamReader, self).setUp()
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        super(TestStreamReader, self).tearDown()
+        shutil.rmtree(self.temp_dir)
+
+    def check_stream(self, file_data):
+        file_name = os.path.join(self.temp_dir, "test.dro")
+        with open(file_name, 'wb') as drof:
+            drof.write(file_data)
+        dro_song = dro_io.DroFileIO().read(file_name)
+        expected = []
+        for batch in dro_song.data.iter_batches():
+            expected.extend(zip(*batch[1:]))
+        # Tiny chunks, so V1 instructions get split every way they can be.
+        for chunk_size in (1, 2, 3):
+            with dro_io.DroStreamReader(file_name, chunk_size) as reader:
+                self.assertEqual(reader.song.ms_length, dro_song.ms_length)
+                decoded = []
+                for first_index, inst_types, commands, values, banks in reader.iter_chunks():
+                    self.assertEqual(first_index, len(decoded))
+                    decoded.extend(zip(inst_types, commands, values, banks))
+            self.assertEqual(decoded, expected)
+
+    def test_v1(self):
+        self.check_stream(make_v1_file(2000, self.rand))
+
+    def test_v2(self):
+        self.check_stream(make_v2_file(2000, self.rand))
+
+    def test_truncated(self):
+        # The header says there's more data than there is.
+        file_name = os.path.join(self.temp_dir, "test.dro")
+        with open(file_name, 'wb') as drof:
+            drof.write(make_v1_file(100, self.rand)[:-1])
+        with dro_io.DroStreamReader(file_name, 3) as reader:
+            self.assertRaises(dro_io.DROFileException, list, reader.iter_chunks())
+
+
+class TestCompression(DROTestCase):
+    def setUp(self):
+        super(TestCompression, self).setUp()
+        self.temp_dir = tempfile.mkdtemp()
+        self.file_name = os.path.join(self.temp_dir, "test.dro")
+
+    def tearDown(self):
+        super(TestCompression, self).tearDown()
+        shutil.rmtree(self.temp_dir)
+
+    def write_compressed(self, num_instructions):
+        """ Saves a random song compressed. Returns the song, and the file's contents."""
+        file_io = dro_io.DroFileIO()
+        dro_song = file_io.read_from(make_v2_file(num_instructions, self.rand), "test.dro")
+        dro_song.compression = dro_io.DRO_COMPRESSION_ZLIB
+        file_io.write(self.file_name, dro_song)
+        with open(self.file_name, 'rb') as drof:
+            return dro_song, drof.read()
+
+    def test_round_trip(self):
+        # Two full blocks and a short one, then an exact number of blocks, then less than one.
+        instructions_per_block = dro_io.DRO_COMPRESSED_BLOCK_SIZE // 2
+        for num_instructions in (instructions_per_block * 2 + 1000, instructions_per_block * 2, 10):
+            dro_song, file_data = self.write_compressed(num_instructions)
+            compressed_song = dro_io.DroFileIO().read(self.file_name)
+            self.assertEqual(compressed_song.compression, dro_io.DRO_COMPRESSION_ZLIB)
+            self.assertEqual(instructions(compressed_song), instructions(dro_song))
+            self.assertEqual(raw_data(compressed_song), raw_data(dro_song))
+
+    def test_edited(self):
+        # The pieces of an edited song don't line up with the blocks.
+        file_io = dro_io.DroFileIO()
+        dro_song = file_io.read_from(make_v2_file(5000, self.rand), "test.dro")
+        for _ in xrange(10):
+            dro_song.delete_instructions(self.random_deletion(len(dro_song.data)))
+        dro_globals.get_undo_controller().undo()
+        buffer_file = StringIO.StringIO()
+        dro_io.DROBlockTable.write_data(buffer_file, dro_song.data, block_size=100)
+        buffer_file.seek(0)
+        block_table = dro_io.DROBlockTable.fromfile(buffer_file, dro_song.data.raw_len())
+        self.assertEqual("".join(block_table.iter_blocks(buffer_file)), raw_data(dro_song))
+
+    def test_read_block(self):
+        dro_song, file_data = self.write_compressed(dro_io.DRO_COMPRESSED_BLOCK_SIZE + 1000)
+        expected = []
+        for batch in dro_song.data.iter_batches():
+            expected.extend(zip(*batch[1:]))
+        with dro_io.DroStreamReader(self.file_name) as reader:
+            num_blocks = reader.num_blocks()
+            self.assertEqual(num_blocks, 3)
+            # The last block is the short one. Read them out of order.
+            for block_num in (num_blocks - 1, 0, 1):
+                first_index, inst_types, commands, values, banks = reader.read_block(block_num)
+                self.assertEqual(first_index, block_num * dro_io.DRO_COMPRESSED_BLOCK_SIZE // 2)
+                block_instructions = zip(inst_types, commands, values, banks)
+                self.assertEqual(len(block_instructions),
+                                 min(dro_io.DRO_COMPRESSED_BLOCK_SIZE // 2, len(expected) - first_index))
+                self.assertEqual(block_instructions,
+                                 expected[first_index:first_index + len(block_instructions)])
+
+    def check_corrupt(self, file_data):
+        with open(self.file_name, 'wb') as drof:
+            drof.write(file_data)
+        self.assertRaises(dro_io.DROFileException, dro_io.DroFileIO().read, self.file_name)
+
+    def test_corrupt_table(self):
+        dro_song, file_data = self.write_compressed(dro_io.DRO_COMPRESSED_BLOCK_SIZE + 1000)
+        table_offset = 26 + len(V2_CODEMAP)
+        table = struct.unpack('<5L', file_data[table_offset:table_offset + 20])
+        self.assertEqual(table[:2], (dro_io.DRO_COMPRESSED_BLOCK_SIZE, 3))
+        def with_table(*table):
+            return (file_data[:table_offset] + struct.pack('<%dL' % len(table), *table) +
+                    file_data[table_offset + 4 * len(table):])
+        self.check_corrupt(with_table(0))                              # no block size
+        self.check_corrupt(with_table(dro_io.DRO_COMPRESSED_BLOCK_SIZE + 1)) # odd block size
+        self.check_corrupt(with_table(dro_io.DRO_COMPRESSED_BLOCK_SIZE, 2))  # wrong number of blocks
+        self.check_corrupt(with_table(*(table[:2] + (table[2] - 1,))))  # wrong compressed size
+        self.check_corrupt(with_table(1024))                           # block size doesn't match the data
+        self.check_corrupt(file_data[:table_offset + 12])              # ends in the table
+
+
+class TestRecovery(DROTestCase):
+    def setUp(self):
+        super(TestRecovery, self).setUp()
+        self.temp_dir = tempfile.mkdtemp()
+        self.file_name = os.path.join(self.temp_dir, "test.dro")
+
+    def tearDown(self):
+        super(TestRecovery, self).tearDown()
+        shutil.rmtree(self.temp_dir)
+
+    def recover(self, file_data):
+        with open(self.file_name, 'wb') as drof:
+            drof.write(file_data)
+        return dro_io.DroFileIO().read_recover(self.file_name)
+
+    def check_clean(self, file_data):
+        dro_song, report = self.recover(file_data)
+        self.assertTrue(report.is_clean())
+        expected = dro_io.DroFileIO().read(self.file_name)
+        self.assertEqual(report.bytes_recovered, expected.data.raw_len())
+        self.assertEqual(instructions(dro_song), instructions(expected))
+
+    def check_junk(self, raw_instructions, make_file, junk, header_length):
+        # Junk bytes that can't start an instruction, dropped in between two instructions.
+        expected = dro_io.DroFileIO().read_from(make_file(raw_instructions), "test.dro")
+        split = len(raw_instructions) // 2
+        dro_song, report = self.recover(make_file(raw_instructions[:split] + [junk] + raw_instructions[split:]))
+        self.assertEqual(instructions(dro_song), instructions(expected))
+        self.assertEqual(report.skipped, [(header_length + len("".join(raw_instructions[:split])), len(junk),
+                                           "invalid instructions")])
+
+    def check_truncated(self, raw_instructions, make_file):
+        expected = dro_io.DroFileIO().read_from(make_file(raw_instructions[:-1]), "test.dro")
+        file_data = make_file(raw_instructions)[:-1]
+        dro_song, report = self.recover(file_data)
+        self.assertEqual(instructions(dro_song), instructions(expected))
+        self.assertEqual(len(report.problems), 1) # the data length in the header is wrong
+        self.assertEqual(report.skipped, [(len(file_data) - len(raw_instructions[-1]) + 1,
+                                           len(raw_instructions[-1]) - 1,
+                                           "invalid or incomplete instructions at the end of the data")])
+
+    def test_v1(self):
+        raw_instructions = random_v1_instructions(2000, self.rand)
+        self.check_clean(v1_file(raw_instructions))
+        self.check_junk(raw_instructions, v1_file, "\xFF" * 5, len(v1_file([])))
+        # A register write, so the byte left over can't be read as an instruction of its own.
+        self.check_truncated(raw_instructions + [struct.pack('<2B', REGISTERS[0], 0x12)], v1_file)
+
+    def test_v2(self):
+        raw_instructions = random_v2_instructions(2000, self.rand)
+        self.check_clean(v2_file(raw_instructions))
+        # 0x70 isn't in the codemap, or a delay code.
+        self.check_junk(raw_instructions, v2_file, "\x70\xF0" * 3 + "\x70", len(v2_file([])))
+        self.check_truncated(raw_instructions, v2_file)
+
+
+def writes_between_delays(dro_song):
+    """ Returns the register writes to each bank between each pair of delays in a song, as
+    (low bank writes, high bank writes), along with the delays."""
+    bank = 0
+    segments = [([], [])]
+    delays = []
+    for inst in dro_song.data:
+        if inst.inst_type == dro_data.DROInstruction.T_DELAY:
+            delays.append(inst.value)
+            segments.append(([], []))
+        elif inst.inst_type == dro_data.DROInstruction.T_BANK_SWITCH:
+            bank = inst.value
+        else:
+            # V1 instructions don't say which bank they're for.
+            segments[-1][bank if inst.bank is None else inst.bank].append((inst.command, inst.value))
+    return segments, delays
+
+
+class TestDRO2to1(unittest.TestCase):
+    def setUp(self):
+        self.rand = random.Random(1234)
+
+    def check_conversion(self, file_data):
+        v2_song = dro_io.DroFileIO().read_from(file_data, "test.dro")
+        v1_file = StringIO.StringIO()
+        dro2to1.convertDRO2to1(StringIO.StringIO(file_data), v1_file)
+        v1_song = dro_io.DroFileIO().read_from(v1_file.getvalue(), "test.dro")
+        self.assertEqual(v1_song.file_version, dro_io.DRO_FILE_V1)
+        self.assertEqual(v1_song.ms_length, v2_song.ms_length)
+        # Writes to different banks get regrouped, but only between delays.
+        v1_segments, v1_delays = writes_between_delays(v1_song)
+        v2_segments, v2_delays = writes_between_delays(v2_song)
+        self.assertEqual(v1_segments, v2_segments)
+        self.assertEqual(v1_delays, v2_delays)
+        self.assertEqual(sum(v1_delays), sum(v2_delays))
+
+    def test_random(self):
+        self.check_conversion(make_v2_file(5000, self.rand))
+
+    def test_low_registers(self):
+        # Registers below 0x05 have to be escaped in V1.
+        codemap = [0x01, 0x04, 0x05, 0xBD]
+        raw_instructions = [struct.pack('<2B', code | bank, self.rand.randrange(0x100))
+                            for code in xrange(len(codemap)) for bank in (0, 0x80)]
+        self.check_conversion(v2_file(raw_instructions + [struct.pack('<2B', V2_SHORT_DELAY_CODE, 9)] +
+                                      raw_instructions, codemap))
+
+    def test_read_block_size(self):
+        # The data gets read a block at a time, so go over a block.
+        old_block_size = dro2to1.READ_BLOCK_SIZE
+        dro2to1.READ_BLOCK_SIZE = 6
+        try:
+            self.check_conversion(make_v2_file(1001, self.rand))
+        finally:
+            dro2to1.READ_BLOCK_SIZE = old_block_size
+
+
+def merged_events(dro_song):
+    """ Returns the register writes in a song, as (bank, register, value), with each run of
+    delays between them merged into a single total."""
+    bank = 0
+    events = []
+    for inst in dro_song.data:
+        if inst.inst_type == dro_data.DROInstruction.T_DELAY:
+            if events and isinstance(events[-1], (int, long)):
+                events[-1] += inst.value
+            else:
+                events.append(inst.value)
+        elif inst.inst_type == dro_data.DROInstruction.T_BANK_SWITCH:
+            bank = inst.value
+        else:
+            events.append((bank if inst.bank is None else inst.bank, inst.command, inst.value))
+    return events
+
+
+class TestTranscodeV1ToV2(DROTestCase):
+    def setUp(self):
+        super(TestTranscodeV1ToV2, self).setUp()
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        super(TestTranscodeV1ToV2, self).tearDown()
+        shutil.rmtree(self.temp_dir)
+
+    def transcode(self, file_data):
+        """ Transcodes a V1 file, and reads back the saved V2 file. Returns both songs."""
+        file_io = dro_io.DroFileIO()
+        v1_song = file_io.read_from(file_data, "test.dro")
+        file_name = os.path.join(self.temp_dir, "test_2.dro")
+        file_io.write(file_name, dro_io.transcode_v1_to_v2(v1_song))
+        return v1_song, file_io.read(file_name)
+
+    def test_random(self):
+        # (DRO v2 only has room for 126 registers.)
+        v1_song, v2_song = self.transcode(v1_file(random_v1_instructions(5000, self.rand, REGISTERS[:126])))
+        self.assertEqual(v2_song.file_version, dro_io.DRO_FILE_V2)
+        self.assertEqual(merged_events(v2_song), merged_events(v1_song))
+        self.assertEqual(v2_song.ms_length, v1_song.data.delay_index.total())
+
+    def test_long_delays(self):
+        # Three of the longest V1 delay in a row, then some more, get merged then split again.
+        longest = struct.pack('<BH', 0x01, 0xFFFF)
+        write = struct.pack('<2B', REGISTERS[0], 0x12)
+        v1_song, v2_song = self.transcode(v1_file([write, longest, longest, longest,
+                                                   struct.pack('<2B', 0x00, 0x10), write]))
+        self.assertEqual(merged_events(v2_song), merged_events(v1_song))
+        self.assertEqual(v2_song.ms_length, 3 * 0x10000 + 0x11)
+
+    def test_append_v2_delay(self):
+        for ms in (1, 255, 256, 257, 0xFFFF, 0x10000, 0x10001, 0x10100, 5 * 0x10000 + 300):
+            data = array.array('B')
+            dro_io._append_v2_delay(data, ms)
+            codes, values = data[::2], data[1::2]
+            total = 0
+            for code, value in zip(codes, values):
+                if code == dro_io.TRANSCODE_LONG_DELAY_CODE:
+                    total += (value + 1) << 8
+                else:
+                    self.assertEqual(code, dro_io.TRANSCODE_SHORT_DELAY_CODE)
+                    total += value + 1
+            self.assertEqual(total, ms)
+            # As few instructions as possible: full long delays, then at most one of each.
+            self.assertEqual(len(codes), -(-(ms >> 8) // 256) + (1 if ms & 0xFF else 0))
+            self.assertTrue(codes.count(dro_io.TRANSCODE_SHORT_DELAY_CODE) <= 1)
+
+    def test_too_many_registers(self):
+        # Registers from 0x05 up don't need escaping in V1.
+        def writes(num_registers):
+            return [struct.pack('<2B', register, 0) for register in xrange(0x05, 0x05 + num_registers)]
+        # Switching banks doesn't use up any more codes.
+        v1_song, v2_song = self.transcode(v1_file(writes(126) + ['\x03'] + writes(126)))
+        self.assertEqual(len(v2_song.codemap), 126)
+        self.assertEqual(merged_events(v2_song), merged_events(v1_song))
+        v1_song = dro_io.DroFileIO().read_from(v1_file(writes(127)), "test.dro")
+        self.assertRaises(dro_io.DROFileException, dro_io.transcode_v1_to_v2, v1_song)
+
+    def test_hardware_types(self):
+        low_bank_only = [struct.pack('<2B', REGISTERS[0], 0x12)]
+        high_bank = ['\x03'] + low_bank_only
+        for v1_type, v2_type in enumerate(dro_io.V1_TO_V2_HARDWARE_TYPES):
+            self.assertEqual(self.transcode(v1_file(high_bank, v1_type))[1].opl_type, v2_type)
+        # Unknown types fall back to OPL-2, or OPL-3 if the high bank is used.
+        for unknown_type in (3, 0xFF):
+            self.assertEqual(self.transcode(v1_file(low_bank_only, unknown_type))[1].opl_type, 0)
+            self.assertEqual(self.transcode(v1_file(high_bank, unknown_type))[1].opl_type, 2)
+
+
+class TestValidateFiles(unittest.TestCase):
+    def setUp(self):
+        self.rand = random.Random(1234)
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_validate_files(self):
+        # Start with a register write, or it counts as a bogus first delay.
+        write = [struct.pack('<2B', REGISTERS[0], 0x12)]
+        v1_data = v1_file(write + random_v1_instructions(500, self.rand))
+        v2_data = v2_file(write + random_v2_instructions(500, self.rand))
+        files = {
+            "good_1.dro": v1_data,
+            "good_2.dro": v2_data,
+            "truncated_1.dro": v1_data[:-10],
+            "truncated_2.dro": v2_data[:-10],
+            "header.dro": v2_data[:20],
+            "junk_1.dro": v1_data + "junk",
+            "junk_2.dro": v2_data + "more junk",
+        }
+        for name, file_data in files.iteritems():
+            with open(os.path.join(self.temp_dir, name), 'wb') as drof:
+                drof.write(file_data)
+        file_names = dro_io.find_dro_files(self.temp_dir)
+        reports = dro_validate.validate_files(file_names, processes=2)
+        self.assertEqual([report["file"] for report in reports], file_names)
+        reports = dict((os.path.basename(report["file"]), report) for report in reports)
+
+        for name in ("good_1.dro", "good_2.dro"):
+            self.assertTrue(reports[name]["ok"])
+            self.assertIsNone(reports[name]["header_error"])
+            self.assertEqual(reports[name]["leftover_bytes"], 0)
+            self.assertEqual(reports[name]["num_instructions"], 501)
+            self.assertEqual(reports[name]["calculated_ms_length"], reports[name]["ms_length"])
+        for name in ("truncated_1.dro", "truncated_2.dro", "header.dro"):
+            self.assertFalse(reports[name]["ok"])
+            self.assertIsNotNone(reports[name]["header_error"])
+            self.assertIsNone(reports[name]["num_instructions"])
+        for name, junk in (("junk_1.dro", "junk"), ("junk_2.dro", "more junk")):
+            self.assertFalse(reports[name]["ok"])
+            self.assertIsNone(reports[name]["header_error"])
+            self.assertEqual(reports[name]["leftover_bytes"], len(junk))
+            self.assertEqual(reports[name]["num_instructions"], 501)
+
+
+class TestSave(DROTestCase):
+    def setUp(self):
+        super(TestSave, self).setUp()
+        self.temp_dir = tempfile.mkdtemp()
+        self.file_name = os.path.join(self.temp_dir, "test.dro")
+        self.file_data = make_v2_file(2000, self.rand)
+        with open(self.file_name, 'wb') as drof:
+            drof.write(self.file_data)
+
+    def tearDown(self):
+        super(TestSave, self).tearDown()
+        shutil.rmtree(self.temp_dir)
+
+    def check_unchanged(self):
+        # The original is still there as it was, and the temporary file's gone.
+        self.assertEqual(os.listdir(self.temp_dir), ["test.dro"])
+        with open(self.file_name, 'rb') as drof:
+            self.assertEqual(drof.read(), self.file_data)
+
+    def test_replaces_file(self):
+        dro_song = dro_io.DroFileIO().read(self.file_name)
+        dro_song.delete_instructions(range(100))
+        dro_io.DroFileIO().write(self.file_name, dro_song)
+        self.assertEqual(os.listdir(self.temp_dir), ["test.dro"])
+        self.assertEqual(instructions(dro_io.DroFileIO().read(self.file_name)), instructions(dro_song))
+
+    def test_failed_write(self):
+        dro_song = dro_io.DroFileIO().read(self.file_name)
+        dro_song.delete_instructions(range(100))
+        def failing_write_data(self, drof, dro_song):
+            drof.write("partly written")
+            raise IOError("Disk full")
+        old_write_data = dro_io.DroFileIOv2.write_data
+        dro_io.DroFileIOv2.write_data = failing_write_data
+        try:
+            self.assertRaises(IOError, dro_io.DroFileIO().write, self.file_name, dro_song)
+        finally:
+            dro_io.DroFileIOv2.write_data = old_write_data
+        self.check_unchanged()
+
+    def test_failed_replace(self):
+        dro_song = dro_io.DroFileIO().read(self.file_name)
+        dro_song.delete_instructions(range(100))
+        def failing_replace_file(temp_name, file_name):
+            raise OSError("Access denied")
+        old_replace_file = dro_io._replace_file
+        dro_io._replace_file = failing_replace_file
+        try:
+            self.assertRaises(OSError, dro_io.DroFileIO().write, self.file_name, dro_song)
+        finally:
+            dro_io._replace_file = old_replace_file
+        self.check_unchanged()
+
+
+class TestIncrementalSave(DROTestCase):
+    def setUp(self):
+        super(TestIncrementalSave, self).setUp()
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        super(TestIncrementalSave, self).tearDown()
+        shutil.rmtree(self.temp_dir)
+
+    def test_matches_full_write(self):
+        file_io = dro_io.DroFileIO()
+        incremental_name = os.path.join(self.temp_dir, "incremental.dro")
+        full_name = os.path.join(self.temp_dir, "full.dro")
+        with open(incremental_name, 'wb') as drof:
+            drof.write(make_v2_file(20000, self.rand))
+        dro_song = file_io.read(incremental_name)
+        for _ in xrange(5):
+            for _ in xrange(3):
+                dro_song.delete_instructions(self.random_deletion(len(dro_song.data)))
+            if self.rand.random() < 0.5:
+                dro_globals.get_undo_controller().undo()
+            self.assertTrue(file_io.write_incremental(incremental_name, dro_song))
+            file_io.write(full_name, dro_song)
+            with open(incremental_name, 'rb') as drof:
+                incremental_data = drof.read()
+            with open(full_name, 'rb') as drof:
+                full_data = drof.read()
+            self.assertEqual(incremental_data, full_data)
+            # The full write leaves the song saved to the other file, so carry on from this one.
+            dro_song = file_io.read(incremental_name)
+
+
+class TestSuffixArray(unittest.TestCase):
+    def check_symbols(self, symbols):
+        sa = dro_analysis.build_suffix_array(symbols)
+        self.assertEqual(list(sa), sorted(xrange(len(symbols)), key=lambda i: symbols[i:]))
+        lcp = dro_analysis.build_lcp_array(symbols, sa)
+        for i in xrange(1, len(sa)):
+            first, second = symbols[sa[i - 1]:], symbols[sa[i]:]
+            length = 0
+            while length < min(len(first), len(second)) and first[length] == second[length]:
+                length += 1
+            self.assertEqual(lcp[i], length)
+
+    def test_edge_cases(self):
+        for symbols in ([], [0], [5, 5], [3] * 50, [1, 2] * 40, [2, 1, 0] * 30 + [2]):
+            self.check_symbols(symbols)
+
+    def test_random(self):
+        rand = random.Random(1234)
+        for alphabet in (2, 3, 10, 300):
+            for _ in xrange(20):
+                self.check_symbols([rand.randrange(alphabet) for _ in xrange(rand.randrange(1, 400))])
+
+    def test_song_symbols(self):
+        # Repeats, like a song that loops.
+        rand = random.Random(1234)
+        body = [rand.randrange(20) for _ in xrange(300)]
+        self.check_symbols([rand.randrange(20) for _ in xrange(50)] + body * 3 + body[:100])
+
+
+class TestRepeatedRegions(DROTestCase):
+    def test_looping_song(self):
+        # An intro, then the loop played two and a bit times.
+        intro = random_v2_instructions(200, self.rand)
+        body = random_v2_instructions(700, self.rand)
+        dro_song = dro_io.DroFileIO().read_from(v2_file(intro + body * 3 + body[:100]), "test.dro")
+        result = dro_analysis.DROLoopAnalyzer().analyze_repeated_regions(dro_song).result
+        self.assertIn("loop start=200, loops back at=900, loop length=700,", result.splitlines()[1])
+        self.assertIn("The song may loop back to instruction 200 at instruction 900.", result)
+
+
+class TestRollingHash(DROTestCase):
+    WINDOW_LENGTHS = (64, 512, 4096)
+
+    def random_symbols(self, n):
+        # Plenty of different symbols, so random data never repeats by chance.
+        return array.array('i', (self.rand.randrange(0x10000) for _ in xrange(n)))
+
+    def test_planted_repeat(self):
+        first, period, length = 1000, 6000, 5000
+        symbols = self.random_symbols(20000)
+        symbols[first + period:first + period + length] = symbols[first:first + length]
+        # Make sure the repeat doesn't go any further by chance.
+        for position in (first - 1, first + length):
+            symbols[position + period] = symbols[position] + 1
+        for window_length in self.WINDOW_LENGTHS:
+            repeats = list(dro_analysis._iter_hash_repeats(symbols, window_length))
+            # Every window inside the repeat, and nothing else.
+            self.assertEqual(repeats, [(position, period)
+                                       for position in xrange(first, first + length - window_length + 1)])
+            for position, found_period in (repeats[0], repeats[len(repeats) // 2], repeats[-1]):
+                self.assertEqual(dro_analysis._extend_repeat(symbols, position, position + found_period),
+                                 (first, length))
+
+    def test_random(self):
+        symbols = self.random_symbols(20000)
+        for window_length in self.WINDOW_LENGTHS:
+            self.assertEqual(list(dro_analysis._iter_hash_repeats(symbols, window_length)), [])
+
+    def test_looping_song(self):
+        # Long enough to use every window length.
+        intro = random_v2_instructions(300, self.rand)
+        body = random_v2_instructions(5000, self.rand)
+        dro_song = dro_io.DroFileIO().read_from(v2_file(intro + body * 2 + body[:500]), "test.dro")
+        result = dro_analysis.DROLoopAnalyzer().analyze_rolling_hash_candidates(dro_song).result
+        self.assertIn("loop start=300, loops back at=5300, loop length=5000, repeated for=5500,",
+                      result.splitlines()[1])
+
+
+class FailingLoopAnalyzer(dro_analysis.DROLoopAnalyzer):
+    """ A loop analyzer with a method that always fails. (Module level, so the workers can
+    create one.)"""
+    def __init__(self):
+        super(FailingLoopAnalyzer, self).__init__()
+        self.analysis_methods = [self.analyze_latest_start_match, self.analyze_broken]
+
+    def analyze_broken(self, dro_song):
+        raise ValueError("Broken analysis")
+
+
+class TestParallelLoopAnalysis(DROTestCase):
+    def setUp(self):
+        super(TestParallelLoopAnalysis, self).setUp()
+        intro = random_v2_instructions(100, self.rand)
+        body = random_v2_instructions(400, self.rand)
+        self.dro_song = dro_io.DroFileIO().read_from(v2_file(intro + body * 2 + body[:50]), "test.dro")
+        self.events = []
+        event_manager = dro_globals.custom_event_manager()
+        event_manager.bind_event("LOOP_ANALYSIS_RESULT", self, self.events.append)
+        event_manager.bind_event("LOOP_ANALYSIS_FINISHED", self, self.events.append)
+
+    def test_matches_single_process(self):
+        expected = [str(result) for result in dro_analysis.DROLoopAnalyzer().analyze_dro(self.dro_song)]
+        analyzer = dro_analysis.DROLoopAnalyzer()
+        results = dro_analysis.run_loop_analysis(analyzer, self.dro_song, processes=2)
+        self.assertEqual([str(result) for result in results], expected)
+        # A result event for each method, in whatever order they finished, then the finished event.
+        self.assertEqual(sorted((event.index, str(event.result)) for event in self.events[:-1]),
+                         list(enumerate(expected)))
+        finished = self.events[-1]
+        self.assertIs(finished.analyzer, analyzer)
+        self.assertIs(finished.results, results)
+        self.assertIsNone(finished.error)
+
+    def test_failing_worker(self):
+        self.assertRaises(ValueError, FailingLoopAnalyzer().analyze_dro_parallel, self.dro_song, None, 2)
+        # Through run_loop_analysis, the end of the analysis is still reported.
+        analyzer = FailingLoopAnalyzer()
+        self.assertIsNone(dro_analysis.run_loop_analysis(analyzer, self.dro_song, processes=2))
+        finished = self.events[-1]
+        self.assertIs(finished.analyzer, analyzer)
+        self.assertIsNone(finished.results)
+        self.assertIn("ValueError: Broken analysis", finished.error)
+
+
+class TestRegisterReanalysis(DROTestCase):
+    def check_reanalysis(self, file_data):
+        dro_song = dro_io.DroFileIO().read_from(file_data, "test.dro")
+        previous = dro_analysis.DRODetailedRegisterAnalyzer()
+        previous.analyze_dro(dro_song)
+        deleted = None
+        for _ in xrange(15):
+            # Edit the data directly, so no analysis is started in the background. The changes
+            #  are described the same way DROSong.delete_instructions and its undo describe them.
+            if deleted is None or self.rand.random() < 0.6:
+                deleted = dro_song.data.delete_multiple(self.random_deletion(len(dro_song.data)))
+                ranges = deleted[0]
+                num_deleted = sum(stop - start for start, stop in ranges)
+                changes = (ranges[0][0], ranges[-1][1] - num_deleted, -num_deleted)
+            else:
+                # Undo the last deletion.
+                dro_song.data.reinsert_multiple(deleted)
+                ranges = deleted[0]
+                num_inserted = sum(stop - start for start, stop in ranges)
+                changes = (ranges[0][0], ranges[-1][1], num_inserted)
+                deleted = None
+            reanalyzer = dro_analysis.DRODetailedRegisterAnalyzer()
+            result = reanalyzer.reanalyze_dro(dro_song, previous, *changes)
+            expected = dro_analysis.DRODetailedRegisterAnalyzer().analyze_dro(dro_song)
+            self.assertEqual(result, expected)
+            previous = reanalyzer
+
+    def test_v1(self):
+        self.check_reanalysis(make_v1_file(15000, self.rand))
+
+    def test_v2(self):
+        self.check_reanalysis(make_v2_file(15000, self.rand))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,162 @@
+#!/usr/bin/python
+#
+#    Use, distribution, and modification of the DRO Trimmer binaries, source code,
+#    or documentation, is subject to the terms of the MIT license, as below.
+#
+#    Copyright (c) 2008 - 2014 Laurence Dougal Myers
+#
+#    Permission is hereby granted, free of charge, to any person obtaining a copy
+#    of this software and associated documentation files (the "Software"), to deal
+#    in the Software without restriction, including without limitation the rights
+#    to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#    copies of the Software, and to permit persons to whom the Software is
+#    furnished to do so, subject to the following conditions:
+#
+#    The above copyright notice and this permission notice shall be included in
+#    all copies or substantial portions of the Software.
+#
+#    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+#    THE SOFTWARE.
+
+
+from __future__ import with_statement
+import json
+import multiprocessing
+import optparse
+import os
+import struct
+import sys
+import dro_analysis
+import dro_globals
+import dro_io
+import dro_util
+
+
+def validate_file(file_name):
+    """ Loads a DRO file and checks it for problems. Returns a report as a dict, with the keys:
+        file: the file name
+        file_version, ms_length, num_instructions: from the file, or None if it couldn't be loaded
+        header_error: why the file couldn't be loaded (a bad header, or too little data), or None
+        leftover_bytes: bytes found after the end of the song data
+        bogus_first_delay: whether the song starts with a delay (see DROFirstDelayAnalyzer)
+        length_mismatch: whether the song's delays don't add up to the length in the header
+            (see DROTotalDelayMismatchAnalyzer)
+        calculated_ms_length: what the song's delays do add up to
+        ok: whether none of the above problems were found
+
+    Meant to be run in a worker process, so it never raises DROTrimmerException."""
+    report = {
+        "file": file_name,
+        "file_version": None,
+        "ms_length": None,
+        "num_instructions": None,
+        "header_error": None,
+        "leftover_bytes": 0,
+        "bogus_first_delay": False,
+        "length_mismatch": False,
+        "calculated_ms_length": None,
+        "ok": False
+    }
+    try:
+        with file(file_name, 'rb') as drof:
+            reader = dro_io.DroFileIO().get_reader(drof)
+            dro_song, byte_length = reader.read_header(file_name, drof)
+            report["file_version"] = dro_song.file_version
+            report["ms_length"] = dro_song.ms_length
+            # Map the data rather than reading it in, only the delays get looked at.
+            reader.load_data(dro_song, drof, byte_length, use_mmap=True)
+            report["leftover_bytes"] = os.fstat(drof.fileno()).st_size - drof.tell()
+    except struct.error:
+        report["header_error"] = "The DRO file is too short to hold a complete header."
+        return report
+    except (dro_util.DROTrimmerException, EnvironmentError), e:
+        report["header_error"] = str(e)
+        return report
+
+    report["num_instructions"] = len(dro_song.data)
+    try:
+        first_delay_analyzer = dro_analysis.DROFirstDelayAnalyzer()
+        mismatch_analyzer = dro_analysis.DROTotalDelayMismatchAnalyzer()
+        dro_analysis.DROCompositeAnalyzer([first_delay_analyzer, mismatch_analyzer]).analyze_dro(dro_song)
+        report["bogus_first_delay"] = first_delay_analyzer.result
+        report["length_mismatch"] = mismatch_analyzer.result
+        report["calculated_ms_length"] = mismatch_analyzer.calculated_delay
+    except (dro_util.DROTrimmerException, IndexError), e:
+        # Unknown V2 commands, or a V1 instruction cut off at the end of the data.
+        report["header_error"] = "Could not decode the song data: %s" % (e,)
+        return report
+    report["ok"] = not (report["leftover_bytes"] or report["bogus_first_delay"] or report["length_mismatch"])
+    return report
+
+
+def validate_files(file_names, processes=None):
+    """ Validates the given DRO files using a pool of worker processes, one file at a time per
+    process (see validate_file). "processes" defaults to the number of CPUs.
+    Returns a list of reports, in the same order as the file names."""
+    pool = multiprocessing.Pool(processes)
+    try:
+        reports = pool.map(validate_file, file_names, chunksize=1)
+        pool.close()
+    except:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+    return reports
+
+
+def __parse_arguments():
+    usage = ("Usage: %prog [options] directory [directory ...]\n\n" +
+             "Checks every DRO file in the given directories for problems, and outputs a report\n" +
+             "in JSON format.")
+    version = dro_globals.g_app_version
+    oparser = optparse.OptionParser(usage, version=version)
+    oparser.add_option("-j", "--processes", type="int", dest="processes", default=None,
+        help="The number of files to check at once. Defaults to the number of CPUs.")
+    oparser.add_option("-o", "--output", dest="output", default=None,
+        help="The file to write the report to. Defaults to printing it out.")
+    options, args = oparser.parse_args()
+    return oparser, options, args
+
+
+def main():
+    oparser, options, args = __parse_arguments()
+    if len(args) < 1:
+        print "Please pass the name of at least one directory to check."
+        oparser.print_help()
+        return 1
+    for dir_name in args:
+        if not os.path.isdir(dir_name):
+            print "Directory not found, or is not a directory: %s" % dir_name
+            return 3
+
+    file_names = []
+    for dir_name in args:
+        file_names.extend(dro_io.find_dro_files(dir_name))
+    try:
+        reports = validate_files(file_names, options.processes)
+    except KeyboardInterrupt, ke:
+        return 2
+    summary = {
+        "num_files": len(reports),
+        "num_problems": sum(1 for report in reports if not report["ok"]),
+        "files": reports
+    }
+    if options.output is None:
+        json.dump(summary, sys.stdout, indent=2, sort_keys=True)
+        print
+    else:
+        with file(options.output, 'w') as output_file:
+            json.dump(summary, output_file, indent=2, sort_keys=True)
+        print "Checked %i files, found %i with problems." % (summary["num_files"], summary["num_problems"])
+    return 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support() # for py2exe
+    sys.exit(main())